@@ -19,6 +19,8 @@ from routes.access_cards import access_cards_bp
 from routes.employees import employees_bp
 from routes.transactions import transactions_bp
 from routes.reports import reports_bp
+from routes.lookup import lookup_bp
+from routes.search import search_bp
 
 # Register blueprints
 app.register_blueprint(auth_bp, url_prefix='/auth')
@@ -28,6 +30,30 @@ app.register_blueprint(access_cards_bp, url_prefix='/access-cards')
 app.register_blueprint(employees_bp, url_prefix='/employees')
 app.register_blueprint(transactions_bp, url_prefix='/transactions')
 app.register_blueprint(reports_bp, url_prefix='/reports')
+app.register_blueprint(lookup_bp, url_prefix='/lookup')
+app.register_blueprint(search_bp, url_prefix='/search')
+
+# Commit each request's changes once, after the view returns
+from utils.unit_of_work import init_unit_of_work
+init_unit_of_work(app)
+
+# Register CLI commands
+from utils.commands import register_commands
+register_commands(app)
+
+# Start the overdue sweeper once the app is serving requests
+@app.before_first_request
+def start_overdue_sweeper():
+    if app.config['OVERDUE_SWEEPER_ENABLED']:
+        from utils.overdue_sweeper import OverdueSweeper
+        OverdueSweeper(app, interval=app.config['OVERDUE_SWEEP_INTERVAL']).start()
+
+# Keep this worker's in-process caches in sync with the other workers
+@app.before_first_request
+def start_invalidation_bus():
+    from utils.invalidation_bus import invalidation_bus
+    if app.config['INVALIDATION_BUS_ENABLED'] and invalidation_bus.enabled:
+        invalidation_bus.start(app)
 
 # Error handlers
 @app.errorhandler(404)
@@ -1,4 +1,5 @@
 import os
+import tempfile
 from dotenv import load_dotenv
 
 load_dotenv()
@@ -31,3 +32,57 @@ class Config:
     SMTP_PORT = int(os.getenv('SMTP_PORT', '587'))
     SMTP_USERNAME = os.getenv('SMTP_USERNAME')
     SMTP_PASSWORD = os.getenv('SMTP_PASSWORD')
+    
+    # Pagination
+    PAGE_SIZE_DEFAULT = int(os.getenv('PAGE_SIZE_DEFAULT', '50'))
+    PAGE_SIZE_MAX = int(os.getenv('PAGE_SIZE_MAX', '500'))
+    
+    # Maximum items in one batch checkout/checkin request
+    BATCH_MAX_ITEMS = int(os.getenv('BATCH_MAX_ITEMS', '100'))
+    
+    # Employee type-ahead search: results returned by default / at most
+    EMPLOYEE_SEARCH_LIMIT_DEFAULT = int(os.getenv('EMPLOYEE_SEARCH_LIMIT_DEFAULT', '20'))
+    EMPLOYEE_SEARCH_LIMIT_MAX = int(os.getenv('EMPLOYEE_SEARCH_LIMIT_MAX', '100'))
+    
+    # Longest range of days one report export may cover
+    REPORT_MAX_DAYS = int(os.getenv('REPORT_MAX_DAYS', '93'))
+    
+    # Background report jobs (/reports/jobs)
+    REPORT_JOBS_ENABLED = os.getenv('REPORT_JOBS_ENABLED', 'True') == 'True'
+    REPORT_WORKERS = int(os.getenv('REPORT_WORKERS', '2'))  # render processes per worker
+    REPORT_MAX_ACTIVE_JOBS = int(os.getenv('REPORT_MAX_ACTIVE_JOBS', '20'))
+    REPORT_MAX_ACTIVE_JOBS_PER_USER = int(os.getenv('REPORT_MAX_ACTIVE_JOBS_PER_USER', '3'))
+    REPORT_JOB_RETENTION_HOURS = int(os.getenv('REPORT_JOB_RETENTION_HOURS', '24'))
+    REPORT_JOB_TIMEOUT_MINUTES = int(os.getenv('REPORT_JOB_TIMEOUT_MINUTES', '60'))
+    REPORT_STORAGE_DIR = os.getenv('REPORT_STORAGE_DIR', os.path.join(tempfile.gettempdir(), 'rosewood-reports'))
+    
+    # Transaction numbers reserved per round trip by each worker process
+    TRANSACTION_NUMBER_BLOCK_SIZE = int(os.getenv('TRANSACTION_NUMBER_BLOCK_SIZE', '1'))
+    
+    # Maximum age in seconds of a cached dashboard snapshot
+    DASHBOARD_SNAPSHOT_MAX_AGE = int(os.getenv('DASHBOARD_SNAPSHOT_MAX_AGE', '30'))
+    
+    # Overdue sweeper
+    OVERDUE_SWEEPER_ENABLED = os.getenv('OVERDUE_SWEEPER_ENABLED', 'True') == 'True'
+    OVERDUE_SWEEP_INTERVAL = int(os.getenv('OVERDUE_SWEEP_INTERVAL', '60'))  # seconds
+    OVERDUE_ESCALATION_HOURS = [
+        int(h) for h in os.getenv('OVERDUE_ESCALATION_HOURS', '1,24,168').split(',') if h
+    ]
+    
+    # Conditional GET: clock-derived fields may lag by up to this many seconds
+    CONDITIONAL_GET_TIME_BUCKET = int(os.getenv('CONDITIONAL_GET_TIME_BUCKET', '60'))
+    
+    # Live dashboard stream (/dashboard/stream). Serve with the gevent
+    # workers configured in gunicorn.conf.py, so idle streams don't each
+    # hold an OS thread.
+    LIVE_EVENTS_QUEUE_SIZE = int(os.getenv('LIVE_EVENTS_QUEUE_SIZE', '1000'))
+    LIVE_EVENTS_HEARTBEAT = int(os.getenv('LIVE_EVENTS_HEARTBEAT', '15'))  # seconds
+    LIVE_EVENTS_COALESCE_WINDOW = float(os.getenv('LIVE_EVENTS_COALESCE_WINDOW', '0.5'))  # seconds
+    
+    # Alert feed polls (/dashboard/alerts?since=) also return events this
+    # many seconds old, which may have committed after a higher ID
+    ALERT_EVENTS_LOOKBACK = int(os.getenv('ALERT_EVENTS_LOOKBACK', '60'))  # seconds
+    
+    # Cross-worker cache invalidation (PostgreSQL LISTEN/NOTIFY)
+    INVALIDATION_BUS_ENABLED = os.getenv('INVALIDATION_BUS_ENABLED', 'True') == 'True'
+    INVALIDATION_POLL_INTERVAL = int(os.getenv('INVALIDATION_POLL_INTERVAL', '5'))  # seconds
@@ -0,0 +1,23 @@
+"""
+Gunicorn settings; `gunicorn app:app` run from backend/ picks them up.
+
+The dashboard stream (/dashboard/stream) holds a connection open per
+client, so workers are gevent workers: an idle stream is a parked
+greenlet, not an OS thread. psycopg2 is a C extension that gevent's
+monkey-patching can't reach, so each worker also installs psycogreen's
+wait callback after forking. Without it every query, and the LISTEN
+connection of the invalidation bus, would block the whole worker and
+stall every other client on it.
+"""
+import os
+
+bind = os.getenv('GUNICORN_BIND', '0.0.0.0:5000')
+workers = int(os.getenv('GUNICORN_WORKERS', '4'))
+worker_class = 'gevent'
+# Open streams count against this, so leave room for them
+worker_connections = int(os.getenv('GUNICORN_WORKER_CONNECTIONS', '1000'))
+
+def post_fork(server, worker):
+    from psycogreen.gevent import patch_psycopg
+
+    patch_psycopg()
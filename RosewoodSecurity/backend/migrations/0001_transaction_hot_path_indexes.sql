@@ -0,0 +1,26 @@
+-- Indexes for the transaction hot paths (see Transaction.__table_args__)
+-- CONCURRENTLY avoids locking the transactions table against checkouts.
+
+CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_transactions_open_expected_return
+    ON transactions (expected_return_time) WHERE check_in_time IS NULL;
+
+CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_transactions_open_key
+    ON transactions (key_id) WHERE check_in_time IS NULL;
+
+CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_transactions_open_access_card
+    ON transactions (access_card_id) WHERE check_in_time IS NULL;
+
+CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_transactions_check_out_time
+    ON transactions (check_out_time);
+
+CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_transactions_employee_check_out
+    ON transactions (employee_id, check_out_time);
+
+CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_transactions_key_check_out
+    ON transactions (key_id, check_out_time);
+
+CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_transactions_access_card_check_out
+    ON transactions (access_card_id, check_out_time);
+
+CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_employees_department_id
+    ON employees (department_id);
@@ -0,0 +1,8 @@
+-- Columns maintained by the overdue sweeper (utils/overdue_sweeper.py)
+
+ALTER TABLE transactions ADD COLUMN IF NOT EXISTS overdue_since TIMESTAMP;
+
+ALTER TABLE transactions ADD COLUMN IF NOT EXISTS escalation_level INTEGER NOT NULL DEFAULT 0;
+
+CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_transactions_overdue
+    ON transactions (expected_return_time) WHERE status = 'overdue';
@@ -0,0 +1,5 @@
+-- max(updated_at) is the version marker for conditional GETs on
+-- transaction-backed responses (utils/conditional.py)
+
+CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_transactions_updated_at
+    ON transactions (updated_at);
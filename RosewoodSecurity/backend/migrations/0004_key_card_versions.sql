@@ -0,0 +1,5 @@
+-- Optimistic lock columns (Key.version / AccessCard.version)
+
+ALTER TABLE keys ADD COLUMN IF NOT EXISTS version INTEGER NOT NULL DEFAULT 1;
+
+ALTER TABLE access_cards ADD COLUMN IF NOT EXISTS version INTEGER NOT NULL DEFAULT 1;
@@ -0,0 +1,16 @@
+-- Indexes for employee type-ahead search (see utils/employee_search.py)
+-- The expressions must match the ones the search query builds.
+
+CREATE EXTENSION IF NOT EXISTS pg_trgm;
+
+CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_employees_search_trgm
+    ON employees USING gin (lower(first_name || ' ' || last_name || ' ' || email) gin_trgm_ops);
+
+CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_employees_number_prefix
+    ON employees (lower(employee_number) text_pattern_ops);
+
+CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_employees_first_name_prefix
+    ON employees (lower(first_name) text_pattern_ops);
+
+CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_employees_last_name_prefix
+    ON employees (lower(last_name) text_pattern_ops);
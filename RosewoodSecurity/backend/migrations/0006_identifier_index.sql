@@ -0,0 +1,27 @@
+-- Scanner identifier index (see models/identifier.py), backfilled from
+-- the existing key, card, employee and transaction numbers.
+
+CREATE TABLE IF NOT EXISTS identifiers (
+    value VARCHAR(30) NOT NULL,
+    entity_type VARCHAR(20) NOT NULL,
+    entity_id INTEGER NOT NULL,
+    PRIMARY KEY (value, entity_type)
+);
+
+CREATE INDEX IF NOT EXISTS ix_identifiers_entity ON identifiers (entity_type, entity_id);
+
+INSERT INTO identifiers (value, entity_type, entity_id)
+    SELECT key_number, 'keys', id FROM keys
+    ON CONFLICT DO NOTHING;
+
+INSERT INTO identifiers (value, entity_type, entity_id)
+    SELECT card_number, 'access_cards', id FROM access_cards
+    ON CONFLICT DO NOTHING;
+
+INSERT INTO identifiers (value, entity_type, entity_id)
+    SELECT employee_number, 'employees', id FROM employees
+    ON CONFLICT DO NOTHING;
+
+INSERT INTO identifiers (value, entity_type, entity_id)
+    SELECT transaction_number, 'transactions', id FROM transactions
+    ON CONFLICT DO NOTHING;
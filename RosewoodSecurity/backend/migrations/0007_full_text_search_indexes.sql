@@ -0,0 +1,14 @@
+-- GIN indexes for global full-text search (see utils/search.py)
+-- The expressions must match SearchDocument.text() for each type.
+
+CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_keys_search
+    ON keys USING gin (to_tsvector('english', coalesce(name, '') || ' ' || coalesce(location, '') || ' ' || coalesce(description, '')));
+
+CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_access_cards_search
+    ON access_cards USING gin (to_tsvector('simple', coalesce(card_number, '') || ' ' || coalesce(card_type, '')));
+
+CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_employees_search
+    ON employees USING gin (to_tsvector('simple', coalesce(first_name, '') || ' ' || coalesce(last_name, '')));
+
+CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_transactions_search
+    ON transactions USING gin (to_tsvector('english', coalesce(purpose, '') || ' ' || coalesce(notes, '')));
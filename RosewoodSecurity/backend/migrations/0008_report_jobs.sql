@@ -0,0 +1,19 @@
+-- Background report jobs (see models/report_job.py, utils/report_jobs.py)
+
+CREATE TABLE IF NOT EXISTS report_jobs (
+    id VARCHAR(32) PRIMARY KEY,
+    report_type VARCHAR(20) NOT NULL,
+    params JSON NOT NULL,
+    status VARCHAR(20) NOT NULL,
+    created_by INTEGER NOT NULL REFERENCES users (id),
+    created_at TIMESTAMP NOT NULL,
+    started_at TIMESTAMP,
+    finished_at TIMESTAMP,
+    error VARCHAR(255),
+    filename VARCHAR(100),
+    size INTEGER
+);
+
+CREATE INDEX IF NOT EXISTS ix_report_jobs_status_created ON report_jobs (status, created_at);
+
+CREATE INDEX IF NOT EXISTS ix_report_jobs_created_by ON report_jobs (created_by);
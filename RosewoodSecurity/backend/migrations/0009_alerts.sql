@@ -0,0 +1,28 @@
+-- Persistent alerts and their append-only event feed (see models/alert.py)
+
+CREATE TABLE IF NOT EXISTS alerts (
+    id SERIAL PRIMARY KEY,
+    alert_type VARCHAR(30) NOT NULL,
+    subject_id INTEGER NOT NULL,
+    priority VARCHAR(10) NOT NULL,
+    escalation_level INTEGER NOT NULL,
+    message VARCHAR(255) NOT NULL,
+    timestamp TIMESTAMP NOT NULL,
+    raised_at TIMESTAMP,
+    resolved_at TIMESTAMP,
+    CONSTRAINT uq_alerts_type_subject UNIQUE (alert_type, subject_id)
+);
+
+CREATE INDEX IF NOT EXISTS ix_alerts_open ON alerts (priority) WHERE resolved_at IS NULL;
+
+CREATE TABLE IF NOT EXISTS alert_events (
+    id SERIAL PRIMARY KEY,
+    alert_id INTEGER NOT NULL REFERENCES alerts (id),
+    action VARCHAR(20) NOT NULL,
+    created_at TIMESTAMP
+);
+
+CREATE INDEX IF NOT EXISTS ix_alert_events_alert_id ON alert_events (alert_id);
+
+-- Feed polls re-read the events created in the last ALERT_EVENTS_LOOKBACK seconds
+CREATE INDEX IF NOT EXISTS ix_alert_events_created_at ON alert_events (created_at);
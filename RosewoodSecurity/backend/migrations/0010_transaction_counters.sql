@@ -0,0 +1,7 @@
+-- Per-day transaction number counters (see models/transaction_counter.py,
+-- utils/transaction_numbers.py)
+
+CREATE TABLE IF NOT EXISTS transaction_counters (
+    day DATE PRIMARY KEY,
+    last_value INTEGER NOT NULL
+);
@@ -0,0 +1,11 @@
+-- Daily department usage rollup (see models/usage_rollup.py); fill it
+-- with `flask backfill-usage-rollup` after applying
+
+CREATE TABLE IF NOT EXISTS usage_rollups (
+    day DATE NOT NULL,
+    department_id INTEGER NOT NULL REFERENCES departments (id),
+    item_type VARCHAR(20) NOT NULL,
+    checkout_count INTEGER NOT NULL,
+    checkin_count INTEGER NOT NULL,
+    PRIMARY KEY (day, department_id, item_type)
+);
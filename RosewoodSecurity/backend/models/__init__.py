@@ -8,6 +8,11 @@ from .department import Department
 from .key import Key
 from .access_card import AccessCard
 from .transaction import Transaction
+from .transaction_counter import TransactionCounter
+from .usage_rollup import UsageRollup
+from .alert import Alert, AlertEvent
+from .identifier import Identifier
+from .report_job import ReportJob
 
 # Initialize models
 def init_models():
@@ -1,5 +1,6 @@
 from app import db
 from datetime import datetime
+from utils.fields import serialize
 
 class AccessCard(db.Model):
     """AccessCard model for managing electronic access cards"""
@@ -16,6 +17,11 @@ class AccessCard(db.Model):
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
     last_used = db.Column(db.DateTime)
+    version = db.Column(db.Integer, nullable=False, server_default='1')  # optimistic lock, bumped on every update
+
+    # UPDATEs match on the version read, so a concurrent change to the same
+    # row fails the flush with StaleDataError instead of being overwritten
+    __mapper_args__ = {'version_id_col': version}
     
     # Relationships
     transactions = db.relationship('Transaction', backref='access_card', lazy=True)
@@ -27,23 +33,26 @@ class AccessCard(db.Model):
         self.employee_id = employee_id
         self.expiry_date = expiry_date
 
-    def to_dict(self):
-        """Convert access card object to dictionary"""
-        return {
-            'id': self.id,
-            'card_number': self.card_number,
-            'card_type': self.card_type,
-            'status': self.status,
-            'issue_date': self.issue_date.isoformat(),
-            'expiry_date': self.expiry_date.isoformat() if self.expiry_date else None,
-            'access_zones': self.access_zones,
-            'employee_id': self.employee_id,
-            'employee_name': self.assigned_employee.full_name if self.assigned_employee else None,
-            'created_at': self.created_at.isoformat(),
-            'updated_at': self.updated_at.isoformat(),
-            'last_used': self.last_used.isoformat() if self.last_used else None,
-            'is_expired': self.is_expired()
-        }
+    # Serialized fields; to_dict(fields) evaluates only the requested ones
+    FIELDS = {
+        'id': lambda c: c.id,
+        'card_number': lambda c: c.card_number,
+        'card_type': lambda c: c.card_type,
+        'status': lambda c: c.status,
+        'issue_date': lambda c: c.issue_date.isoformat(),
+        'expiry_date': lambda c: c.expiry_date.isoformat() if c.expiry_date else None,
+        'access_zones': lambda c: c.access_zones,
+        'employee_id': lambda c: c.employee_id,
+        'employee_name': lambda c: c.assigned_employee.full_name if c.assigned_employee else None,
+        'created_at': lambda c: c.created_at.isoformat(),
+        'updated_at': lambda c: c.updated_at.isoformat(),
+        'last_used': lambda c: c.last_used.isoformat() if c.last_used else None,
+        'is_expired': lambda c: c.is_expired()
+    }
+
+    def to_dict(self, fields=None):
+        """Convert access card object to dictionary, limited to `fields` if given"""
+        return serialize(self, fields)
 
     def is_expired(self):
         """Check if the access card has expired"""
@@ -54,47 +63,39 @@ class AccessCard(db.Model):
     def deactivate(self):
         """Deactivate the access card"""
         self.status = 'inactive'
-        db.session.commit()
 
     def activate(self):
         """Activate the access card"""
         if self.is_expired():
             raise ValueError(f"Cannot activate expired card {self.card_number}")
         self.status = 'active'
-        db.session.commit()
 
     def mark_lost(self):
         """Mark the access card as lost"""
         self.status = 'lost'
-        db.session.commit()
 
     def record_usage(self):
         """Record when the card was last used"""
         self.last_used = datetime.utcnow()
-        db.session.commit()
 
     def assign_to_employee(self, employee_id):
         """Assign the card to an employee"""
         self.employee_id = employee_id
-        db.session.commit()
 
     def unassign(self):
         """Unassign the card from current employee"""
         self.employee_id = None
-        db.session.commit()
 
     def update_access_zones(self, zones):
         """Update the card's access zones"""
         self.access_zones = zones
         self.updated_at = datetime.utcnow()
-        db.session.commit()
 
     def extend_expiry(self, new_expiry_date):
         """Extend the card's expiry date"""
         if new_expiry_date <= datetime.utcnow():
             raise ValueError("New expiry date must be in the future")
         self.expiry_date = new_expiry_date
-        db.session.commit()
 
     def __repr__(self):
         return f'<AccessCard {self.card_number}: {self.status}>'
@@ -0,0 +1,120 @@
+from app import db
+from datetime import datetime
+from sqlalchemy import event, func, inspect, select
+
+from .transaction import Transaction
+
+class Alert(db.Model):
+    """A system alert (overdue item, expiring card) and its current state"""
+    __tablename__ = 'alerts'
+    __table_args__ = (
+        db.UniqueConstraint('alert_type', 'subject_id', name='uq_alerts_type_subject'),
+        db.Index('ix_alerts_open', 'priority',
+                 postgresql_where=db.text('resolved_at IS NULL'),
+                 sqlite_where=db.text('resolved_at IS NULL')),
+    )
+
+    PRIORITY_ORDER = {'high': 0, 'medium': 1, 'low': 2}
+
+    id = db.Column(db.Integer, primary_key=True)
+    alert_type = db.Column(db.String(30), nullable=False)  # overdue, expiring_card
+    subject_id = db.Column(db.Integer, nullable=False)  # transaction or access card id
+    priority = db.Column(db.String(10), nullable=False)  # high, medium, low
+    escalation_level = db.Column(db.Integer, nullable=False, default=0)
+    message = db.Column(db.String(255), nullable=False)
+    timestamp = db.Column(db.DateTime, nullable=False)  # when the alerted condition applies
+    raised_at = db.Column(db.DateTime, default=datetime.utcnow)
+    resolved_at = db.Column(db.DateTime)
+
+    # Relationships
+    events = db.relationship('AlertEvent', backref='alert', lazy=True)
+
+    def to_dict(self):
+        """Convert alert object to dictionary"""
+        return {
+            'id': self.id,
+            'type': self.alert_type,
+            'subject_id': self.subject_id,
+            'priority': self.priority,
+            'escalation_level': self.escalation_level,
+            'message': self.message,
+            'timestamp': self.timestamp.isoformat(),
+            'raised_at': self.raised_at.isoformat() if self.raised_at else None,
+            'resolved_at': self.resolved_at.isoformat() if self.resolved_at else None
+        }
+
+    def record(self, action):
+        """Append an event for this alert to the feed"""
+        db.session.add(AlertEvent(alert=self, action=action))
+
+    def sort_key(self):
+        return (self.PRIORITY_ORDER.get(self.priority, 3), self.timestamp)
+
+    def __repr__(self):
+        return f'<Alert {self.alert_type}:{self.subject_id}>'
+
+class AlertEvent(db.Model):
+    """
+    Append-only feed of alert changes
+
+    IDs are assigned at insert, not at commit, so a concurrent writer can
+    commit a lower ID after a reader has already seen a higher one. Readers
+    therefore also fetch the events created within a lookback window.
+    """
+    __tablename__ = 'alert_events'
+
+    id = db.Column(db.Integer, primary_key=True)
+    alert_id = db.Column(db.Integer, db.ForeignKey('alerts.id'), nullable=False, index=True)
+    action = db.Column(db.String(20), nullable=False)  # raised, escalated, resolved
+    created_at = db.Column(db.DateTime, default=datetime.utcnow, index=True)
+
+    @classmethod
+    def version(cls, recent_since):
+        """
+        Get a marker that changes whenever the feed does
+
+        Returns:
+            tuple: (latest event ID or 0, number of events created since recent_since)
+        """
+        # Separate subqueries so each one can use its own index
+        latest_id, recent = db.session.query(
+            select(func.max(cls.id)).scalar_subquery(),
+            select(func.count(cls.id)).where(cls.created_at >= recent_since).scalar_subquery()
+        ).one()
+        return latest_id or 0, recent
+
+    def to_dict(self):
+        """Convert alert event to dictionary"""
+        return {
+            'id': self.id,
+            'action': self.action,
+            'created_at': self.created_at.isoformat(),
+            'alert': self.alert.to_dict()
+        }
+
+    def __repr__(self):
+        return f'<AlertEvent {self.id}: {self.action}>'
+
+@event.listens_for(Transaction, 'after_update')
+def _resolve_overdue_alert(mapper, connection, target):
+    """Resolve the overdue alert when a transaction leaves the overdue state"""
+    # The previous value may not be loaded, so check any status change
+    if not inspect(target).attrs.status.history.has_changes() or target.status == 'overdue':
+        return
+
+    now = datetime.utcnow()
+    alerts = Alert.__table__
+    alert_id = connection.execute(
+        select(alerts.c.id).where(
+            alerts.c.alert_type == 'overdue',
+            alerts.c.subject_id == target.id,
+            alerts.c.resolved_at.is_(None)
+        )
+    ).scalar()
+    if alert_id:
+        connection.execute(
+            alerts.update().where(alerts.c.id == alert_id).values(resolved_at=now)
+        )
+        connection.execute(
+            AlertEvent.__table__.insert().values(alert_id=alert_id, action='resolved', created_at=now)
+        )
@@ -1,5 +1,6 @@
 from app import db
 from datetime import datetime
+from utils.fields import serialize
 
 class Department(db.Model):
     """Department model for organizing employees and managing access permissions"""
@@ -20,18 +21,21 @@ class Department(db.Model):
                                     secondary='department_key_permissions',
                                     backref=db.backref('authorized_departments', lazy=True))
 
-    def to_dict(self):
-        """Convert department object to dictionary"""
-        return {
-            'id': self.id,
-            'name': self.name,
-            'description': self.description,
-            'access_level': self.access_level,
-            'created_at': self.created_at.isoformat(),
-            'updated_at': self.updated_at.isoformat(),
-            'employee_count': len(self.employees),
-            'key_permissions': [key.id for key in self.key_permissions]
-        }
+    # Serialized fields; to_dict(fields) evaluates only the requested ones
+    FIELDS = {
+        'id': lambda d: d.id,
+        'name': lambda d: d.name,
+        'description': lambda d: d.description,
+        'access_level': lambda d: d.access_level,
+        'created_at': lambda d: d.created_at.isoformat(),
+        'updated_at': lambda d: d.updated_at.isoformat(),
+        'employee_count': lambda d: len(d.employees),
+        'key_permissions': lambda d: [key.id for key in d.key_permissions]
+    }
+
+    def to_dict(self, fields=None):
+        """Convert department object to dictionary, limited to `fields` if given"""
+        return serialize(self, fields)
 
     def __repr__(self):
         return f'<Department {self.name}>'
@@ -1,5 +1,7 @@
 from app import db
 from datetime import datetime
+from utils.fields import serialize
+from utils.permission_index import permission_index
 
 class Employee(db.Model):
     """Employee model for managing staff members who can check out keys/cards"""
@@ -11,7 +13,7 @@ class Employee(db.Model):
     last_name = db.Column(db.String(50), nullable=False)
     email = db.Column(db.String(120), unique=True, nullable=False)
     phone = db.Column(db.String(20))
-    department_id = db.Column(db.Integer, db.ForeignKey('departments.id'), nullable=False)
+    department_id = db.Column(db.Integer, db.ForeignKey('departments.id'), nullable=False, index=True)
     photo_url = db.Column(db.String(255))
     status = db.Column(db.String(20), default='active')  # active, inactive, suspended
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
@@ -20,6 +22,12 @@ class Employee(db.Model):
     # Relationships
     transactions = db.relationship('Transaction', backref='employee', lazy=True)
     access_cards = db.relationship('AccessCard', backref='assigned_employee', lazy=True)
+    active_transactions = db.relationship(
+        'Transaction',
+        primaryjoin='and_(Employee.id == Transaction.employee_id, Transaction.check_in_time.is_(None))',
+        viewonly=True,
+        lazy=True
+    )
 
     def __init__(self, employee_number, first_name, last_name, email, department_id, phone=None, photo_url=None):
         self.employee_number = employee_number
@@ -35,48 +43,48 @@ class Employee(db.Model):
         """Return the employee's full name"""
         return f"{self.first_name} {self.last_name}"
 
-    def to_dict(self):
-        """Convert employee object to dictionary"""
-        return {
-            'id': self.id,
-            'employee_number': self.employee_number,
-            'first_name': self.first_name,
-            'last_name': self.last_name,
-            'full_name': self.full_name,
-            'email': self.email,
-            'phone': self.phone,
-            'department_id': self.department_id,
-            'department_name': self.department.name if self.department else None,
-            'photo_url': self.photo_url,
-            'status': self.status,
-            'created_at': self.created_at.isoformat(),
-            'updated_at': self.updated_at.isoformat(),
-            'active_checkouts': self.get_active_checkouts()
-        }
+    # Serialized fields; to_dict(fields) evaluates only the requested ones
+    FIELDS = {
+        'id': lambda e: e.id,
+        'employee_number': lambda e: e.employee_number,
+        'first_name': lambda e: e.first_name,
+        'last_name': lambda e: e.last_name,
+        'full_name': lambda e: e.full_name,
+        'email': lambda e: e.email,
+        'phone': lambda e: e.phone,
+        'department_id': lambda e: e.department_id,
+        'department_name': lambda e: e.department.name if e.department else None,
+        'photo_url': lambda e: e.photo_url,
+        'status': lambda e: e.status,
+        'created_at': lambda e: e.created_at.isoformat(),
+        'updated_at': lambda e: e.updated_at.isoformat(),
+        'active_checkouts': lambda e: e.get_active_checkouts()
+    }
+
+    def to_dict(self, fields=None):
+        """Convert employee object to dictionary, limited to `fields` if given"""
+        return serialize(self, fields)
 
     def get_active_checkouts(self):
         """Get list of currently checked out keys and cards"""
-        active_transactions = [t for t in self.transactions if not t.check_in_time]
         return [{
             'type': 'key' if t.key_id else 'access_card',
             'item_id': t.key_id or t.access_card_id,
             'checkout_time': t.check_out_time.isoformat(),
             'expected_return': t.expected_return_time.isoformat() if t.expected_return_time else None
-        } for t in active_transactions]
+        } for t in self.active_transactions]
 
     def can_checkout_key(self, key_id):
         """Check if employee's department has permission for this key"""
-        return key_id in [key.id for key in self.department.key_permissions]
+        return permission_index.allowed(self.department_id, key_id)
 
     def suspend(self):
         """Suspend the employee"""
         self.status = 'suspended'
-        db.session.commit()
 
     def activate(self):
         """Activate the employee"""
         self.status = 'active'
-        db.session.commit()
 
     def __repr__(self):
         return f'<Employee {self.employee_number}: {self.full_name}>'
@@ -0,0 +1,67 @@
+from app import db
+from sqlalchemy import event, inspect
+
+from .key import Key
+from .access_card import AccessCard
+from .employee import Employee
+from .transaction import Transaction
+
+class Identifier(db.Model):
+    """Scannable key/card/employee/transaction number -> the entity it names"""
+    __tablename__ = 'identifiers'
+    __table_args__ = (
+        db.Index('ix_identifiers_entity', 'entity_type', 'entity_id'),
+    )
+
+    value = db.Column(db.String(30), primary_key=True)
+    entity_type = db.Column(db.String(20), primary_key=True)  # keys, access_cards, employees, transactions
+    entity_id = db.Column(db.Integer, nullable=False)
+
+    @classmethod
+    def resolve(cls, value):
+        """Get the entities a scanned value names (normally exactly one)"""
+        return cls.query.filter(cls.value == value).all()
+
+    def to_dict(self):
+        """Convert identifier object to dictionary"""
+        return {
+            'type': self.entity_type,
+            'id': self.entity_id
+        }
+
+    def __repr__(self):
+        return f'<Identifier {self.value}: {self.entity_type} {self.entity_id}>'
+
+# Scannable number column of each indexed model. Rows are kept in sync by
+# mapper hooks, which bulk query deletes bypass.
+IDENTIFIER_ATTRIBUTES = {
+    Key: 'key_number',
+    AccessCard: 'card_number',
+    Employee: 'employee_number',
+    Transaction: 'transaction_number'
+}
+
+def _track_identifier(model, attr):
+    identifiers = Identifier.__table__
+    entity_type = model.__tablename__
+
+    def _rows(target):
+        return identifiers.c.entity_type == entity_type, identifiers.c.entity_id == target.id
+
+    @event.listens_for(model, 'after_insert')
+    def _add(mapper, connection, target):
+        connection.execute(identifiers.insert().values(
+            value=getattr(target, attr), entity_type=entity_type, entity_id=target.id
+        ))
+
+    @event.listens_for(model, 'after_update')
+    def _renumber(mapper, connection, target):
+        if inspect(target).attrs[attr].history.has_changes():
+            connection.execute(identifiers.update().where(*_rows(target)).values(value=getattr(target, attr)))
+
+    @event.listens_for(model, 'after_delete')
+    def _remove(mapper, connection, target):
+        connection.execute(identifiers.delete().where(*_rows(target)))
+
+for _model, _attr in IDENTIFIER_ATTRIBUTES.items():
+    _track_identifier(_model, _attr)
@@ -1,5 +1,6 @@
 from app import db
 from datetime import datetime
+from utils.fields import serialize
 
 class Key(db.Model):
     """Key model for managing physical keys in the system"""
@@ -16,9 +17,20 @@ class Key(db.Model):
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
     last_maintenance = db.Column(db.DateTime)
+    version = db.Column(db.Integer, nullable=False, server_default='1')  # optimistic lock, bumped on every update
+
+    # UPDATEs match on the version read, so a concurrent change to the same
+    # row fails the flush with StaleDataError instead of being overwritten
+    __mapper_args__ = {'version_id_col': version}
     
     # Relationships
     transactions = db.relationship('Transaction', backref='key', lazy=True)
+    active_transactions = db.relationship(
+        'Transaction',
+        primaryjoin='and_(Key.id == Transaction.key_id, Transaction.check_in_time.is_(None))',
+        viewonly=True,
+        lazy=True
+    )
 
     def __init__(self, key_number, name, location, description=None, key_type='regular', photo_url=None):
         self.key_number = key_number
@@ -28,27 +40,30 @@ class Key(db.Model):
         self.key_type = key_type
         self.photo_url = photo_url
 
-    def to_dict(self):
-        """Convert key object to dictionary"""
-        return {
-            'id': self.id,
-            'key_number': self.key_number,
-            'name': self.name,
-            'location': self.location,
-            'description': self.description,
-            'status': self.status,
-            'key_type': self.key_type,
-            'photo_url': self.photo_url,
-            'created_at': self.created_at.isoformat(),
-            'updated_at': self.updated_at.isoformat(),
-            'last_maintenance': self.last_maintenance.isoformat() if self.last_maintenance else None,
-            'current_checkout': self.get_current_checkout(),
-            'authorized_departments': [dept.name for dept in self.authorized_departments]
-        }
+    # Serialized fields; to_dict(fields) evaluates only the requested ones
+    FIELDS = {
+        'id': lambda k: k.id,
+        'key_number': lambda k: k.key_number,
+        'name': lambda k: k.name,
+        'location': lambda k: k.location,
+        'description': lambda k: k.description,
+        'status': lambda k: k.status,
+        'key_type': lambda k: k.key_type,
+        'photo_url': lambda k: k.photo_url,
+        'created_at': lambda k: k.created_at.isoformat(),
+        'updated_at': lambda k: k.updated_at.isoformat(),
+        'last_maintenance': lambda k: k.last_maintenance.isoformat() if k.last_maintenance else None,
+        'current_checkout': lambda k: k.get_current_checkout(),
+        'authorized_departments': lambda k: [dept.name for dept in k.authorized_departments]
+    }
+
+    def to_dict(self, fields=None):
+        """Convert key object to dictionary, limited to `fields` if given"""
+        return serialize(self, fields)
 
     def get_current_checkout(self):
         """Get details of current checkout if key is checked out"""
-        active_transaction = next((t for t in self.transactions if not t.check_in_time), None)
+        active_transaction = next(iter(self.active_transactions), None)
         if active_transaction:
             return {
                 'employee': active_transaction.employee.full_name,
@@ -62,29 +77,24 @@ class Key(db.Model):
         if self.status != 'available':
             raise ValueError(f"Key {self.key_number} is not available for checkout")
         self.status = 'checked_out'
-        db.session.commit()
 
     def check_in(self):
         """Mark key as available"""
         if self.status != 'checked_out':
             raise ValueError(f"Key {self.key_number} is not checked out")
         self.status = 'available'
-        db.session.commit()
 
     def mark_lost(self):
         """Mark key as lost"""
         self.status = 'lost'
-        db.session.commit()
 
     def retire(self):
         """Mark key as retired"""
         self.status = 'retired'
-        db.session.commit()
 
     def record_maintenance(self):
         """Record maintenance performed on the key"""
         self.last_maintenance = datetime.utcnow()
-        db.session.commit()
 
     def is_available(self):
         """Check if key is available for checkout"""
@@ -0,0 +1,54 @@
+from app import db
+from datetime import datetime
+import uuid
+
+class ReportJob(db.Model):
+    """A report rendered off the request path and kept for download until it expires"""
+    __tablename__ = 'report_jobs'
+    __table_args__ = (
+        # Concurrency limits and retention sweeps filter on status and age
+        db.Index('ix_report_jobs_status_created', 'status', 'created_at'),
+    )
+
+    ACTIVE_STATUSES = ('queued', 'running')
+
+    id = db.Column(db.String(32), primary_key=True)
+    report_type = db.Column(db.String(20), nullable=False)  # daily, weekly
+    params = db.Column(db.JSON, nullable=False)
+    status = db.Column(db.String(20), nullable=False, default='queued')  # queued, running, succeeded, failed, cancelled
+    created_by = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False, index=True)
+    created_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+    started_at = db.Column(db.DateTime)
+    finished_at = db.Column(db.DateTime)
+    error = db.Column(db.String(255))
+    filename = db.Column(db.String(100))  # download name of the artifact
+    size = db.Column(db.Integer)  # artifact size in bytes
+
+    def __init__(self, report_type, params, created_by):
+        self.id = uuid.uuid4().hex
+        self.report_type = report_type
+        self.params = params
+        self.created_by = created_by
+        self.status = 'queued'
+
+    @property
+    def is_active(self):
+        return self.status in self.ACTIVE_STATUSES
+
+    def to_dict(self):
+        """Convert report job object to dictionary"""
+        return {
+            'id': self.id,
+            'type': self.report_type,
+            'params': self.params,
+            'status': self.status,
+            'created_at': self.created_at.isoformat() if self.created_at else None,
+            'started_at': self.started_at.isoformat() if self.started_at else None,
+            'finished_at': self.finished_at.isoformat() if self.finished_at else None,
+            'error': self.error,
+            'filename': self.filename,
+            'size': self.size
+        }
+
+    def __repr__(self):
+        return f'<ReportJob {self.id}: {self.report_type} {self.status}>'
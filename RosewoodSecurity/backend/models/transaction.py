@@ -1,9 +1,34 @@
 from app import db
 from datetime import datetime
+from utils.transaction_numbers import transaction_numbers
+from utils.fields import serialize
 
 class Transaction(db.Model):
     """Transaction model for tracking key and access card checkouts"""
     __tablename__ = 'transactions'
+    __table_args__ = (
+        # Open checkouts: overdue scans and per-item active lookups
+        db.Index('ix_transactions_open_expected_return', 'expected_return_time',
+                 postgresql_where=db.text('check_in_time IS NULL'),
+                 sqlite_where=db.text('check_in_time IS NULL')),
+        db.Index('ix_transactions_open_key', 'key_id',
+                 postgresql_where=db.text('check_in_time IS NULL'),
+                 sqlite_where=db.text('check_in_time IS NULL')),
+        db.Index('ix_transactions_open_access_card', 'access_card_id',
+                 postgresql_where=db.text('check_in_time IS NULL'),
+                 sqlite_where=db.text('check_in_time IS NULL')),
+        # Date-bounded reports, recent activity and per-owner history
+        db.Index('ix_transactions_check_out_time', 'check_out_time'),
+        db.Index('ix_transactions_employee_check_out', 'employee_id', 'check_out_time'),
+        db.Index('ix_transactions_key_check_out', 'key_id', 'check_out_time'),
+        db.Index('ix_transactions_access_card_check_out', 'access_card_id', 'check_out_time'),
+        # Rows flagged by the overdue sweeper
+        db.Index('ix_transactions_overdue', 'expected_return_time',
+                 postgresql_where=db.text("status = 'overdue'"),
+                 sqlite_where=db.text("status = 'overdue'")),
+        # Version marker for conditional GETs
+        db.Index('ix_transactions_updated_at', 'updated_at'),
+    )
 
     id = db.Column(db.Integer, primary_key=True)
     transaction_number = db.Column(db.String(30), unique=True, nullable=False)  # e.g., TRX-20240115-001
@@ -15,18 +40,20 @@ class Transaction(db.Model):
     check_in_time = db.Column(db.DateTime)
     purpose = db.Column(db.String(200))
     status = db.Column(db.String(20), default='active')  # active, completed, overdue, lost
+    overdue_since = db.Column(db.DateTime)  # set by the overdue sweeper
+    escalation_level = db.Column(db.Integer, nullable=False, default=0, server_default='0')  # overdue tier reached, 0 = none
     notes = db.Column(db.Text)
     created_by = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)
     updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
 
     def __init__(self, employee_id, created_by, key_id=None, access_card_id=None, 
-                 expected_return_time=None, purpose=None):
+                 expected_return_time=None, purpose=None, transaction_number=None):
         if not (key_id or access_card_id):
             raise ValueError("Either key_id or access_card_id must be provided")
         if key_id and access_card_id:
             raise ValueError("Transaction can't be for both key and access card")
             
-        self.transaction_number = self._generate_transaction_number()
+        self.transaction_number = transaction_number or transaction_numbers.next_number()
         self.employee_id = employee_id
         self.key_id = key_id
         self.access_card_id = access_card_id
@@ -34,38 +61,34 @@ class Transaction(db.Model):
         self.purpose = purpose
         self.created_by = created_by
 
-    def _generate_transaction_number(self):
-        """Generate a unique transaction number"""
-        date_str = datetime.utcnow().strftime('%Y%m%d')
-        # Get count of transactions for today and add 1
-        today_count = Transaction.query.filter(
-            Transaction.transaction_number.like(f'TRX-{date_str}-%')
-        ).count() + 1
-        return f'TRX-{date_str}-{today_count:03d}'
-
-    def to_dict(self):
-        """Convert transaction object to dictionary"""
-        return {
-            'id': self.id,
-            'transaction_number': self.transaction_number,
-            'employee': {
-                'id': self.employee_id,
-                'name': self.employee.full_name
-            },
-            'item': {
-                'type': 'key' if self.key_id else 'access_card',
-                'id': self.key_id or self.access_card_id,
-                'identifier': self.key.key_number if self.key_id else self.access_card.card_number
-            },
-            'check_out_time': self.check_out_time.isoformat(),
-            'expected_return_time': self.expected_return_time.isoformat() if self.expected_return_time else None,
-            'check_in_time': self.check_in_time.isoformat() if self.check_in_time else None,
-            'purpose': self.purpose,
-            'status': self.status,
-            'notes': self.notes,
-            'duration': self.get_duration(),
-            'is_overdue': self.is_overdue()
-        }
+    # Serialized fields; to_dict(fields) evaluates only the requested ones
+    FIELDS = {
+        'id': lambda t: t.id,
+        'transaction_number': lambda t: t.transaction_number,
+        'employee': lambda t: {
+            'id': t.employee_id,
+            'name': t.employee.full_name
+        },
+        'item': lambda t: {
+            'type': 'key' if t.key_id else 'access_card',
+            'id': t.key_id or t.access_card_id,
+            'identifier': t.key.key_number if t.key_id else t.access_card.card_number
+        },
+        'check_out_time': lambda t: t.check_out_time.isoformat(),
+        'expected_return_time': lambda t: t.expected_return_time.isoformat() if t.expected_return_time else None,
+        'check_in_time': lambda t: t.check_in_time.isoformat() if t.check_in_time else None,
+        'purpose': lambda t: t.purpose,
+        'status': lambda t: t.status,
+        'overdue_since': lambda t: t.overdue_since.isoformat() if t.overdue_since else None,
+        'escalation_level': lambda t: t.escalation_level,
+        'notes': lambda t: t.notes,
+        'duration': lambda t: t.get_duration(),
+        'is_overdue': lambda t: t.is_overdue()
+    }
+
+    def to_dict(self, fields=None):
+        """Convert transaction object to dictionary, limited to `fields` if given"""
+        return serialize(self, fields)
 
     def check_in(self, notes=None):
         """Process check-in of key/card"""
@@ -83,8 +106,6 @@ class Transaction(db.Model):
         else:
             self.access_card.record_usage()
 
-        db.session.commit()
-
     def mark_lost(self, notes=None):
         """Mark the transaction as lost"""
         self.status = 'lost'
@@ -97,8 +118,6 @@ class Transaction(db.Model):
         else:
             self.access_card.mark_lost()
 
-        db.session.commit()
-
     def is_overdue(self):
         """Check if the transaction is overdue"""
         if not self.expected_return_time or self.check_in_time:
@@ -116,12 +135,15 @@ class Transaction(db.Model):
         if self.check_in_time:
             raise ValueError("Cannot update return time for completed transaction")
         self.expected_return_time = new_time
-        db.session.commit()
+        # An extension past now lifts the overdue flag until the next sweep
+        if self.status == 'overdue' and new_time > datetime.utcnow():
+            self.status = 'active'
+            self.overdue_since = None
+            self.escalation_level = 0
 
     def add_notes(self, notes):
         """Add notes to the transaction"""
         self.notes = notes
-        db.session.commit()
 
     def __repr__(self):
         return f'<Transaction {self.transaction_number}: {self.status}>'
@@ -0,0 +1,11 @@
+from app import db
+
+class TransactionCounter(db.Model):
+    """Per-day counter backing transaction number allocation"""
+    __tablename__ = 'transaction_counters'
+
+    day = db.Column(db.Date, primary_key=True)
+    last_value = db.Column(db.Integer, nullable=False, default=0)
+
+    def __repr__(self):
+        return f'<TransactionCounter {self.day}: {self.last_value}>'
@@ -0,0 +1,155 @@
+from app import db
+from collections import Counter
+from datetime import datetime, timedelta
+from sqlalchemy import event, func, inspect, text
+from sqlalchemy.orm import object_session
+import logging
+
+from .transaction import Transaction
+from .employee import Employee
+
+logger = logging.getLogger(__name__)
+
+class UsageRollup(db.Model):
+    """
+    Daily checkout/checkin counts per department and item type
+
+    Checkouts and checkins queue their increments on the session, and the
+    counters are upserted in a short transaction of their own once the
+    checkout or checkin has committed. The row lock on a (day, department,
+    item type) counter is therefore held for one statement, never for the
+    rest of a checkout, so checkouts in the same department don't queue
+    behind each other. An increment lost to a crash between the two
+    commits is restored by `flask backfill-usage-rollup`.
+    """
+    __tablename__ = 'usage_rollups'
+
+    day = db.Column(db.Date, primary_key=True)
+    department_id = db.Column(db.Integer, db.ForeignKey('departments.id'), primary_key=True)
+    item_type = db.Column(db.String(20), primary_key=True)  # key, access_card
+    checkout_count = db.Column(db.Integer, nullable=False, default=0)
+    checkin_count = db.Column(db.Integer, nullable=False, default=0)
+
+    # Adds to the counters for the employee's department, creating the row
+    # on the first event of the day
+    _INCREMENT_SQL = text("""
+        INSERT INTO usage_rollups (day, department_id, item_type, checkout_count, checkin_count)
+        SELECT :day, employees.department_id, :item_type, :checkouts, :checkins
+        FROM employees WHERE employees.id = :employee_id
+        ON CONFLICT (day, department_id, item_type) DO UPDATE SET
+            checkout_count = usage_rollups.checkout_count + excluded.checkout_count,
+            checkin_count = usage_rollups.checkin_count + excluded.checkin_count
+    """)
+
+    @classmethod
+    def queue_increment(cls, session, transaction, checkouts=0, checkins=0):
+        """Queue a checkout or checkin event for a transaction until the session commits"""
+        when = (transaction.check_in_time if checkins else transaction.check_out_time) or datetime.utcnow()
+        key = (when.date(), transaction.employee_id, 'key' if transaction.key_id else 'access_card')
+        pending = session.info.setdefault('usage_rollup_pending', Counter())
+        pending[key + ('checkouts',)] += checkouts
+        pending[key + ('checkins',)] += checkins
+
+    @classmethod
+    def apply_increments(cls, pending):
+        """Upsert queued increments, in key order so concurrent batches can't deadlock"""
+        rows = {}
+        for (day, employee_id, item_type, counter), count in pending.items():
+            row = rows.setdefault((day, employee_id, item_type), {'checkouts': 0, 'checkins': 0})
+            row[counter] += count
+        with db.engine.begin() as connection:
+            for (day, employee_id, item_type), counts in sorted(rows.items()):
+                connection.execute(cls._INCREMENT_SQL, {
+                    'day': day,
+                    'item_type': item_type,
+                    'employee_id': employee_id,
+                    **counts
+                })
+
+    @classmethod
+    def backfill(cls, days=None):
+        """
+        Rebuild the rollup from the transactions table
+
+        Transactions record no department, so the rebuild counts each one
+        under its employee's current department. The live counters use
+        the department at the time of the checkout or checkin, so after an
+        employee transfers, rebuilt days move their history to the new
+        department.
+
+        Args:
+            days (int): Only rebuild the last N days. If None, rebuilds everything.
+
+        Returns:
+            int: Number of rollup rows written
+        """
+        start = datetime.utcnow().date() - timedelta(days=days) if days else None
+
+        counts = {}
+        for column, index in ((Transaction.check_out_time, 0), (Transaction.check_in_time, 1)):
+            day = func.date(column)
+            # COUNT(column) only counts rows where the column is set
+            query = db.session.query(
+                day,
+                Employee.department_id,
+                func.count(Transaction.key_id),
+                func.count(Transaction.access_card_id)
+            ).join(
+                Employee, Transaction.employee_id == Employee.id
+            ).filter(
+                column.isnot(None)
+            ).group_by(day, Employee.department_id)
+            if start:
+                query = query.filter(column >= datetime.combine(start, datetime.min.time()))
+
+            for row_day, department_id, keys, cards in query.all():
+                # SQLite returns DATE() as a string
+                if isinstance(row_day, str):
+                    row_day = datetime.strptime(row_day, '%Y-%m-%d').date()
+                for item_type, count in (('key', keys), ('access_card', cards)):
+                    if count:
+                        row = counts.setdefault((row_day, department_id, item_type), [0, 0])
+                        row[index] = count
+
+        delete = cls.query
+        if start:
+            delete = delete.filter(cls.day >= start)
+        delete.delete(synchronize_session=False)
+
+        db.session.bulk_insert_mappings(cls, [{
+            'day': row_day,
+            'department_id': department_id,
+            'item_type': row_type,
+            'checkout_count': checkouts,
+            'checkin_count': checkins
+        } for (row_day, department_id, row_type), (checkouts, checkins) in counts.items()])
+        db.session.commit()
+        return len(counts)
+
+    def __repr__(self):
+        return f'<UsageRollup {self.day} dept={self.department_id} {self.item_type}>'
+
+@event.listens_for(Transaction, 'after_insert')
+def _rollup_checkout(mapper, connection, target):
+    UsageRollup.queue_increment(object_session(target), target, checkouts=1)
+
+@event.listens_for(Transaction, 'after_update')
+def _rollup_checkin(mapper, connection, target):
+    history = inspect(target).attrs.check_in_time.history
+    if target.check_in_time and history.added and not any(history.deleted):
+        UsageRollup.queue_increment(object_session(target), target, checkins=1)
+
+@event.listens_for(db.session, 'after_commit')
+def _apply_on_commit(session):
+    pending = session.info.pop('usage_rollup_pending', None)
+    if not pending:
+        return
+    try:
+        UsageRollup.apply_increments(pending)
+    except Exception as e:
+        # The checkout is committed; the backfill restores the counts
+        logger.error(f"Could not update usage rollup: {str(e)}")
+
+@event.listens_for(db.session, 'after_rollback')
+def _discard_on_rollback(session):
+    session.info.pop('usage_rollup_pending', None)
@@ -56,7 +56,6 @@ class User(db.Model):
     def update_last_login(self):
         """Update the last login timestamp"""
         self.last_login = datetime.utcnow()
-        db.session.commit()
 
     def __repr__(self):
         return f'<User {self.username}>'
@@ -5,13 +5,24 @@ from datetime import datetime, timedelta
 from app import db
 from models.access_card import AccessCard
 from models.employee import Employee
+from models.transaction import Transaction
 from models.department import Department
 from utils.permissions import admin_required
+from utils.serialization import eager_load
+from utils.fields import parse_fields
+from utils.includes import parse_includes, include_related
+from utils.pagination import paginate
+from utils.history import get_item_history
+from utils.conditional import conditional_get
 
 access_cards_bp = Blueprint('access_cards', __name__)
 
+# Tables read by this blueprint's GET responses
+CARD_TABLES = (AccessCard, Employee, Transaction)
+
 @access_cards_bp.route('/', methods=['GET'])
 @jwt_required()
+@conditional_get(*CARD_TABLES, time_dependent=True)
 def get_access_cards():
     """Get list of all access cards with optional filters"""
     try:
@@ -39,24 +50,43 @@ def get_access_cards():
                 (AccessCard.expiry_date.is_(None))
             )
         
-        # Execute query
-        cards = query.all()
+        # Fetch one page with the relationships the requested fields need loaded up front
+        fields = parse_fields(AccessCard)
+        includes = parse_includes(AccessCard)
+        cards, pagination = paginate(eager_load(query, AccessCard, fields), [AccessCard.id])
         
-        return jsonify({
-            'access_cards': [card.to_dict() for card in cards]
-        }), 200
+        response = {
+            'access_cards': [card.to_dict(fields) for card in cards],
+            'pagination': pagination
+        }
+        if includes:
+            response['included'] = include_related(AccessCard, cards, response['access_cards'], includes)
         
+        return jsonify(response), 200
+        
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
 @access_cards_bp.route('/<int:card_id>', methods=['GET'])
 @jwt_required()
+@conditional_get(*CARD_TABLES, time_dependent=True)
 def get_access_card(card_id):
     """Get details of a specific access card"""
     try:
+        fields = parse_fields(AccessCard)
+        includes = parse_includes(AccessCard)
         card = AccessCard.query.get_or_404(card_id)
-        return jsonify(card.to_dict()), 200
+        data = card.to_dict(fields)
         
+        if includes:
+            included = include_related(AccessCard, [card], [data], includes)
+            return jsonify({'access_card': data, 'included': included}), 200
+        return jsonify(data), 200
+        
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
@@ -207,31 +237,29 @@ def extend_card_expiry(card_id):
 
 @access_cards_bp.route('/<int:card_id>/history', methods=['GET'])
 @jwt_required()
+@conditional_get(*CARD_TABLES, time_dependent=True)
 def get_card_history(card_id):
     """Get usage history for an access card"""
     try:
         card = AccessCard.query.get_or_404(card_id)
         
-        # Get all transactions for this card
-        transactions = [{
-            'transaction_number': t.transaction_number,
-            'employee': t.employee.full_name,
-            'check_out_time': t.check_out_time.isoformat(),
-            'check_in_time': t.check_in_time.isoformat() if t.check_in_time else None,
-            'purpose': t.purpose,
-            'status': t.status
-        } for t in card.transactions]
+        # Newest first, one page at a time, optionally bounded by 'from'/'to'
+        transactions, pagination = get_item_history(Transaction.access_card_id, card.id)
         
         return jsonify({
             'card_number': card.card_number,
-            'transactions': transactions
+            'transactions': transactions,
+            'pagination': pagination
         }), 200
         
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
 @access_cards_bp.route('/expiring', methods=['GET'])
 @jwt_required()
+@conditional_get(*CARD_TABLES, time_dependent=True)
 def get_expiring_cards():
     """Get list of cards expiring soon"""
     try:
@@ -1,13 +1,20 @@
-from flask import Blueprint, jsonify
+from flask import Blueprint, request, jsonify, current_app
 from flask_jwt_extended import jwt_required, get_jwt_identity
-from sqlalchemy import func
+from sqlalchemy import func, case, or_
+from sqlalchemy.orm import joinedload
 from datetime import datetime, timedelta
+import json
 
+from app import db
 from models.transaction import Transaction
 from models.key import Key
 from models.access_card import AccessCard
 from models.department import Department
 from models.employee import Employee
+from models.usage_rollup import UsageRollup
+from models.alert import Alert, AlertEvent
+from utils.dashboard_cache import dashboard_cache
+from utils.live_events import live_events
 
 dashboard_bp = Blueprint('dashboard', __name__)
 
@@ -16,217 +23,385 @@ dashboard_bp = Blueprint('dashboard', __name__)
 def get_dashboard_stats():
     """Get real-time dashboard statistics"""
     try:
-        # Get current counts
-        total_keys = Key.query.count()
-        total_cards = AccessCard.query.count()
-        total_employees = Employee.query.count()
-        
-        # Get active checkouts
-        active_key_checkouts = Transaction.query.filter(
-            Transaction.key_id.isnot(None),
-            Transaction.check_in_time.is_(None)
-        ).count()
-        
-        active_card_checkouts = Transaction.query.filter(
-            Transaction.access_card_id.isnot(None),
-            Transaction.check_in_time.is_(None)
-        ).count()
-        
-        # Get overdue items
-        now = datetime.utcnow()
-        overdue_transactions = Transaction.query.filter(
-            Transaction.check_in_time.is_(None),
-            Transaction.expected_return_time < now
-        ).all()
-        
-        overdue_items = [{
-            'transaction_number': t.transaction_number,
-            'employee_name': t.employee.full_name,
-            'item_type': 'key' if t.key_id else 'access_card',
-            'item_id': t.key.key_number if t.key_id else t.access_card.card_number,
-            'checkout_time': t.check_out_time.isoformat(),
-            'expected_return': t.expected_return_time.isoformat(),
-            'hours_overdue': round((now - t.expected_return_time).total_seconds() / 3600, 1)
-        } for t in overdue_transactions]
-        
-        # Get department-wise usage statistics
-        dept_stats = get_department_stats()
-        
-        # Get recent activity
-        recent_activity = get_recent_activity()
-        
-        # Get availability statistics
-        availability_stats = {
-            'keys': {
-                'total': total_keys,
-                'available': Key.query.filter_by(status='available').count(),
-                'checked_out': active_key_checkouts,
-                'lost': Key.query.filter_by(status='lost').count(),
-                'retired': Key.query.filter_by(status='retired').count()
-            },
-            'access_cards': {
-                'total': total_cards,
-                'active': AccessCard.query.filter_by(status='active').count(),
-                'inactive': AccessCard.query.filter_by(status='inactive').count(),
-                'lost': AccessCard.query.filter_by(status='lost').count()
-            }
-        }
-        
-        return jsonify({
-            'current_stats': {
-                'total_keys': total_keys,
-                'total_cards': total_cards,
-                'total_employees': total_employees,
-                'active_checkouts': {
-                    'keys': active_key_checkouts,
-                    'cards': active_card_checkouts
-                }
-            },
-            'overdue_items': overdue_items,
-            'department_stats': dept_stats,
-            'recent_activity': recent_activity,
-            'availability': availability_stats
-        }), 200
+        return dashboard_cache.response('stats', build_dashboard_stats), 200
         
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
+def build_dashboard_stats():
+    """Build the dashboard statistics payload"""
+    now = datetime.utcnow()
+    
+    # Inventory counts, one grouped query per table
+    key_counts = get_status_counts(Key)
+    card_counts = get_status_counts(AccessCard)
+    total_keys = sum(key_counts.values())
+    total_cards = sum(card_counts.values())
+    
+    # Open checkouts and employee total in a single pass;
+    # COUNT(column) only counts rows where the column is set
+    total_employees, active_key_checkouts, active_card_checkouts = db.session.query(
+        db.session.query(func.count(Employee.id)).scalar_subquery(),
+        func.count(Transaction.key_id),
+        func.count(Transaction.access_card_id)
+    ).filter(
+        Transaction.check_in_time.is_(None)
+    ).one()
+    
+    # Get overdue items
+    overdue_items = [{
+        'transaction_number': row.transaction_number,
+        'employee_name': f"{row.first_name} {row.last_name}",
+        'item_type': 'key' if row.key_id else 'access_card',
+        'item_id': row.key_number if row.key_id else row.card_number,
+        'checkout_time': row.check_out_time.isoformat(),
+        'expected_return': row.expected_return_time.isoformat(),
+        'hours_overdue': round((now - row.expected_return_time).total_seconds() / 3600, 1),
+        'escalation_level': row.escalation_level
+    } for row in query_overdue()]
+    
+    # Get department-wise usage statistics
+    dept_stats = get_department_stats()
+    
+    # Get recent activity
+    recent_activity = get_recent_activity()
+    
+    # Get availability statistics
+    availability_stats = {
+        'keys': {
+            'total': total_keys,
+            'available': key_counts.get('available', 0),
+            'checked_out': active_key_checkouts,
+            'lost': key_counts.get('lost', 0),
+            'retired': key_counts.get('retired', 0)
+        },
+        'access_cards': {
+            'total': total_cards,
+            'active': card_counts.get('active', 0),
+            'inactive': card_counts.get('inactive', 0),
+            'lost': card_counts.get('lost', 0)
+        }
+    }
+    
+    return {
+        'current_stats': {
+            'total_keys': total_keys,
+            'total_cards': total_cards,
+            'total_employees': total_employees,
+            'active_checkouts': {
+                'keys': active_key_checkouts,
+                'cards': active_card_checkouts
+            }
+        },
+        'overdue_items': overdue_items,
+        'department_stats': dept_stats,
+        'recent_activity': recent_activity,
+        'availability': availability_stats
+    }
+
+def get_status_counts(model):
+    """Get row counts per status for a model in one grouped query"""
+    return dict(
+        db.session.query(model.status, func.count(model.id)).group_by(model.status).all()
+    )
+
+def query_overdue():
+    """
+    Get overdue transactions with the employee and item joined in
+    
+    Returns plain rows rather than ORM objects so callers never trigger
+    per-row lazy loads.
+    """
+    return db.session.query(
+        Transaction.transaction_number,
+        Transaction.key_id,
+        Transaction.check_out_time,
+        Transaction.expected_return_time,
+        Transaction.escalation_level,
+        Employee.first_name,
+        Employee.last_name,
+        Key.key_number,
+        AccessCard.card_number
+    ).join(
+        Employee, Transaction.employee_id == Employee.id
+    ).outerjoin(
+        Key, Transaction.key_id == Key.id
+    ).outerjoin(
+        AccessCard, Transaction.access_card_id == AccessCard.id
+    ).filter(
+        Transaction.status == 'overdue'
+    ).all()
+
 def get_department_stats():
     """Get department-wise usage statistics"""
-    # Get last 30 days of transactions
-    thirty_days_ago = datetime.utcnow() - timedelta(days=30)
+    # Last 30 days, read from the daily rollup rather than raw transactions
+    thirty_days_ago = datetime.utcnow().date() - timedelta(days=30)
     
     dept_stats = db.session.query(
         Department.name,
-        func.count(Transaction.id).label('total_transactions'),
-        func.count(Transaction.key_id).label('key_checkouts'),
-        func.count(Transaction.access_card_id).label('card_checkouts')
+        func.sum(UsageRollup.checkout_count).label('total_transactions'),
+        func.sum(case((UsageRollup.item_type == 'key', UsageRollup.checkout_count), else_=0)).label('key_checkouts'),
+        func.sum(case((UsageRollup.item_type == 'access_card', UsageRollup.checkout_count), else_=0)).label('card_checkouts')
     ).join(
-        Employee, Employee.department_id == Department.id
-    ).join(
-        Transaction, Transaction.employee_id == Employee.id
+        UsageRollup, UsageRollup.department_id == Department.id
     ).filter(
-        Transaction.check_out_time >= thirty_days_ago
+        UsageRollup.day >= thirty_days_ago
     ).group_by(
         Department.name
     ).all()
     
     return [{
         'department': stat[0],
-        'total_transactions': stat[1],
-        'key_checkouts': stat[2],
-        'card_checkouts': stat[3]
+        'total_transactions': int(stat[1]),
+        'key_checkouts': int(stat[2]),
+        'card_checkouts': int(stat[3])
     } for stat in dept_stats]
 
 def get_recent_activity():
     """Get recent transactions and activities"""
-    recent_transactions = Transaction.query.order_by(
+    recent_transactions = db.session.query(
+        Transaction.transaction_number,
+        Transaction.key_id,
+        Transaction.check_out_time,
+        Transaction.check_in_time,
+        Employee.first_name,
+        Employee.last_name,
+        Key.key_number,
+        AccessCard.card_number
+    ).join(
+        Employee, Transaction.employee_id == Employee.id
+    ).outerjoin(
+        Key, Transaction.key_id == Key.id
+    ).outerjoin(
+        AccessCard, Transaction.access_card_id == AccessCard.id
+    ).order_by(
         Transaction.check_out_time.desc()
     ).limit(10).all()
     
     return [{
         'transaction_number': t.transaction_number,
         'timestamp': t.check_out_time.isoformat(),
-        'employee_name': t.employee.full_name,
+        'employee_name': f"{t.first_name} {t.last_name}",
         'action': 'checked out' if not t.check_in_time else 'checked in',
         'item_type': 'key' if t.key_id else 'access_card',
-        'item_id': t.key.key_number if t.key_id else t.access_card.card_number
+        'item_id': t.key_number if t.key_id else t.card_number
     } for t in recent_transactions]
 
+HEATMAP_GRANULARITIES = ('hour', 'day', 'week')
+HEATMAP_MAX_DAYS = {'hour': 31, 'day': 366, 'week': 366}
+
 @dashboard_bp.route('/heatmap', methods=['GET'])
 @jwt_required()
 def get_usage_heatmap():
     """Get department-wise key/card usage heatmap data"""
     try:
-        # Get transactions for the last 7 days
-        seven_days_ago = datetime.utcnow() - timedelta(days=7)
+        granularity = request.args.get('granularity', 'day')
+        if granularity not in HEATMAP_GRANULARITIES:
+            return jsonify({'error': 'Granularity must be one of: hour, day, week'}), 400
+        
+        days = int(request.args.get('days', 7))
+        if not 1 <= days <= HEATMAP_MAX_DAYS[granularity]:
+            return jsonify({
+                'error': f'Days must be between 1 and {HEATMAP_MAX_DAYS[granularity]} '
+                         f'for {granularity} granularity'
+            }), 400
+        
+        return dashboard_cache.response(
+            ('heatmap', days, granularity),
+            lambda: build_usage_heatmap(days, granularity)
+        ), 200
         
-        transactions = db.session.query(
+    except ValueError:
+        return jsonify({'error': 'Days must be an integer'}), 400
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+def build_usage_heatmap(days=7, granularity='day'):
+    """
+    Build the department usage heatmap payload
+    
+    Args:
+        days (int): Number of days to cover, ending today
+        granularity (str): Bucket size, one of 'hour', 'day' or 'week'
+    
+    Returns:
+        dict: Departments, bucket labels and a departments x buckets matrix
+              of checkout counts, with empty buckets filled with zeros
+    """
+    now = datetime.utcnow()
+    buckets = get_heatmap_buckets(now, days, granularity)
+    
+    if granularity == 'hour':
+        # Hourly counts are finer than the rollup, so aggregate raw
+        # checkouts; the range is capped so this stays index-bounded
+        if db.engine.dialect.name == 'postgresql':
+            bucket = func.date_trunc('hour', Transaction.check_out_time)
+        else:
+            bucket = func.strftime('%Y-%m-%d %H:00:00', Transaction.check_out_time)
+        rows = db.session.query(
             Department.name,
-            func.date(Transaction.check_out_time),
+            bucket,
             func.count(Transaction.id)
         ).join(
             Employee, Employee.department_id == Department.id
         ).join(
             Transaction, Transaction.employee_id == Employee.id
         ).filter(
-            Transaction.check_out_time >= seven_days_ago
+            Transaction.check_out_time >= buckets[0]
         ).group_by(
             Department.name,
-            func.date(Transaction.check_out_time)
+            bucket
         ).all()
-        
-        # Format data for heatmap
-        departments = list(set(t[0] for t in transactions))
-        dates = list(set(t[1].isoformat() for t in transactions))
-        
-        heatmap_data = {
-            'departments': departments,
-            'dates': sorted(dates),
-            'values': []
-        }
-        
-        for dept in departments:
-            dept_data = []
-            for date in sorted(dates):
-                count = next(
-                    (t[2] for t in transactions 
-                     if t[0] == dept and t[1].isoformat() == date),
-                    0
-                )
-                dept_data.append(count)
-            heatmap_data['values'].append(dept_data)
-        
-        return jsonify(heatmap_data), 200
-        
-    except Exception as e:
-        return jsonify({'error': str(e)}), 500
+    else:
+        rows = db.session.query(
+            Department.name,
+            UsageRollup.day,
+            func.sum(UsageRollup.checkout_count)
+        ).join(
+            UsageRollup, UsageRollup.department_id == Department.id
+        ).filter(
+            UsageRollup.day >= buckets[0]
+        ).group_by(
+            Department.name,
+            UsageRollup.day
+        ).all()
+    
+    # Pivot in one pass: map each row to its (department, bucket) cell
+    bucket_index = {b: i for i, b in enumerate(buckets)}
+    departments = sorted(set(row[0] for row in rows))
+    dept_index = {d: i for i, d in enumerate(departments)}
+    values = [[0] * len(buckets) for _ in departments]
+    
+    for dept, when, count in rows:
+        if isinstance(when, str):
+            # SQLite's strftime bucket
+            when = datetime.fromisoformat(when)
+        if granularity == 'week':
+            # The first bucket is clamped to the start of the range
+            when = max(when - timedelta(days=when.weekday()), buckets[0])
+        i = bucket_index.get(when)
+        if i is not None:
+            values[dept_index[dept]][i] += int(count)
+    
+    return {
+        'departments': departments,
+        'dates': [b.isoformat() for b in buckets],
+        'granularity': granularity,
+        'values': values
+    }
+
+def get_heatmap_buckets(now, days, granularity):
+    """
+    Get every bucket start in the heatmap range, oldest first
+    
+    Weekly buckets start on Mondays, except the first, which starts with
+    the range so it never counts days before it.
+    """
+    if granularity == 'hour':
+        end = now.replace(minute=0, second=0, microsecond=0)
+        return [end - timedelta(hours=h) for h in range(days * 24 - 1, -1, -1)]
+    
+    today = now.date()
+    if granularity == 'week':
+        start = today - timedelta(days=days - 1)
+        monday = start - timedelta(days=start.weekday())
+        return [start] + [monday + timedelta(weeks=w) for w in range(1, (today - monday).days // 7 + 1)]
+    
+    return [today - timedelta(days=d) for d in range(days - 1, -1, -1)]
 
 @dashboard_bp.route('/alerts', methods=['GET'])
 @jwt_required()
 def get_alerts():
-    """Get system alerts and notifications"""
+    """
+    Get system alerts and notifications
+    
+    Without parameters, returns the open alerts sorted by priority. With
+    since=<event id>, returns the alert events recorded after that ID (new,
+    escalated and resolved alerts), plus any created in the last
+    ALERT_EVENTS_LOOKBACK seconds: an event can commit after one with a
+    higher ID, so clients should skip event IDs they have already seen.
+    Both forms carry an ETag derived from the feed's version and answer
+    304 when nothing changed.
+    """
     try:
-        now = datetime.utcnow()
-        alerts = []
-        
-        # Check for overdue items
-        overdue_transactions = Transaction.query.filter(
-            Transaction.check_in_time.is_(None),
-            Transaction.expected_return_time < now
-        ).all()
-        
-        for t in overdue_transactions:
-            alerts.append({
-                'type': 'overdue',
-                'priority': 'high',
-                'message': f"Overdue {t.key.key_number if t.key_id else t.access_card.card_number} "
-                          f"checked out by {t.employee.full_name}",
-                'timestamp': t.expected_return_time.isoformat()
-            })
+        since = request.args.get('since')
+        if since is not None:
+            since = int(since)
         
-        # Check for expiring access cards
-        soon = now + timedelta(days=7)
-        expiring_cards = AccessCard.query.filter(
-            AccessCard.expiry_date.between(now, soon)
-        ).all()
+        recent_since = datetime.utcnow() - timedelta(seconds=current_app.config['ALERT_EVENTS_LOOKBACK'])
+        last_id, recent = AlertEvent.version(recent_since)
+        etag = f"alerts-{'open' if since is None else since}-{last_id}-{recent}"
+        if request.if_none_match.contains(etag):
+            response = current_app.response_class(status=304)
+            response.set_etag(etag)
+            return response
         
-        for card in expiring_cards:
-            alerts.append({
-                'type': 'expiring_card',
-                'priority': 'medium',
-                'message': f"Access card {card.card_number} will expire on "
-                          f"{card.expiry_date.strftime('%Y-%m-%d')}",
-                'timestamp': card.expiry_date.isoformat()
+        if since is None:
+            alerts = Alert.query.filter(Alert.resolved_at.is_(None)).all()
+            alerts.sort(key=lambda a: a.sort_key())
+            response = jsonify([alert.to_dict() for alert in alerts])
+        else:
+            limit = current_app.config['PAGE_SIZE_MAX']
+            events = AlertEvent.query.options(
+                joinedload(AlertEvent.alert)
+            ).filter(
+                or_(AlertEvent.id > since, AlertEvent.created_at >= recent_since)
+            ).order_by(
+                # Events after the cursor first, so re-read ones never crowd them out of a page
+                case((AlertEvent.id > since, 0), else_=1), AlertEvent.id
+            ).limit(limit + 1).all()
+            
+            has_more = len(events) > limit
+            events = sorted(events[:limit], key=lambda e: e.id)
+            response = jsonify({
+                'events': [e.to_dict() for e in events],
+                'last_id': max([since] + [e.id for e in events]),
+                'has_more': has_more
             })
         
-        # Sort alerts by priority and timestamp
-        alerts.sort(key=lambda x: (
-            0 if x['priority'] == 'high' else 1 if x['priority'] == 'medium' else 2,
-            x['timestamp']
-        ))
-        
-        return jsonify(alerts), 200
+        response.set_etag(etag)
+        response.headers['X-Alerts-Last-Id'] = str(last_id)
+        return response, 200
         
+    except ValueError:
+        return jsonify({'error': 'since must be an integer event id'}), 400
     except Exception as e:
         return jsonify({'error': str(e)}), 500
+
+@dashboard_bp.route('/stream', methods=['GET'])
+@jwt_required()
+def stream_events():
+    """
+    Stream live dashboard events (Server-Sent Events)
+    
+    Emits checkout, checkin, lost, overdue and card_expiry events as they
+    are committed. Bursts are coalesced into one write, a heartbeat comment
+    keeps idle connections open through proxies, and a 'resync' event tells
+    a client that fell behind to refetch /dashboard/stats.
+    """
+    heartbeat = current_app.config['LIVE_EVENTS_HEARTBEAT']
+    window = current_app.config['LIVE_EVENTS_COALESCE_WINDOW']
+    subscription = live_events.subscribe()
+    
+    def generate():
+        try:
+            yield f"retry: {heartbeat * 1000}\n\n"
+            while True:
+                batch = subscription.get_batch(timeout=heartbeat, window=window)
+                if subscription.overflowed:
+                    subscription.overflowed = False
+                    yield "event: resync\ndata: {}\n\n"
+                if not batch:
+                    yield ": heartbeat\n\n"
+                    continue
+                yield ''.join(
+                    f"id: {event_id}\nevent: {event_type}\ndata: {json.dumps(data)}\n\n"
+                    for event_id, event_type, data in batch
+                )
+        finally:
+            live_events.unsubscribe(subscription)
+    
+    return current_app.response_class(generate(), mimetype='text/event-stream', headers={
+        'Cache-Control': 'no-cache',
+        'X-Accel-Buffering': 'no'
+    })
@@ -7,12 +7,24 @@ from app import db
 from models.employee import Employee
 from models.department import Department
 from models.transaction import Transaction
+from models.key import Key
+from models.access_card import AccessCard
 from utils.permissions import admin_required
+from utils.serialization import eager_load
+from utils.fields import parse_fields
+from utils.includes import parse_includes, include_related
+from utils.pagination import paginate
+from utils.employee_search import search_employees, get_search_limit
+from utils.conditional import conditional_get
 
 employees_bp = Blueprint('employees', __name__)
 
+# Tables read by this blueprint's GET responses
+EMPLOYEE_TABLES = (Employee, Department, Transaction, Key, AccessCard)
+
 @employees_bp.route('/', methods=['GET'])
 @jwt_required()
+@conditional_get(*EMPLOYEE_TABLES)
 def get_employees():
     """Get list of all employees with optional filters"""
     try:
@@ -29,35 +41,49 @@ def get_employees():
             query = query.filter(Employee.department_id == department_id)
         if status:
             query = query.filter(Employee.status == status)
+        
+        # Fetch one page (or the top-ranked search matches) with the
+        # relationships the requested fields need loaded up front
+        fields = parse_fields(Employee)
+        includes = parse_includes(Employee)
+        query = eager_load(query, Employee, fields)
         if search:
-            search_term = f"%{search}%"
-            query = query.filter(
-                db.or_(
-                    Employee.first_name.ilike(search_term),
-                    Employee.last_name.ilike(search_term),
-                    Employee.employee_number.ilike(search_term),
-                    Employee.email.ilike(search_term)
-                )
-            )
-        
-        # Execute query
-        employees = query.all()
+            employees, pagination = search_employees(query, search, get_search_limit())
+        else:
+            employees, pagination = paginate(query, [Employee.id])
         
-        return jsonify({
-            'employees': [emp.to_dict() for emp in employees]
-        }), 200
+        response = {
+            'employees': [emp.to_dict(fields) for emp in employees],
+            'pagination': pagination
+        }
+        if includes:
+            response['included'] = include_related(Employee, employees, response['employees'], includes)
+        
+        return jsonify(response), 200
         
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
 @employees_bp.route('/<int:employee_id>', methods=['GET'])
 @jwt_required()
+@conditional_get(*EMPLOYEE_TABLES)
 def get_employee(employee_id):
     """Get details of a specific employee"""
     try:
+        fields = parse_fields(Employee)
+        includes = parse_includes(Employee)
         employee = Employee.query.get_or_404(employee_id)
-        return jsonify(employee.to_dict()), 200
+        data = employee.to_dict(fields)
         
+        if includes:
+            included = include_related(Employee, [employee], [data], includes)
+            return jsonify({'employee': data, 'included': included}), 200
+        return jsonify(data), 200
+        
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
@@ -167,6 +193,7 @@ def update_employee(employee_id):
 
 @employees_bp.route('/<int:employee_id>/transactions', methods=['GET'])
 @jwt_required()
+@conditional_get(*EMPLOYEE_TABLES, time_dependent=True)
 def get_employee_transactions(employee_id):
     """Get transaction history for an employee"""
     try:
@@ -187,18 +214,33 @@ def get_employee_transactions(employee_id):
         elif item_type == 'access_card':
             query = query.filter(Transaction.access_card_id.isnot(None))
         
-        transactions = query.order_by(Transaction.check_out_time.desc()).all()
+        # Newest first, one page at a time
+        fields = parse_fields(Transaction)
+        includes = parse_includes(Transaction)
+        transactions, pagination = paginate(
+            eager_load(query, Transaction, fields),
+            [Transaction.check_out_time, Transaction.id],
+            descending=True
+        )
         
-        return jsonify({
+        response = {
             'employee': employee.full_name,
-            'transactions': [t.to_dict() for t in transactions]
-        }), 200
+            'transactions': [t.to_dict(fields) for t in transactions],
+            'pagination': pagination
+        }
+        if includes:
+            response['included'] = include_related(Transaction, transactions, response['transactions'], includes)
+        
+        return jsonify(response), 200
         
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
 @employees_bp.route('/<int:employee_id>/active-items', methods=['GET'])
 @jwt_required()
+@conditional_get(*EMPLOYEE_TABLES)
 def get_employee_active_items(employee_id):
     """Get currently checked out items for an employee"""
     try:
@@ -216,6 +258,7 @@ def get_employee_active_items(employee_id):
 # Department routes
 @employees_bp.route('/departments', methods=['GET'])
 @jwt_required()
+@conditional_get(*EMPLOYEE_TABLES)
 def get_departments():
     """Get list of all departments"""
     try:
@@ -292,6 +335,7 @@ def update_department(dept_id):
 
 @employees_bp.route('/departments/<int:dept_id>/employees', methods=['GET'])
 @jwt_required()
+@conditional_get(*EMPLOYEE_TABLES)
 def get_department_employees(dept_id):
     """Get all employees in a department"""
     try:
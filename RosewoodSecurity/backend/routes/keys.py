@@ -5,14 +5,26 @@ import uuid
 
 from app import db
 from models.key import Key
+from models.transaction import Transaction
 from models.user import User
 from models.department import Department
+from models.employee import Employee
 from utils.permissions import admin_required
+from utils.serialization import eager_load
+from utils.fields import parse_fields
+from utils.includes import parse_includes, include_related
+from utils.pagination import paginate
+from utils.history import get_item_history
+from utils.conditional import conditional_get
 
 keys_bp = Blueprint('keys', __name__)
 
+# Tables read by this blueprint's GET responses
+KEY_TABLES = (Key, Transaction, Employee, Department)
+
 @keys_bp.route('/', methods=['GET'])
 @jwt_required()
+@conditional_get(*KEY_TABLES)
 def get_keys():
     """Get list of all keys with optional filters"""
     try:
@@ -34,24 +46,43 @@ def get_keys():
                 Department.id == department_id
             )
         
-        # Execute query
-        keys = query.all()
+        # Fetch one page with the relationships the requested fields need loaded up front
+        fields = parse_fields(Key)
+        includes = parse_includes(Key)
+        keys, pagination = paginate(eager_load(query, Key, fields), [Key.id])
         
-        return jsonify({
-            'keys': [key.to_dict() for key in keys]
-        }), 200
+        response = {
+            'keys': [key.to_dict(fields) for key in keys],
+            'pagination': pagination
+        }
+        if includes:
+            response['included'] = include_related(Key, keys, response['keys'], includes)
         
+        return jsonify(response), 200
+        
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
 @keys_bp.route('/<int:key_id>', methods=['GET'])
 @jwt_required()
+@conditional_get(*KEY_TABLES)
 def get_key(key_id):
     """Get details of a specific key"""
     try:
+        fields = parse_fields(Key)
+        includes = parse_includes(Key)
         key = Key.query.get_or_404(key_id)
-        return jsonify(key.to_dict()), 200
+        data = key.to_dict(fields)
+        
+        if includes:
+            included = include_related(Key, [key], [data], includes)
+            return jsonify({'key': data, 'included': included}), 200
+        return jsonify(data), 200
         
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
@@ -127,6 +158,9 @@ def update_key(key_id):
                 Department.id.in_(data['department_ids'])
             ).all()
             key.authorized_departments = departments
+            # Permission rows don't touch the key row; bump it so the
+            # conditional GET version marker changes
+            key.updated_at = datetime.utcnow()
         
         # Record maintenance if specified
         if data.get('maintenance_performed'):
@@ -169,6 +203,7 @@ def delete_key(key_id):
 
 @keys_bp.route('/<int:key_id>/permissions', methods=['GET'])
 @jwt_required()
+@conditional_get(*KEY_TABLES)
 def get_key_permissions(key_id):
     """Get departments authorized to use this key"""
     try:
@@ -190,26 +225,23 @@ def get_key_permissions(key_id):
 
 @keys_bp.route('/<int:key_id>/history', methods=['GET'])
 @jwt_required()
+@conditional_get(*KEY_TABLES)
 def get_key_history(key_id):
     """Get checkout history for a key"""
     try:
         key = Key.query.get_or_404(key_id)
         
-        # Get all transactions for this key
-        transactions = [{
-            'transaction_number': t.transaction_number,
-            'employee': t.employee.full_name,
-            'check_out_time': t.check_out_time.isoformat(),
-            'check_in_time': t.check_in_time.isoformat() if t.check_in_time else None,
-            'purpose': t.purpose,
-            'status': t.status
-        } for t in key.transactions]
+        # Newest first, one page at a time, optionally bounded by 'from'/'to'
+        transactions, pagination = get_item_history(Transaction.key_id, key.id)
         
         return jsonify({
             'key_number': key.key_number,
-            'transactions': transactions
+            'transactions': transactions,
+            'pagination': pagination
         }), 200
         
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
@@ -0,0 +1,29 @@
+from flask import Blueprint, request, jsonify
+from flask_jwt_extended import jwt_required
+
+from models.identifier import Identifier
+
+lookup_bp = Blueprint('lookup', __name__)
+
+@lookup_bp.route('/resolve', methods=['GET'])
+@jwt_required()
+def resolve_identifier():
+    """Resolve a scanned key, card, employee or transaction number to its entity"""
+    try:
+        value = (request.args.get('identifier') or '').strip()
+        if not value:
+            raise ValueError('identifier is required')
+        
+        matches = Identifier.resolve(value)
+        if not matches:
+            return jsonify({'error': 'Identifier not found'}), 404
+        
+        return jsonify({
+            'identifier': value,
+            'matches': [match.to_dict() for match in matches]
+        }), 200
+        
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
@@ -1,20 +1,20 @@
-from flask import Blueprint, jsonify, send_file
-from flask_jwt_extended import jwt_required, get_jwt_identity
+from flask import Blueprint, request, jsonify, send_file, Response, stream_with_context
+from flask_jwt_extended import jwt_required, get_jwt_identity, get_jwt
 from datetime import datetime, timedelta
-import pandas as pd
 from io import BytesIO
 import os
-from reportlab.lib import colors
-from reportlab.lib.pagesizes import letter
-from reportlab.platypus import SimpleDocTemplate, Table, TableStyle, Paragraph
-from reportlab.lib.styles import getSampleStyleSheet
 
+from app import db
 from models.transaction import Transaction
 from models.key import Key
 from models.access_card import AccessCard
 from models.employee import Employee
 from models.department import Department
+from models.report_job import ReportJob
 from utils.permissions import admin_required, auditor_required
+from utils import daily_report, report_jobs
+from utils.weekly_report import build_weekly_report
+from utils.xlsx_stream import stream_xlsx, MIMETYPE as XLSX_MIMETYPE
 
 reports_bp = Blueprint('reports', __name__)
 
@@ -22,47 +22,26 @@ reports_bp = Blueprint('reports', __name__)
 @jwt_required()
 @auditor_required
 def generate_daily_report():
-    """Generate a daily transaction report"""
+    """
+    Stream the transaction report for one day or a range of days as XLSX
+
+    Query parameters: 'date' (YYYY-MM-DD) or 'from'/'to' (inclusive);
+    defaults to yesterday.
+    """
     try:
-        # Get yesterday's date
-        yesterday = datetime.utcnow().date() - timedelta(days=1)
-        start_date = datetime.combine(yesterday, datetime.min.time())
-        end_date = datetime.combine(yesterday, datetime.max.time())
-        
-        # Get all transactions for yesterday
-        transactions = Transaction.query.filter(
-            Transaction.check_out_time.between(start_date, end_date)
-        ).all()
-        
-        # Prepare data for report
-        data = []
-        for t in transactions:
-            data.append({
-                'Transaction Number': t.transaction_number,
-                'Employee': t.employee.full_name,
-                'Department': t.employee.department.name,
-                'Item Type': 'Key' if t.key_id else 'Access Card',
-                'Item ID': t.key.key_number if t.key_id else t.access_card.card_number,
-                'Check Out Time': t.check_out_time.strftime('%Y-%m-%d %H:%M'),
-                'Check In Time': t.check_in_time.strftime('%Y-%m-%d %H:%M') if t.check_in_time else 'Not Checked In',
-                'Status': t.status
-            })
-        
-        # Generate Excel report
-        df = pd.DataFrame(data)
-        excel_buffer = BytesIO()
-        with pd.ExcelWriter(excel_buffer, engine='openpyxl') as writer:
-            df.to_excel(writer, sheet_name='Daily Transactions', index=False)
-        
-        excel_buffer.seek(0)
-        
-        return send_file(
-            excel_buffer,
-            mimetype='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet',
-            as_attachment=True,
-            download_name=f'daily_report_{yesterday.strftime("%Y-%m-%d")}.xlsx'
+        first, last = daily_report.get_report_range()
+        
+        # Rows are read and written as the response is sent; an error
+        # after the first bytes can only truncate the download
+        return Response(
+            stream_with_context(stream_xlsx('Daily Transactions', daily_report.HEADER,
+                                            daily_report.iter_rows(first, last))),
+            mimetype=XLSX_MIMETYPE,
+            headers={'Content-Disposition': f'attachment; filename={daily_report.get_filename(first, last)}'}
         )
         
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
@@ -74,87 +53,10 @@ def generate_weekly_report():
     try:
         # Get dates for last week
         end_date = datetime.utcnow().date() - timedelta(days=1)
-        start_date = end_date - timedelta(days=6)
         
         # Generate PDF report
         buffer = BytesIO()
-        doc = SimpleDocTemplate(buffer, pagesize=letter)
-        styles = getSampleStyleSheet()
-        elements = []
-        
-        # Add title
-        title = Paragraph(f"Weekly Security Report ({start_date} to {end_date})", 
-                         styles['Heading1'])
-        elements.append(title)
-        
-        # Add transaction summary
-        transactions = Transaction.query.filter(
-            Transaction.check_out_time.between(
-                datetime.combine(start_date, datetime.min.time()),
-                datetime.combine(end_date, datetime.max.time())
-            )
-        ).all()
-        
-        # Department summary
-        dept_summary = {}
-        for t in transactions:
-            dept = t.employee.department.name
-            if dept not in dept_summary:
-                dept_summary[dept] = {'keys': 0, 'cards': 0}
-            if t.key_id:
-                dept_summary[dept]['keys'] += 1
-            else:
-                dept_summary[dept]['cards'] += 1
-        
-        dept_data = [['Department', 'Keys Checked Out', 'Cards Checked Out']]
-        for dept, counts in dept_summary.items():
-            dept_data.append([dept, counts['keys'], counts['cards']])
-        
-        dept_table = Table(dept_data)
-        dept_table.setStyle(TableStyle([
-            ('BACKGROUND', (0, 0), (-1, 0), colors.grey),
-            ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
-            ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
-            ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
-            ('FONTSIZE', (0, 0), (-1, 0), 14),
-            ('BOTTOMPADDING', (0, 0), (-1, 0), 12),
-            ('BACKGROUND', (0, 1), (-1, -1), colors.beige),
-            ('TEXTCOLOR', (0, 1), (-1, -1), colors.black),
-            ('FONTNAME', (0, 1), (-1, -1), 'Helvetica'),
-            ('FONTSIZE', (0, 1), (-1, -1), 12),
-            ('GRID', (0, 0), (-1, -1), 1, colors.black)
-        ]))
-        elements.append(dept_table)
-        
-        # Add overdue items section
-        elements.append(Paragraph("Overdue Items", styles['Heading2']))
-        overdue = [t for t in transactions if t.is_overdue()]
-        if overdue:
-            overdue_data = [['Item', 'Employee', 'Department', 'Days Overdue']]
-            for t in overdue:
-                item_id = t.key.key_number if t.key_id else t.access_card.card_number
-                days_overdue = (datetime.utcnow() - t.expected_return_time).days
-                overdue_data.append([
-                    item_id,
-                    t.employee.full_name,
-                    t.employee.department.name,
-                    days_overdue
-                ])
-            
-            overdue_table = Table(overdue_data)
-            overdue_table.setStyle(TableStyle([
-                ('BACKGROUND', (0, 0), (-1, 0), colors.red),
-                ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
-                ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
-                ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
-                ('GRID', (0, 0), (-1, -1), 1, colors.black)
-            ]))
-            elements.append(overdue_table)
-        else:
-            elements.append(Paragraph("No overdue items", styles['Normal']))
-        
-        # Build PDF
-        doc.build(elements)
+        build_weekly_report(buffer, end_date)
         buffer.seek(0)
         
         return send_file(
@@ -167,6 +69,99 @@ def generate_weekly_report():
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
+def _get_visible_job(job_id):
+    """Get a report job if it exists and belongs to the caller (or the caller is an admin)"""
+    job = ReportJob.query.get(job_id)
+    if job and (job.created_by == get_jwt_identity() or get_jwt().get('role') == 'admin'):
+        return job
+    return None
+
+@reports_bp.route('/jobs', methods=['POST'])
+@jwt_required()
+@auditor_required
+def create_report_job():
+    """
+    Queue a report to be rendered in the background
+
+    Body: {'type': 'daily' | 'weekly', 'params': {...}} where daily takes
+    the /reports/daily parameters and weekly an optional 'end_date'.
+    Poll GET /reports/jobs/<id> and download from /reports/jobs/<id>/download.
+    """
+    try:
+        data = request.get_json() or {}
+        job = report_jobs.report_queue.create(data.get('type'), data.get('params'), get_jwt_identity())
+        
+        return jsonify({'job': job.to_dict()}), 202
+        
+    except report_jobs.JobLimitExceeded as e:
+        db.session.rollback()
+        return jsonify({'error': str(e)}), 429
+    except ValueError as e:
+        db.session.rollback()
+        return jsonify({'error': str(e)}), 400
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'error': str(e)}), 500
+
+@reports_bp.route('/jobs/<job_id>', methods=['GET'])
+@jwt_required()
+@auditor_required
+def get_report_job(job_id):
+    """Get the status of a report job"""
+    try:
+        job = _get_visible_job(job_id)
+        if not job:
+            return jsonify({'error': 'Report job not found'}), 404
+        
+        return jsonify({'job': job.to_dict()}), 200
+        
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@reports_bp.route('/jobs/<job_id>/download', methods=['GET'])
+@jwt_required()
+@auditor_required
+def download_report_job(job_id):
+    """Download the artifact of a finished report job"""
+    try:
+        job = _get_visible_job(job_id)
+        if not job:
+            return jsonify({'error': 'Report job not found'}), 404
+        if job.status != 'succeeded':
+            return jsonify({'error': f'Report job is {job.status}'}), 409
+        
+        path = report_jobs.report_queue.artifact_path(job)
+        if not os.path.exists(path):
+            return jsonify({'error': 'Report file has expired'}), 404
+        
+        return send_file(
+            path,
+            mimetype=report_jobs.REPORT_TYPES[job.report_type].mimetype,
+            as_attachment=True,
+            download_name=job.filename
+        )
+        
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@reports_bp.route('/jobs/<job_id>/cancel', methods=['POST'])
+@jwt_required()
+@auditor_required
+def cancel_report_job(job_id):
+    """Cancel a queued or running report job"""
+    try:
+        job = _get_visible_job(job_id)
+        if not job:
+            return jsonify({'error': 'Report job not found'}), 404
+        if not report_jobs.report_queue.cancel(job):
+            return jsonify({'error': f'Report job is already {job.status}'}), 409
+        
+        return jsonify({'job': job.to_dict()}), 200
+        
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'error': str(e)}), 500
+
 @reports_bp.route('/audit-trail', methods=['GET'])
 @jwt_required()
 @admin_required
@@ -304,7 +299,7 @@ def generate_employee_report(employee_id):
         # Calculate statistics
         total_transactions = len(transactions)
         active_checkouts = len([t for t in transactions if not t.check_in_time])
-        overdue_items = len([t for t in transactions if t.is_overdue()])
+        overdue_items = len([t for t in transactions if t.status == 'overdue'])
         avg_checkout_duration = sum(
             t.get_duration() for t in transactions if t.check_in_time
         ) / len([t for t in transactions if t.check_in_time]) if transactions else 0
@@ -0,0 +1,24 @@
+from flask import Blueprint, request, jsonify
+from flask_jwt_extended import jwt_required
+
+from utils.search import search, parse_types
+
+search_bp = Blueprint('search', __name__)
+
+@search_bp.route('/', methods=['GET'])
+@jwt_required()
+def global_search():
+    """Ranked full-text search across keys, access cards, employees and transactions"""
+    try:
+        types = parse_types(request.args.get('types'))
+        results, pagination = search(request.args.get('q', ''), types)
+        
+        return jsonify({
+            'results': results,
+            'pagination': pagination
+        }), 200
+        
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
@@ -1,5 +1,7 @@
-from flask import Blueprint, request, jsonify
+from flask import Blueprint, request, jsonify, current_app
 from flask_jwt_extended import jwt_required, get_jwt_identity, get_jwt
+from sqlalchemy.orm import joinedload
+from sqlalchemy.orm.exc import StaleDataError
 from datetime import datetime, timedelta
 
 from app import db
@@ -7,10 +9,21 @@ from models.transaction import Transaction
 from models.employee import Employee
 from models.key import Key
 from models.access_card import AccessCard
+from models.department import Department
 from utils.permissions import security_staff_required
+from utils.serialization import eager_load
+from utils.fields import parse_fields
+from utils.includes import parse_includes, include_related
+from utils.pagination import paginate
+from utils.conditional import conditional_get
+from utils.transaction_numbers import transaction_numbers
+from utils.unit_of_work import CONFLICT_MESSAGE
 
 transactions_bp = Blueprint('transactions', __name__)
 
+# Tables read by this blueprint's GET responses
+TRANSACTION_TABLES = (Transaction, Employee, Key, AccessCard, Department)
+
 @transactions_bp.route('/checkout', methods=['POST'])
 @jwt_required()
 @security_staff_required
@@ -103,6 +116,9 @@ def checkout_item():
             'transaction': transaction.to_dict()
         }), 201
         
+    except StaleDataError:
+        db.session.rollback()
+        return jsonify({'error': CONFLICT_MESSAGE}), 409
     except Exception as e:
         db.session.rollback()
         return jsonify({'error': str(e)}), 500
@@ -141,8 +157,251 @@ def checkin_item():
         db.session.rollback()
         return jsonify({'error': str(e)}), 500
 
+@transactions_bp.route('/checkout/batch', methods=['POST'])
+@jwt_required()
+@security_staff_required
+def batch_checkout():
+    """
+    Check out several keys and/or access cards in one request
+    
+    Body: {'items': [{'key_id' or 'access_card_id', 'employee_id', 'purpose',
+    'expected_return_hours'}, ...], 'all_or_nothing': false}. Item fields
+    other than the item ID default to the top-level fields of the same name.
+    Every item is validated with a handful of set-based queries and the
+    valid ones are committed together. With all_or_nothing, any invalid
+    item aborts the whole batch.
+    """
+    try:
+        data = request.get_json() or {}
+        items, error = _batch_items(data, ('employee_id', 'purpose', 'expected_return_hours'))
+        if error:
+            return jsonify({'error': error}), 400
+        
+        # One query per table for the whole batch; permissions come from the in-process index
+        employees = _by_id(Employee, {item.get('employee_id') for item in items if _is_id(item.get('employee_id'))})
+        keys = _by_id(Key, {item['key_id'] for item in items if _is_id(item.get('key_id'))})
+        cards = _by_id(AccessCard, {item['access_card_id'] for item in items if _is_id(item.get('access_card_id'))})
+        results = [None] * len(items)
+        valid = []
+        seen = set()
+        for index, item in enumerate(items):
+            error = _validate_checkout(item, employees, keys, cards, seen)
+            if error:
+                results[index] = {'index': index, 'success': False, 'error': error[0], 'status': error[1]}
+            else:
+                valid.append((index, item))
+        
+        if len(valid) < len(items) and data.get('all_or_nothing'):
+            return jsonify({
+                'message': 'No items were checked out',
+                'results': [r for r in results if r]
+            }), 400
+        
+        # Reserve every transaction number in one round trip
+        numbers = transaction_numbers.reserve(len(valid)) if valid else []
+        now = datetime.utcnow()
+        for (index, item), number in zip(valid, numbers):
+            expected_return_time = None
+            if item.get('expected_return_hours'):
+                expected_return_time = now + timedelta(hours=float(item['expected_return_hours']))
+            
+            if item.get('key_id'):
+                keys[item['key_id']].check_out(item['employee_id'])
+            else:
+                cards[item['access_card_id']].record_usage()
+            
+            db.session.add(Transaction(
+                employee_id=item['employee_id'],
+                key_id=item.get('key_id'),
+                access_card_id=item.get('access_card_id'),
+                purpose=item['purpose'],
+                expected_return_time=expected_return_time,
+                created_by=get_jwt_identity(),
+                transaction_number=number
+            ))
+            results[index] = {
+                'index': index,
+                'success': True,
+                'transaction_number': number,
+                'employee_id': item['employee_id'],
+                'item_type': 'key' if item.get('key_id') else 'access_card',
+                'item_id': item.get('key_id') or item.get('access_card_id')
+            }
+        
+        db.session.commit()
+        
+        return jsonify({
+            'message': f'{len(valid)} of {len(items)} items checked out',
+            'results': results
+        }), _batch_status(len(valid), len(items), 201)
+        
+    except StaleDataError:
+        db.session.rollback()
+        return jsonify({'error': CONFLICT_MESSAGE}), 409
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'error': str(e)}), 500
+
+@transactions_bp.route('/checkin/batch', methods=['POST'])
+@jwt_required()
+@security_staff_required
+def batch_checkin():
+    """
+    Check in several transactions in one request
+    
+    Body: {'items': [{'transaction_number', 'notes'}, ...], 'notes': ...,
+    'all_or_nothing': false}. Loads every transaction with its key or card
+    in one query and commits the valid check-ins together.
+    """
+    try:
+        data = request.get_json() or {}
+        items, error = _batch_items(data, ('notes',))
+        if error:
+            return jsonify({'error': error}), 400
+        
+        numbers = {item.get('transaction_number') for item in items if isinstance(item.get('transaction_number'), str)}
+        transactions = {t.transaction_number: t for t in Transaction.query.options(
+            joinedload(Transaction.key), joinedload(Transaction.access_card)
+        ).filter(Transaction.transaction_number.in_([n for n in numbers if n])).all()}
+        
+        results = [None] * len(items)
+        valid = []
+        seen = set()
+        for index, item in enumerate(items):
+            error = _validate_checkin(item, transactions, seen)
+            if error:
+                results[index] = {'index': index, 'success': False, 'error': error[0], 'status': error[1]}
+            else:
+                valid.append((index, item))
+        
+        if len(valid) < len(items) and data.get('all_or_nothing'):
+            return jsonify({
+                'message': 'No items were checked in',
+                'results': [r for r in results if r]
+            }), 400
+        
+        for index, item in valid:
+            transaction = transactions[item['transaction_number']]
+            transaction.check_in(notes=item.get('notes'))
+            results[index] = {
+                'index': index,
+                'success': True,
+                'transaction_number': transaction.transaction_number
+            }
+        
+        db.session.commit()
+        
+        return jsonify({
+            'message': f'{len(valid)} of {len(items)} items checked in',
+            'results': results
+        }), _batch_status(len(valid), len(items), 200)
+        
+    except StaleDataError:
+        db.session.rollback()
+        return jsonify({'error': CONFLICT_MESSAGE}), 409
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'error': str(e)}), 500
+
+def _batch_items(data, defaults):
+    """Validate a batch body and apply top-level defaults to each item"""
+    items = data.get('items')
+    if not isinstance(items, list) or not items:
+        return None, 'items must be a non-empty list'
+    if not all(isinstance(item, dict) for item in items):
+        return None, 'Each item must be an object'
+    if len(items) > current_app.config['BATCH_MAX_ITEMS']:
+        return None, f"A batch may contain at most {current_app.config['BATCH_MAX_ITEMS']} items"
+    
+    shared = {field: data[field] for field in defaults if field in data}
+    return [{**shared, **item} for item in items], None
+
+def _by_id(model, ids):
+    ids = [i for i in ids if i is not None]
+    if not ids:
+        return {}
+    return {obj.id: obj for obj in model.query.filter(model.id.in_(ids)).all()}
+
+def _is_id(value):
+    # bool is an int subclass, but true is not an ID
+    return isinstance(value, int) and not isinstance(value, bool)
+
+def _batch_status(succeeded, total, success_status):
+    if succeeded == total:
+        return success_status
+    return 207 if succeeded else 400
+
+def _validate_checkout(item, employees, keys, cards, seen):
+    """Apply the single checkout rules to a batch item; returns (error, status) or None"""
+    if 'employee_id' not in item or 'purpose' not in item:
+        return 'Missing required field: employee_id or purpose', 400
+    if bool(item.get('key_id')) == bool(item.get('access_card_id')):
+        return 'Exactly one of key_id or access_card_id must be provided', 400
+    for field in ('employee_id', 'key_id', 'access_card_id'):
+        if item.get(field) and not _is_id(item[field]):
+            return f'{field} must be an integer', 400
+    if item.get('expected_return_hours'):
+        try:
+            hours = float(item['expected_return_hours'])
+            # Raises for NaN, infinity and times past the largest datetime
+            datetime.utcnow() + timedelta(hours=hours)
+        except (TypeError, ValueError, OverflowError):
+            return 'expected_return_hours must be a number', 400
+        if hours <= 0:
+            return 'expected_return_hours must be positive', 400
+    
+    employee = employees.get(item['employee_id'])
+    if not employee:
+        return 'Employee not found', 404
+    if employee.status != 'active':
+        return 'Employee is not active', 400
+    
+    item_key = ('key', item['key_id']) if item.get('key_id') else ('access_card', item['access_card_id'])
+    if item_key in seen:
+        return 'Item appears more than once in the batch', 400
+    seen.add(item_key)
+    
+    if item.get('key_id'):
+        key = keys.get(item['key_id'])
+        if not key:
+            return 'Key not found', 404
+        if not key.is_available():
+            return 'Key is not available for checkout', 400
+        if not employee.can_checkout_key(key.id):
+            return 'Employee department does not have permission for this key', 403
+    else:
+        card = cards.get(item['access_card_id'])
+        if not card:
+            return 'Access card not found', 404
+        if card.status != 'active':
+            return 'Access card is not active', 400
+        if card.is_expired():
+            return 'Access card has expired', 400
+    return None
+
+def _validate_checkin(item, transactions, seen):
+    """Apply the single checkin rules to a batch item; returns (error, status) or None"""
+    number = item.get('transaction_number')
+    if not number:
+        return 'Transaction number is required', 400
+    if not isinstance(number, str):
+        return 'Transaction number must be a string', 400
+    if number in seen:
+        return 'Transaction appears more than once in the batch', 400
+    seen.add(number)
+    
+    transaction = transactions.get(number)
+    if not transaction:
+        return 'Transaction not found', 404
+    if transaction.check_in_time:
+        return 'Item has already been checked in', 400
+    if transaction.key_id and transaction.key.status != 'checked_out':
+        return f'Key {transaction.key.key_number} is not checked out', 400
+    return None
+
 @transactions_bp.route('/active', methods=['GET'])
 @jwt_required()
+@conditional_get(*TRANSACTION_TABLES, time_dependent=True)
 def get_active_transactions():
     """Get all active (checked out) transactions"""
     try:
@@ -161,46 +420,76 @@ def get_active_transactions():
         elif item_type == 'access_card':
             query = query.filter(Transaction.access_card_id.isnot(None))
         
-        active_transactions = query.all()
+        fields = parse_fields(Transaction)
+        includes = parse_includes(Transaction)
+        active_transactions, pagination = paginate(
+            eager_load(query, Transaction, fields), [Transaction.id]
+        )
         
-        return jsonify({
-            'active_transactions': [t.to_dict() for t in active_transactions]
-        }), 200
+        response = {
+            'active_transactions': [t.to_dict(fields) for t in active_transactions],
+            'pagination': pagination
+        }
+        if includes:
+            response['included'] = include_related(
+                Transaction, active_transactions, response['active_transactions'], includes
+            )
+        
+        return jsonify(response), 200
         
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
 @transactions_bp.route('/overdue', methods=['GET'])
 @jwt_required()
+@conditional_get(*TRANSACTION_TABLES, time_dependent=True)
 def get_overdue_transactions():
     """Get all overdue transactions"""
     try:
-        now = datetime.utcnow()
-        
-        # Find all transactions that are past their expected return time
-        overdue = Transaction.query.filter(
-            Transaction.check_in_time.is_(None),
-            Transaction.expected_return_time < now
-        ).all()
+        # Transactions flagged past their expected return time by the overdue sweeper
+        query = Transaction.query.filter(Transaction.status == 'overdue')
+        fields = parse_fields(Transaction)
+        includes = parse_includes(Transaction)
+        overdue, pagination = paginate(eager_load(query, Transaction, fields), [Transaction.id])
+        
+        response = {
+            'overdue_transactions': [t.to_dict(fields) for t in overdue],
+            'pagination': pagination
+        }
+        if includes:
+            response['included'] = include_related(
+                Transaction, overdue, response['overdue_transactions'], includes
+            )
         
-        return jsonify({
-            'overdue_transactions': [t.to_dict() for t in overdue]
-        }), 200
+        return jsonify(response), 200
         
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
 @transactions_bp.route('/<transaction_number>', methods=['GET'])
 @jwt_required()
+@conditional_get(*TRANSACTION_TABLES, time_dependent=True)
 def get_transaction(transaction_number):
     """Get details of a specific transaction"""
     try:
+        fields = parse_fields(Transaction)
+        includes = parse_includes(Transaction)
         transaction = Transaction.query.filter_by(
             transaction_number=transaction_number
         ).first_or_404()
+        data = transaction.to_dict(fields)
         
-        return jsonify(transaction.to_dict()), 200
+        if includes:
+            included = include_related(Transaction, [transaction], [data], includes)
+            return jsonify({'transaction': data, 'included': included}), 200
+        return jsonify(data), 200
         
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
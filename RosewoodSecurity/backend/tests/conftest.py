@@ -0,0 +1,83 @@
+import os
+import sys
+
+import pytest
+
+# Point the app at an in-memory database before config is imported
+os.environ['DATABASE_URL'] = 'sqlite://'
+os.environ['FLASK_DEBUG'] = 'False'
+os.environ['OVERDUE_SWEEPER_ENABLED'] = 'False'
+os.environ['REPORT_JOBS_ENABLED'] = 'False'
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from flask_jwt_extended import create_access_token
+
+from app import app as flask_app, db
+from models import User, Employee, Department, Key, AccessCard, Transaction
+from utils.permission_index import permission_index
+
+@pytest.fixture
+def app():
+    """Application with a freshly created schema"""
+    flask_app.config['TESTING'] = True
+    # In-process caches outlive the per-test database
+    permission_index.invalidate()
+    with flask_app.app_context():
+        db.create_all()
+        yield flask_app
+        db.session.remove()
+        db.drop_all()
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
+
+@pytest.fixture
+def admin_user(app):
+    user = User(username='admin', email='admin@rosewood.test', password='password', role='admin')
+    db.session.add(user)
+    db.session.commit()
+    return user
+
+@pytest.fixture
+def auth_headers(admin_user):
+    token = create_access_token(identity=admin_user.id, additional_claims={'role': 'admin'})
+    return {'Authorization': f'Bearer {token}'}
+
+@pytest.fixture
+def department(app):
+    department = Department(name='Housekeeping', description='Housekeeping staff')
+    db.session.add(department)
+    db.session.commit()
+    return department
+
+@pytest.fixture
+def seed(admin_user, department):
+    """Factory that adds n employees, each with a checked out key and card"""
+    # Tests may expunge the session between calls, so keep ids, not instances
+    department_id, admin_user_id = department.id, admin_user.id
+
+    def _seed(n, start=0):
+        department = db.session.get(Department, department_id)
+        for i in range(start, start + n):
+            employee = Employee(
+                employee_number=f'EMP-{i:05d}',
+                first_name='Test',
+                last_name=f'Employee{i}',
+                email=f'employee{i}@rosewood.test',
+                department_id=department_id
+            )
+            key = Key(key_number=f'ROS-KEY-{i:05d}', name=f'Room {i}', location='Main Building')
+            card = AccessCard(card_number=f'ROS-CARD-{i:05d}', card_type='permanent', access_zones=['lobby'])
+            key.authorized_departments.append(department)
+            db.session.add_all([employee, key, card])
+            db.session.flush()
+
+            card.employee_id = employee.id
+            key.status = 'checked_out'
+            db.session.add(Transaction(employee_id=employee.id, created_by=admin_user_id, key_id=key.id))
+            db.session.flush()
+            db.session.add(Transaction(employee_id=employee.id, created_by=admin_user_id, access_card_id=card.id))
+            db.session.flush()
+        db.session.commit()
+    return _seed
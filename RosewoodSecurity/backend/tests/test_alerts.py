@@ -0,0 +1,76 @@
+from datetime import datetime, timedelta
+
+from app import db
+from models import AccessCard, Alert, AlertEvent, Transaction
+from utils.alerts import sync_expiring_card_alerts, sync_overdue_alerts
+
+NOW = datetime(2024, 1, 10, 12, 0)
+
+def _expiring_card(number):
+    card = AccessCard(card_number=number, card_type='temporary', access_zones=['lobby'],
+                      expiry_date=NOW + timedelta(days=3))
+    db.session.add(card)
+    db.session.commit()
+    return card
+
+def _open_alert(card_id):
+    return Alert.query.filter_by(alert_type='expiring_card', subject_id=card_id,
+                                 resolved_at=None).one_or_none()
+
+def test_expiring_card_alerts_resolve_when_expiry_cleared_or_card_deleted(app):
+    cleared = _expiring_card('ROS-CARD-00001')
+    deleted = _expiring_card('ROS-CARD-00002')
+    kept = _expiring_card('ROS-CARD-00003')
+    cleared_id, deleted_id, kept_id = cleared.id, deleted.id, kept.id
+    sync_expiring_card_alerts(now=NOW)
+    assert _open_alert(cleared_id) and _open_alert(deleted_id)
+
+    cleared.expiry_date = None
+    db.session.delete(deleted)
+    db.session.commit()
+
+    changed = sync_expiring_card_alerts(now=NOW)
+
+    assert changed == 2
+    assert _open_alert(cleared_id) is None
+    assert _open_alert(deleted_id) is None
+    assert _open_alert(kept_id) is not None
+
+def test_alert_feed_returns_events_committed_out_of_order(client, auth_headers):
+    alert = Alert(alert_type='overdue', subject_id=1, priority='high', message='Overdue', timestamp=NOW)
+    db.session.add(alert)
+    db.session.add(AlertEvent(id=2, alert=alert, action='raised'))
+    db.session.commit()
+    first = client.get('/dashboard/alerts?since=0', headers=auth_headers)
+    cursor = first.get_json()['last_id']
+
+    # A writer that got ID 1 before ID 2 was assigned commits only now
+    db.session.add(AlertEvent(id=1, alert=alert, action='escalated'))
+    db.session.commit()
+
+    stale = client.get(f'/dashboard/alerts?since={cursor}', headers={
+        **auth_headers, 'If-None-Match': first.headers['ETag']
+    })
+    second = client.get(f'/dashboard/alerts?since={cursor}', headers=auth_headers)
+
+    assert cursor == 2
+    assert stale.status_code == 200
+    body = second.get_json()
+    assert [e['id'] for e in body['events']] == [1, 2]
+    assert body['last_id'] == 2
+
+def test_overdue_sync_records_each_escalation_once(seed):
+    seed(1)
+    transaction = Transaction.query.first()
+    transaction.expected_return_time = NOW
+    transaction.status = 'overdue'
+    db.session.commit()
+
+    assert sync_overdue_alerts() == 1
+    transaction.escalation_level = 1
+    db.session.commit()
+    assert sync_overdue_alerts() == 1
+    # A second sweep of the same tier changes nothing
+    assert sync_overdue_alerts() == 0
+
+    assert [e.action for e in AlertEvent.query.order_by(AlertEvent.id)] == ['raised', 'escalated']
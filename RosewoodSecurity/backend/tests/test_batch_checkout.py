@@ -0,0 +1,84 @@
+from app import db
+from models import Employee, Key, Transaction
+
+def _available_keys(department, n):
+    """Add n available keys the department may check out"""
+    keys = []
+    for i in range(n):
+        key = Key(key_number=f'ROS-KEY-9{i:04d}', name=f'Store {i}', location='Annex')
+        key.authorized_departments.append(department)
+        keys.append(key)
+    db.session.add_all(keys)
+    db.session.commit()
+    return [key.id for key in keys]
+
+def _checkout(client, auth_headers, items, all_or_nothing):
+    employee_id = Employee.query.first().id
+    return client.post('/transactions/checkout/batch', json={
+        'items': items,
+        'employee_id': employee_id,
+        'purpose': 'Deep clean',
+        'all_or_nothing': all_or_nothing
+    }, headers=auth_headers)
+
+def test_partial_batch_checks_out_valid_items_and_reports_bad_ones(client, auth_headers, seed, department):
+    seed(1)
+    key_ids = _available_keys(department, 2)
+    items = [
+        {'key_id': key_ids[0], 'expected_return_hours': 4},
+        {'key_id': [key_ids[1]]},
+        {'key_id': key_ids[1], 'expected_return_hours': 'soon'},
+        {'access_card_id': {'id': 1}},
+        {'key_id': key_ids[1], 'expected_return_hours': 1e12},
+        {'key_id': key_ids[1], 'expected_return_hours': -1}
+    ]
+
+    response = _checkout(client, auth_headers, items, all_or_nothing=False)
+
+    assert response.status_code == 207
+    results = response.get_json()['results']
+    assert results[0]['success'] and results[0]['item_id'] == key_ids[0]
+    assert [r['error'] for r in results[1:]] == [
+        'key_id must be an integer',
+        'expected_return_hours must be a number',
+        'access_card_id must be an integer',
+        'expected_return_hours must be a number',
+        'expected_return_hours must be positive'
+    ]
+    assert Transaction.query.filter_by(key_id=key_ids[0]).one().expected_return_time is not None
+    assert db.session.get(Key, key_ids[1]).status == 'available'
+
+def test_all_or_nothing_batch_aborts_on_a_bad_item(client, auth_headers, seed, department):
+    seed(1)
+    key_ids = _available_keys(department, 2)
+    items = [{'key_id': key_ids[0]}, {'key_id': key_ids[1], 'expected_return_hours': 'later'}]
+
+    response = _checkout(client, auth_headers, items, all_or_nothing=True)
+
+    assert response.status_code == 400
+    assert response.get_json()['results'] == [{
+        'index': 1, 'success': False, 'error': 'expected_return_hours must be a number', 'status': 400
+    }]
+    assert Transaction.query.filter(Transaction.key_id.in_(key_ids)).count() == 0
+
+def test_all_or_nothing_batch_checks_out_every_valid_item(client, auth_headers, seed, department):
+    seed(1)
+    key_ids = _available_keys(department, 3)
+
+    response = _checkout(client, auth_headers, [{'key_id': key_id} for key_id in key_ids],
+                         all_or_nothing=True)
+
+    assert response.status_code == 201
+    assert all(r['success'] for r in response.get_json()['results'])
+    assert {key.status for key in Key.query.filter(Key.id.in_(key_ids))} == {'checked_out'}
+
+def test_batch_checkin_rejects_unhashable_transaction_numbers(client, auth_headers, seed):
+    seed(1)
+    number = Transaction.query.first().transaction_number
+
+    response = client.post('/transactions/checkin/batch', json={
+        'items': [{'transaction_number': number}, {'transaction_number': [number]}]
+    }, headers=auth_headers)
+
+    assert response.status_code == 207
+    assert response.get_json()['results'][1]['error'] == 'Transaction number must be a string'
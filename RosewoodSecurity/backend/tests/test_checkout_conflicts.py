@@ -0,0 +1,29 @@
+from sqlalchemy import text
+
+from app import db
+from models import Key, Transaction
+
+def test_checkout_of_concurrently_changed_key_is_a_conflict(client, auth_headers, seed, department):
+    seed(1)
+    employee_id = Transaction.query.first().employee_id
+    key = Key(key_number='ROS-KEY-RACE', name='Spare', location='Main Building')
+    key.authorized_departments.append(department)
+    db.session.add(key)
+    db.session.commit()
+    key = Key.query.get(key.id)
+    # Another desk updates the row after this session read it
+    db.session.execute(text('UPDATE keys SET version = version + 1 WHERE id = :id'), {'id': key.id})
+
+    response = client.post('/transactions/checkout',
+                           json={'employee_id': employee_id, 'key_id': key.id, 'purpose': 'Cleaning'},
+                           headers=auth_headers)
+
+    assert response.status_code == 409
+    assert Transaction.query.filter_by(key_id=key.id).count() == 0
+
+def test_rows_inserted_outside_the_orm_start_at_version_one(app):
+    db.session.execute(text("INSERT INTO keys (key_number, name, location) VALUES ('ROS-KEY-RAW', 'Raw', 'Annex')"))
+    db.session.execute(text("INSERT INTO access_cards (card_number, card_type) VALUES ('ROS-CARD-RAW', 'visitor')"))
+
+    assert db.session.execute(text('SELECT version FROM keys')).scalar() == 1
+    assert db.session.execute(text('SELECT version FROM access_cards')).scalar() == 1
@@ -0,0 +1,28 @@
+from app import db
+from models import Key
+
+def test_unchanged_resource_is_not_modified(client, auth_headers, seed):
+    seed(2)
+    etag = client.get('/keys/', headers=auth_headers).headers['ETag']
+
+    response = client.get('/keys/', headers={**auth_headers, 'If-None-Match': etag})
+
+    assert response.status_code == 304
+
+def test_delete_invalidates_conditional_get(client, auth_headers, seed):
+    seed(2)
+    spare = Key(key_number='ROS-KEY-SPARE', name='Spare', location='Main Building')
+    db.session.add(spare)
+    db.session.commit()
+    first = client.get('/keys/', headers=auth_headers)
+    db.session.delete(spare)
+    db.session.commit()
+
+    by_etag = client.get('/keys/', headers={**auth_headers, 'If-None-Match': first.headers['ETag']})
+    by_date = client.get('/keys/', headers={**auth_headers,
+                                           'If-Modified-Since': 'Fri, 01 Jan 2100 00:00:00 GMT'})
+
+    assert 'Last-Modified' not in first.headers
+    assert by_etag.status_code == 200
+    assert by_date.status_code == 200
+    assert len(by_etag.get_json()['keys']) == 2
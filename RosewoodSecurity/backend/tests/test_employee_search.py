@@ -0,0 +1,33 @@
+from app import db
+from models import Employee
+
+def test_search_ranks_employee_number_prefix_first(client, auth_headers, seed, department):
+    seed(12)
+    db.session.add(Employee(employee_number='SEC-001', first_name='Emp', last_name='Matcher',
+                            email='emp.matcher@rosewood.test', department_id=department.id))
+    db.session.commit()
+
+    response = client.get('/employees/?search=EMP-0001&fields=employee_number', headers=auth_headers)
+
+    assert response.status_code == 200
+    numbers = [e['employee_number'] for e in response.get_json()['employees']]
+    assert numbers == ['EMP-00010', 'EMP-00011']
+
+def test_search_caps_results_at_the_limit(client, auth_headers, seed):
+    seed(30)
+
+    response = client.get('/employees/?search=employee&limit=5', headers=auth_headers)
+
+    assert response.status_code == 200
+    body = response.get_json()
+    assert len(body['employees']) == 5
+    assert body['pagination']['has_more']
+    assert body['pagination']['next_cursor'] is None
+
+def test_search_escapes_like_wildcards(client, auth_headers, seed):
+    seed(3)
+
+    response = client.get('/employees/?search=%25', headers=auth_headers)
+
+    assert response.status_code == 200
+    assert response.get_json()['employees'] == []
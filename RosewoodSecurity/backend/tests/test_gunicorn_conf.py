@@ -0,0 +1,20 @@
+import os
+import runpy
+
+import psycopg2.extensions
+import pytest
+
+CONF = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'gunicorn.conf.py')
+
+@pytest.fixture
+def wait_callback():
+    yield
+    psycopg2.extensions.set_wait_callback(None)
+
+def test_workers_are_gevent_and_make_psycopg_cooperative(wait_callback):
+    settings = runpy.run_path(CONF)
+
+    settings['post_fork'](server=None, worker=None)
+
+    assert settings['worker_class'] == 'gevent'
+    assert psycopg2.extensions.get_wait_callback() is not None
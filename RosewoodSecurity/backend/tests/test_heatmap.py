@@ -0,0 +1,39 @@
+from datetime import date, datetime, timedelta
+
+from app import db
+from models import UsageRollup
+from routes.dashboard import build_usage_heatmap, get_heatmap_buckets
+
+def test_hourly_heatmap_counts_checkouts_without_date_trunc(app, seed):
+    seed(2)
+
+    heatmap = build_usage_heatmap(days=1, granularity='hour')
+
+    assert len(heatmap['dates']) == 24
+    assert heatmap['departments'] == ['Housekeeping']
+    # Each seeded employee checked out a key and a card
+    assert sum(heatmap['values'][0]) == 4
+
+def test_first_weekly_bucket_starts_with_the_range():
+    wednesday = datetime(2024, 1, 17, 9, 30)
+
+    buckets = get_heatmap_buckets(wednesday, 14, 'week')
+
+    assert buckets == [date(2024, 1, 4), date(2024, 1, 8), date(2024, 1, 15)]
+
+def test_weekly_heatmap_ignores_days_before_the_range(app, department):
+    days = 10
+    start = datetime.utcnow().date() - timedelta(days=days - 1)
+    db.session.add_all([
+        UsageRollup(day=start - timedelta(days=1), department_id=department.id, item_type='key', checkout_count=50),
+        UsageRollup(day=start, department_id=department.id, item_type='key', checkout_count=3),
+        UsageRollup(day=start + timedelta(days=days - 1), department_id=department.id,
+                    item_type='access_card', checkout_count=2)
+    ])
+    db.session.commit()
+
+    heatmap = build_usage_heatmap(days=days, granularity='week')
+
+    assert heatmap['dates'][0] == start.isoformat()
+    assert heatmap['values'][0][0] == 3
+    assert sum(heatmap['values'][0]) == 5
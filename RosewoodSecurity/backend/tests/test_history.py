@@ -0,0 +1,90 @@
+from datetime import datetime, timedelta
+
+from app import db
+from models import Key, Transaction
+from utils.profiling import count_queries
+
+def _add_history(key, employee_id, created_by, days):
+    """Add completed checkouts of a key, one per day ago in days"""
+    for day in days:
+        transaction = Transaction(employee_id=employee_id, created_by=created_by, key_id=key.id)
+        transaction.check_out_time = datetime(2024, 1, 31) - timedelta(days=day)
+        db.session.add(transaction)
+    db.session.commit()
+
+def test_key_history_is_newest_first_and_bounded(client, auth_headers, seed, admin_user):
+    seed(1)
+    key = Key.query.one()
+    employee_id = Transaction.query.first().employee_id
+    Transaction.query.filter_by(key_id=key.id).delete()
+    _add_history(key, employee_id, admin_user.id, range(30))
+
+    response = client.get(f'/keys/{key.id}/history?from=2024-01-10&to=2024-01-19&limit=4',
+                          headers=auth_headers)
+    first = response.get_json()
+    rest = client.get(f"/keys/{key.id}/history?from=2024-01-10&to=2024-01-19&limit=10"
+                      f"&cursor={first['pagination']['next_cursor']}", headers=auth_headers).get_json()
+
+    assert response.status_code == 200
+    times = [t['check_out_time'] for t in first['transactions'] + rest['transactions']]
+    assert times == sorted(times, reverse=True)
+    assert times[0] == '2024-01-19T00:00:00' and times[-1] == '2024-01-10T00:00:00'
+    assert len(times) == 10
+    assert first['transactions'][0]['employee'] == 'Test Employee0'
+
+def test_history_resolves_employees_in_one_query(client, auth_headers, seed, admin_user):
+    seed(3)
+    key = Key.query.first()
+    for employee_id in [t.employee_id for t in Transaction.query.all()]:
+        db.session.add(Transaction(employee_id=employee_id, created_by=admin_user.id, key_id=key.id))
+    db.session.commit()
+    db.session.expire_all()
+
+    with count_queries() as counter:
+        response = client.get(f'/keys/{key.id}/history', headers=auth_headers)
+
+    assert response.status_code == 200
+    assert len(response.get_json()['transactions']) == 7
+    queries_with_three_employees = counter.count
+
+    db.session.expire_all()
+    with count_queries() as counter:
+        client.get(f'/keys/{key.id}/history?limit=1', headers=auth_headers)
+    assert counter.count == queries_with_three_employees
+
+def test_history_rejects_inverted_bounds(client, auth_headers, seed):
+    seed(1)
+    key = Key.query.one()
+
+    response = client.get(f'/keys/{key.id}/history?from=2024-02-01&to=2024-01-01', headers=auth_headers)
+
+    assert response.status_code == 400
+
+def test_history_to_bound_is_inclusive(client, auth_headers, seed, admin_user):
+    seed(1)
+    key = Key.query.one()
+    employee_id = Transaction.query.first().employee_id
+    Transaction.query.filter_by(key_id=key.id).delete()
+    _add_history(key, employee_id, admin_user.id, range(3))
+
+    single_day = client.get(f'/keys/{key.id}/history?from=2024-01-30&to=2024-01-30',
+                            headers=auth_headers).get_json()
+    instant = client.get(f'/keys/{key.id}/history?to=2024-01-30T00:00:00', headers=auth_headers).get_json()
+
+    assert [t['check_out_time'] for t in single_day['transactions']] == ['2024-01-30T00:00:00']
+    assert [t['check_out_time'] for t in instant['transactions']] == ['2024-01-30T00:00:00',
+                                                                      '2024-01-29T00:00:00']
+
+def test_history_converts_offset_bounds_to_utc(client, auth_headers, seed, admin_user):
+    seed(1)
+    key = Key.query.one()
+    employee_id = Transaction.query.first().employee_id
+    Transaction.query.filter_by(key_id=key.id).delete()
+    _add_history(key, employee_id, admin_user.id, range(3))
+
+    response = client.get(f'/keys/{key.id}/history?from=2024-01-29&to=2024-01-30T02:00:00%2B02:00',
+                          headers=auth_headers)
+
+    assert response.status_code == 200
+    assert [t['check_out_time'] for t in response.get_json()['transactions']] == ['2024-01-30T00:00:00',
+                                                                                 '2024-01-29T00:00:00']
@@ -0,0 +1,35 @@
+from app import db
+from models import Employee, Key, Transaction
+
+def test_resolve_finds_each_identifier_type(client, auth_headers, seed):
+    seed(1)
+    transaction = Transaction.query.filter(Transaction.key_id.isnot(None)).one()
+    expected = {
+        'ROS-KEY-00000': {'type': 'keys', 'id': transaction.key_id},
+        'EMP-00000': {'type': 'employees', 'id': transaction.employee_id},
+        transaction.transaction_number: {'type': 'transactions', 'id': transaction.id}
+    }
+
+    responses = {value: client.get(f'/lookup/resolve?identifier={value}', headers=auth_headers)
+                 for value in expected}
+
+    for value, response in responses.items():
+        assert response.status_code == 200
+        assert response.get_json()['matches'] == [expected[value]]
+
+def test_renumbering_and_deleting_keep_the_index_in_sync(client, auth_headers, seed):
+    seed(1)
+    key = Key(key_number='ROS-KEY-SPARE', name='Spare', location='Main Building')
+    db.session.add(key)
+    db.session.commit()
+    Employee.query.one().employee_number = 'EMP-RENAMED'
+    db.session.delete(key)
+    db.session.commit()
+
+    renamed = client.get('/lookup/resolve?identifier=EMP-RENAMED', headers=auth_headers)
+    old_number = client.get('/lookup/resolve?identifier=EMP-00000', headers=auth_headers)
+    deleted = client.get('/lookup/resolve?identifier=ROS-KEY-SPARE', headers=auth_headers)
+
+    assert renamed.status_code == 200
+    assert old_number.status_code == 404
+    assert deleted.status_code == 404
@@ -0,0 +1,44 @@
+from utils.invalidation_bus import InvalidationBus
+
+class FakeCache:
+    def __init__(self):
+        self.invalidations = 0
+        self.version = 1
+
+    def invalidate(self):
+        self.invalidations += 1
+
+    def marker(self):
+        return self.version
+
+def test_dropped_listener_invalidates_immediately(app):
+    bus = InvalidationBus(poll_interval=0)
+    cache = FakeCache()
+    # No marker, so only the disconnect itself can invalidate
+    bus.register('test', cache.invalidate)
+    bus.listening = True
+
+    def drop_connection():
+        bus.stop()
+        raise ConnectionError('server closed the connection')
+    bus._listen = drop_connection
+
+    bus._run(app)
+
+    assert not bus.listening
+    assert cache.invalidations == 1
+
+def test_degraded_polling_invalidates_on_marker_change(app):
+    bus = InvalidationBus()
+    cache = FakeCache()
+    bus.register('test', cache.invalidate, marker=cache.marker)
+    bus.check_versions()
+    invalidations = cache.invalidations
+
+    bus.check_versions()
+    unchanged = cache.invalidations
+    cache.version += 1
+    bus.check_versions()
+
+    assert unchanged == invalidations
+    assert cache.invalidations == invalidations + 1
@@ -0,0 +1,80 @@
+import json
+import os
+
+from utils import live_events as live_events_module
+from utils.invalidation_bus import InvalidationBus
+from utils.live_events import EventBroker, live_events
+
+def test_subscribers_receive_coalesced_batches():
+    broker = EventBroker()
+    subscription = broker.subscribe()
+
+    broker.publish('checkout', {'n': 1}, coalesce_key='stats')
+    broker.publish('checkout', {'n': 2}, coalesce_key='stats')
+    broker.publish('checkin', {'n': 3})
+    batch = subscription.get_batch(timeout=1, window=0.01)
+
+    assert [(event_type, data) for _, event_type, data in batch] == [
+        ('checkout', {'n': 2}),
+        ('checkin', {'n': 3})
+    ]
+
+def test_slow_subscriber_is_flagged_and_unsubscribe_stops_delivery():
+    broker = EventBroker(queue_size=1)
+    slow = broker.subscribe()
+    gone = broker.subscribe()
+    broker.unsubscribe(gone)
+
+    broker.publish('checkout', {})
+    broker.publish('checkout', {})
+
+    assert slow.overflowed
+    assert gone.get_batch(timeout=0, window=0) == []
+
+def test_published_events_are_forwarded_to_other_workers(app, monkeypatch):
+    sent = []
+    monkeypatch.setattr(InvalidationBus, 'enabled', property(lambda self: True))
+    monkeypatch.setattr(live_events_module.invalidation_bus, 'notify',
+                        lambda channel, payload: sent.append((channel, json.loads(payload))))
+
+    live_events.publish('checkout', {'item_id': 1}, coalesce_key=('key', 1))
+    live_events.publish('overdue', {'transaction_ids': list(range(5000))})
+    live_events.publish('checkin', {}, forward=False)
+
+    assert [(channel, message['type'], message['data'], message['key']) for channel, message in sent] == [
+        (live_events_module.EVENTS_CHANNEL, 'checkout', {'item_id': 1}, ['key', 1]),
+        # Too large for a NOTIFY payload
+        (live_events_module.EVENTS_CHANNEL, 'resync', {}, 'resync')
+    ]
+
+def test_events_from_other_workers_reach_local_subscribers(monkeypatch):
+    monkeypatch.setattr(live_events, 'forward', None)
+    subscription = live_events.subscribe()
+    other = json.dumps({'pid': os.getpid() + 1, 'type': 'checkout', 'data': {'item_id': 1}, 'key': ['key', 1]})
+    own = json.dumps({'pid': os.getpid(), 'type': 'checkin', 'data': {}, 'key': None})
+
+    live_events_module._receive(other)
+    live_events_module._receive(own)
+    batch = subscription.get_batch(timeout=1, window=0)
+    live_events.unsubscribe(subscription)
+
+    assert [(event_type, data) for _, event_type, data in batch] == [('checkout', {'item_id': 1})]
+
+def test_stream_frames_events_as_server_sent_events(client, auth_headers, monkeypatch):
+    monkeypatch.setitem(client.application.config, 'LIVE_EVENTS_HEARTBEAT', 1)
+    monkeypatch.setitem(client.application.config, 'LIVE_EVENTS_COALESCE_WINDOW', 0)
+    monkeypatch.setattr(live_events, 'forward', None)
+    response = client.get('/dashboard/stream', headers=auth_headers, buffered=False)
+    chunks = iter(response.response)
+
+    first = next(chunks).decode()
+    event_id = live_events.publish('checkout', {'item_id': 1})
+    frame = next(chunks).decode()
+    heartbeat = next(chunks).decode()
+    response.close()
+
+    assert response.mimetype == 'text/event-stream'
+    assert first == 'retry: 1000\n\n'
+    assert frame == f'id: {event_id}\nevent: checkout\ndata: {{"item_id": 1}}\n\n'
+    assert heartbeat == ': heartbeat\n\n'
+    assert live_events.subscriber_count == 0
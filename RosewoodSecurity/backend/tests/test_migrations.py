@@ -0,0 +1,26 @@
+import re
+
+import pytest
+
+from app import db
+from utils.migrations import get_migration_files, split_statements
+
+def _created_tables():
+    """Map each table a migration creates to its column names"""
+    tables = {}
+    for _, path in get_migration_files():
+        with open(path) as f:
+            for statement in split_statements(f.read()):
+                match = re.match(r'CREATE TABLE IF NOT EXISTS (\w+) \((.*)\)$', statement, re.S)
+                if match:
+                    lines = [line.strip() for line in match.group(2).split(',\n')]
+                    tables[match.group(1)] = {
+                        line.split()[0] for line in lines
+                        if not line.startswith(('PRIMARY KEY', 'UNIQUE', 'CONSTRAINT', 'FOREIGN KEY'))
+                    }
+    return tables
+
+@pytest.mark.parametrize('table', ['identifiers', 'report_jobs', 'transaction_counters', 'usage_rollups',
+                                   'alerts', 'alert_events'])
+def test_new_tables_are_created_by_a_migration(table):
+    assert _created_tables().get(table) == set(db.metadata.tables[table].columns.keys())
@@ -0,0 +1,45 @@
+from datetime import datetime, timedelta
+
+from sqlalchemy import text
+
+from app import db
+from models import Alert, Transaction
+from utils.overdue_sweeper import OverdueSweeper, sweep_overdue
+
+def test_transactions_inserted_outside_the_orm_start_untiered(seed, admin_user):
+    seed(1)
+    employee_id = Transaction.query.first().employee_id
+
+    db.session.execute(text("""
+        INSERT INTO transactions (transaction_number, employee_id, check_out_time, status, created_by)
+        VALUES ('TRX-RAW-1', :employee_id, :now, 'active', :user_id)
+    """), {'employee_id': employee_id, 'now': datetime.utcnow(), 'user_id': admin_user.id})
+
+    assert db.session.execute(text(
+        "SELECT escalation_level FROM transactions WHERE transaction_number = 'TRX-RAW-1'"
+    )).scalar() == 0
+
+def test_sweep_flags_and_tiers_overdue_transactions(seed):
+    seed(1)
+    transaction = Transaction.query.first()
+    transaction.expected_return_time = datetime.utcnow() - timedelta(hours=2)
+    db.session.commit()
+
+    changed = sweep_overdue(tiers=[1, 24])
+
+    assert changed == [transaction.id]
+    assert db.session.get(Transaction, transaction.id).escalation_level == 1
+    assert sweep_overdue(tiers=[1, 24]) == []
+
+def test_sweeper_sweeps_and_raises_alerts_in_one_round(app, seed):
+    seed(1)
+    transaction = Transaction.query.first()
+    transaction.expected_return_time = datetime.utcnow() - timedelta(minutes=5)
+    db.session.commit()
+    transaction_id = transaction.id
+    sweeper = OverdueSweeper(app)
+
+    assert sweeper.run_once() == [transaction_id]
+    assert Alert.query.filter_by(alert_type='overdue', subject_id=transaction_id).count() == 1
+    # SQLite has no advisory locks, so there is no lock connection to hold
+    assert sweeper._lock_connection is None
@@ -0,0 +1,27 @@
+from datetime import datetime
+import base64
+import json
+
+import pytest
+
+from models import Key, Transaction
+from utils.pagination import decode_cursor, encode_cursor
+
+def _cursor(values):
+    return base64.urlsafe_b64encode(json.dumps(values).encode()).decode()
+
+@pytest.mark.parametrize('values', [['abc'], [True], [1.5], [{'id': 1}]])
+def test_cursor_values_of_the_wrong_type_are_rejected(client, auth_headers, values):
+    response = client.get(f'/keys/?cursor={_cursor(values)}', headers=auth_headers)
+
+    assert response.status_code == 400
+
+def test_cursor_round_trips_datetime_and_integer_columns():
+    columns = [Transaction.check_out_time, Transaction.id]
+    cursor = encode_cursor([datetime(2024, 1, 31, 8, 30), 42])
+
+    assert decode_cursor(cursor, columns) == [datetime(2024, 1, 31, 8, 30), 42]
+    with pytest.raises(ValueError):
+        decode_cursor(_cursor(['yesterday', 42]), columns)
+    with pytest.raises(ValueError):
+        decode_cursor(_cursor(['2024-01-31T08:30:00']), [Key.id])
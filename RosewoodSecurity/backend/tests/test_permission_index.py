@@ -0,0 +1,25 @@
+from models import Employee, Key
+from utils.profiling import count_queries
+
+def test_permission_check_does_not_hit_the_database(seed):
+    seed(2)
+    employee = Employee.query.first()
+    key = Key.query.first()
+    employee.can_checkout_key(key.id)
+
+    with count_queries() as counter:
+        allowed = employee.can_checkout_key(key.id)
+
+    assert allowed
+    assert counter.count == 0
+
+def test_revoking_through_update_key_invalidates_the_index(client, auth_headers, seed):
+    seed(1)
+    employee = Employee.query.first()
+    key = Key.query.first()
+    assert employee.can_checkout_key(key.id)
+
+    response = client.put(f'/keys/{key.id}', json={'department_ids': []}, headers=auth_headers)
+
+    assert response.status_code == 200
+    assert not employee.can_checkout_key(key.id)
@@ -0,0 +1,100 @@
+from concurrent.futures import Future
+from concurrent.futures.process import BrokenProcessPool
+from datetime import datetime, timedelta
+import os
+
+import pytest
+
+from app import db
+from models import ReportJob, Transaction
+from utils.report_jobs import report_queue, run_job
+
+@pytest.fixture
+def storage(app, tmp_path, monkeypatch):
+    monkeypatch.setitem(app.config, 'REPORT_STORAGE_DIR', str(tmp_path))
+    return tmp_path
+
+def test_job_renders_and_downloads(client, auth_headers, seed, storage):
+    seed(2)
+    for transaction in Transaction.query.all():
+        transaction.check_out_time = datetime(2024, 3, 5, 8, 0)
+    db.session.commit()
+    created = client.post('/reports/jobs', json={'type': 'daily', 'params': {'date': '2024-03-05'}},
+                          headers=auth_headers)
+    job_id = created.get_json()['job']['id']
+
+    run_job(job_id)
+    status = client.get(f'/reports/jobs/{job_id}', headers=auth_headers)
+    download = client.get(f'/reports/jobs/{job_id}/download', headers=auth_headers)
+
+    assert created.status_code == 202
+    assert created.get_json()['job']['status'] == 'queued'
+    assert status.get_json()['job']['status'] == 'succeeded'
+    assert download.status_code == 200
+    assert 'daily_report_2024-03-05.xlsx' in download.headers['Content-Disposition']
+    assert download.data[:2] == b'PK'
+    assert not [name for name in os.listdir(storage) if name.endswith('.part')]
+
+def test_cancelled_job_is_never_rendered(client, auth_headers, admin_user, storage):
+    job_id = client.post('/reports/jobs', json={'type': 'weekly'}, headers=auth_headers).get_json()['job']['id']
+
+    cancelled = client.post(f'/reports/jobs/{job_id}/cancel', headers=auth_headers)
+    run_job(job_id)
+    download = client.get(f'/reports/jobs/{job_id}/download', headers=auth_headers)
+
+    assert cancelled.status_code == 200
+    assert cancelled.get_json()['job']['status'] == 'cancelled'
+    assert download.status_code == 409
+    assert os.listdir(storage) == []
+
+def test_per_user_limit_and_retention(app, client, auth_headers, admin_user, storage):
+    limit = app.config['REPORT_MAX_ACTIVE_JOBS_PER_USER']
+    for _ in range(limit):
+        client.post('/reports/jobs', json={'type': 'weekly'}, headers=auth_headers)
+
+    refused = client.post('/reports/jobs', json={'type': 'weekly'}, headers=auth_headers)
+    for job in ReportJob.query.all():
+        report_queue.cancel(job)
+    db.session.commit()
+    purged = report_queue.purge_expired(
+        now=datetime.utcnow() + timedelta(hours=app.config['REPORT_JOB_RETENTION_HOURS'], minutes=1)
+    )
+
+    assert refused.status_code == 429
+    assert purged == limit
+
+class FakeExecutor:
+    def __init__(self, broken=False):
+        self.broken = broken
+        self.submitted = []
+
+    def submit(self, fn, *args):
+        if self.broken:
+            raise BrokenProcessPool('A process in the process pool was terminated abruptly')
+        self.submitted.append(args)
+        return Future()
+
+    def shutdown(self, wait=True):
+        pass
+
+def test_broken_pool_is_replaced_without_failing_the_request(app, client, auth_headers, admin_user,
+                                                             storage, monkeypatch):
+    replacement = FakeExecutor()
+    monkeypatch.setitem(app.config, 'REPORT_JOBS_ENABLED', True)
+    monkeypatch.setattr(report_queue, '_executor', FakeExecutor(broken=True))
+    monkeypatch.setattr(report_queue, '_new_executor', lambda: replacement)
+
+    response = client.post('/reports/jobs', json={'type': 'weekly'}, headers=auth_headers)
+
+    assert response.status_code == 202
+    assert replacement.submitted == [(response.get_json()['job']['id'],)]
+
+def test_submit_failure_leaves_the_job_queued(app, client, auth_headers, admin_user, storage, monkeypatch):
+    monkeypatch.setitem(app.config, 'REPORT_JOBS_ENABLED', True)
+    monkeypatch.setattr(report_queue, '_executor', FakeExecutor(broken=True))
+    monkeypatch.setattr(report_queue, '_new_executor', lambda: FakeExecutor(broken=True))
+
+    response = client.post('/reports/jobs', json={'type': 'weekly'}, headers=auth_headers)
+
+    assert response.status_code == 202
+    assert db.session.get(ReportJob, response.get_json()['job']['id']).status == 'queued'
@@ -0,0 +1,26 @@
+from datetime import datetime
+from io import BytesIO
+import zipfile
+
+from app import db
+from models import Transaction
+
+def test_daily_report_streams_the_requested_range(client, auth_headers, seed):
+    seed(3)
+    for day, transaction in zip((1, 15, 31), Transaction.query.filter(Transaction.key_id.isnot(None))):
+        transaction.check_out_time = datetime(2024, 1, day, 9, 30)
+    db.session.commit()
+
+    response = client.get('/reports/daily?from=2024-01-01&to=2024-01-15', headers=auth_headers)
+
+    assert response.status_code == 200
+    assert 'daily_report_2024-01-01_2024-01-15.xlsx' in response.headers['Content-Disposition']
+    sheet = zipfile.ZipFile(BytesIO(response.data)).read('xl/worksheets/sheet1.xml').decode()
+    assert sheet.count('<row>') == 3  # header and two transactions
+    assert '2024-01-15 09:30' in sheet and '2024-01-31' not in sheet
+    assert 'Test Employee0' in sheet and 'Housekeeping' in sheet
+
+def test_daily_report_rejects_oversized_ranges(client, auth_headers):
+    response = client.get('/reports/daily?from=2023-01-01&to=2024-01-01', headers=auth_headers)
+
+    assert response.status_code == 400
@@ -0,0 +1,54 @@
+from app import db
+from models import Key, Transaction
+
+def test_search_matches_across_types(client, auth_headers, seed):
+    seed(2)
+    db.session.add(Key(key_number='ROS-KEY-POOL', name='Pool gate', location='Spa',
+                       description='Opens the rooftop pool gate'))
+    transaction = Transaction.query.first()
+    transaction.notes = 'Returned with a bent rooftop tag'
+    db.session.commit()
+
+    response = client.get('/search/?q=rooftop', headers=auth_headers)
+
+    assert response.status_code == 200
+    results = response.get_json()['results']
+    assert {(r['type'], r['document'].get('key_number') or r['document'].get('transaction_number'))
+            for r in results} == {('keys', 'ROS-KEY-POOL'), ('transactions', transaction.transaction_number)}
+
+def test_search_filters_by_type_and_pages(client, auth_headers, seed):
+    seed(5)
+
+    first = client.get('/search/?q=building&types=keys&limit=3', headers=auth_headers).get_json()
+    second = client.get(f"/search/?q=building&types=keys&limit=3&cursor={first['pagination']['next_cursor']}",
+                        headers=auth_headers).get_json()
+
+    ids = [r['id'] for r in first['results'] + second['results']]
+    assert len(ids) == 5 and len(set(ids)) == 5
+    assert all(r['type'] == 'keys' for r in first['results'] + second['results'])
+    assert not second['pagination']['has_more']
+
+def test_search_rejects_unknown_types(client, auth_headers):
+    response = client.get('/search/?q=pool&types=keys,lockers', headers=auth_headers)
+
+    assert response.status_code == 400
+
+def test_search_ignores_repeated_types(client, auth_headers, seed):
+    seed(2)
+
+    response = client.get('/search/?q=building&types=keys,keys, keys', headers=auth_headers)
+
+    ids = [r['id'] for r in response.get_json()['results']]
+    assert len(ids) == 2 and len(set(ids)) == 2
+
+def test_fallback_search_matches_wildcards_literally(client, auth_headers, seed):
+    seed(1)
+    db.session.add(Key(key_number='ROS-KEY-DISC', name='Discount store', location='Lobby'))
+    db.session.add(Key(key_number='ROS-KEY-SALE', name='Sale 50% off', location='Lobby'))
+    db.session.commit()
+
+    percent = client.get('/search/?q=50%25&types=keys', headers=auth_headers).get_json()
+    underscore = client.get('/search/?q=d_scount&types=keys', headers=auth_headers).get_json()
+
+    assert [r['document']['key_number'] for r in percent['results']] == ['ROS-KEY-SALE']
+    assert underscore['results'] == []
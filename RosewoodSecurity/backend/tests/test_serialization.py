@@ -0,0 +1,60 @@
+import pytest
+
+from app import db
+from utils.profiling import count_queries
+
+LIST_ENDPOINTS = [
+    '/keys/',
+    '/access-cards/',
+    '/employees/',
+    '/transactions/active'
+]
+
+def _query_count(client, url, headers):
+    db.session.expunge_all()
+    with count_queries() as counter:
+        response = client.get(url, headers=headers)
+    assert response.status_code == 200
+    return counter.count
+
+@pytest.mark.parametrize('url', LIST_ENDPOINTS)
+def test_list_query_count_is_independent_of_row_count(client, auth_headers, seed, url):
+    seed(3)
+    small = _query_count(client, url, auth_headers)
+
+    seed(30, start=3)
+    large = _query_count(client, url, auth_headers)
+
+    assert large == small
+
+def test_sparse_fieldset_skips_omitted_relationships(client, auth_headers, seed):
+    seed(3)
+    full = _query_count(client, '/keys/', auth_headers)
+
+    sparse = _query_count(client, '/keys/?fields=key_number', auth_headers)
+    response = client.get('/keys/?fields=key_number', headers=auth_headers)
+
+    assert sparse < full
+    assert all(set(key) == {'id', 'key_number'} for key in response.get_json()['keys'])
+
+def test_unknown_field_is_rejected(client, auth_headers, seed):
+    seed(1)
+
+    response = client.get('/keys/?fields=key_number,secret', headers=auth_headers)
+
+    assert response.status_code == 400
+
+def test_include_side_loads_related_resources_once(client, auth_headers, seed):
+    seed(3)
+    url = '/transactions/active?limit=100&include=employee,key.departments'
+    small = _query_count(client, url, auth_headers)
+    seed(30, start=3)
+
+    large = _query_count(client, url, auth_headers)
+    body = client.get(url, headers=auth_headers).get_json()
+
+    assert large == small
+    types = [resource['type'] for resource in body['included']]
+    assert types.count('employees') == 33
+    assert types.count('departments') == 1
+    assert all('employee' in t['relationships'] for t in body['active_transactions'])
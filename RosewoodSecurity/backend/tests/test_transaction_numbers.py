@@ -0,0 +1,10 @@
+from utils.transaction_numbers import TransactionNumberAllocator
+
+def test_allocators_sharing_a_database_never_repeat_numbers(app):
+    first = TransactionNumberAllocator()
+    second = TransactionNumberAllocator(block_size=5)
+
+    numbers = [first.next_number(), second.next_number(), first.next_number()] + second.reserve(3)
+
+    assert len(set(numbers)) == len(numbers)
+    assert not any(number.endswith('-000') for number in numbers)
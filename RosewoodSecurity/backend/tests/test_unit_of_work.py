@@ -0,0 +1,67 @@
+from app import db
+from models import Key, Transaction
+from utils.profiling import count_commits
+
+def test_checkout_commits_once_plus_number_and_rollup_side_commits(client, auth_headers, seed, department):
+    seed(1)
+    employee_id = Transaction.query.first().employee_id
+    key = Key(key_number='ROS-KEY-FREE', name='Spare', location='Main Building')
+    key.authorized_departments.append(department)
+    db.session.add(key)
+    db.session.commit()
+
+    with count_commits() as counter:
+        response = client.post('/transactions/checkout',
+                               json={'employee_id': employee_id, 'key_id': key.id, 'purpose': 'Cleaning'},
+                               headers=auth_headers)
+
+    assert response.status_code == 201
+    # One commit reserves the transaction number, one commits the request
+    # and one applies its usage rollup increment
+    assert counter.count == 3
+
+def test_checkin_commits_once_plus_rollup(client, auth_headers, seed):
+    seed(1)
+    number = Transaction.query.filter(Transaction.key_id.isnot(None)).first().transaction_number
+
+    with count_commits() as counter:
+        response = client.post('/transactions/checkin', json={'transaction_number': number},
+                               headers=auth_headers)
+
+    assert response.status_code == 200
+    # The request, then one rollup update however many items it checked in
+    assert counter.count == 2
+    db.session.expire_all()
+    assert Transaction.query.filter_by(transaction_number=number).one().status == 'completed'
+
+def test_batch_checkin_commits_once_plus_rollup(client, auth_headers, seed):
+    seed(5)
+    numbers = [t.transaction_number for t in Transaction.query.all()]
+
+    with count_commits() as counter:
+        response = client.post('/transactions/checkin/batch',
+                               json={'items': [{'transaction_number': n} for n in numbers]},
+                               headers=auth_headers)
+
+    assert response.status_code == 200
+    # The request, then one rollup update however many items it checked in
+    assert counter.count == 2
+
+def test_failed_request_commits_nothing(client, auth_headers, seed):
+    seed(1)
+
+    with count_commits() as counter:
+        response = client.post('/transactions/checkin', json={'transaction_number': 'TRX-MISSING'},
+                               headers=auth_headers)
+
+    assert response.status_code == 404
+    assert counter.count == 0
+
+def test_read_only_request_commits_nothing(client, auth_headers, seed):
+    seed(2)
+
+    with count_commits() as counter:
+        response = client.get('/keys/', headers=auth_headers)
+
+    assert response.status_code == 200
+    assert counter.count == 0
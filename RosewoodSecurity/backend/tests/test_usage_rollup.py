@@ -0,0 +1,98 @@
+from datetime import datetime, timedelta
+
+from app import db
+from models import Department, Employee, Transaction, UsageRollup
+
+def _direct_counts():
+    """COUNT(*) over transactions, keyed like the rollup"""
+    counts = {}
+    for column, index in ((Transaction.check_out_time, 0), (Transaction.check_in_time, 1)):
+        rows = db.session.query(
+            column, Employee.department_id, Transaction.key_id
+        ).join(Employee, Transaction.employee_id == Employee.id).filter(column.isnot(None))
+        for when, department_id, key_id in rows:
+            row = counts.setdefault((when.date(), department_id, 'key' if key_id else 'access_card'), [0, 0])
+            row[index] += 1
+    return {key: tuple(row) for key, row in counts.items()}
+
+def _rollup_counts():
+    return {
+        (r.day, r.department_id, r.item_type): (r.checkout_count, r.checkin_count)
+        for r in UsageRollup.query.all()
+    }
+
+def test_checkouts_and_checkins_keep_rollup_equal_to_transactions(client, auth_headers, seed):
+    seed(3)
+    numbers = [t.transaction_number for t in Transaction.query.order_by(Transaction.id).limit(4)]
+
+    for number in numbers:
+        client.post('/transactions/checkin', json={'transaction_number': number}, headers=auth_headers)
+    # Checking in twice must not count twice
+    client.post('/transactions/checkin', json={'transaction_number': numbers[0]}, headers=auth_headers)
+
+    assert _rollup_counts() == _direct_counts()
+    assert sum(checkins for _, checkins in _rollup_counts().values()) == 4
+
+def test_backfill_rebuilds_rollup_equal_to_transactions(app, seed):
+    seed(2)
+    old = Transaction.query.order_by(Transaction.id).all()
+    for days_ago, transaction in enumerate(old, start=3):
+        transaction.check_out_time = datetime.utcnow() - timedelta(days=days_ago)
+        transaction.check_in_time = transaction.check_out_time + timedelta(hours=2)
+    db.session.commit()
+    UsageRollup.query.delete()
+    db.session.commit()
+
+    rows = UsageRollup.backfill()
+
+    assert rows == len(_direct_counts())
+    assert _rollup_counts() == _direct_counts()
+
+def test_partial_backfill_only_rewrites_recent_days(app, seed):
+    seed(2)
+    transaction = Transaction.query.order_by(Transaction.id).first()
+    transaction.check_out_time = datetime.utcnow() - timedelta(days=10)
+    db.session.commit()
+    expected = _direct_counts()
+    # Drift the recent rows only
+    UsageRollup.query.filter(UsageRollup.day >= datetime.utcnow().date()).update(
+        {'checkout_count': UsageRollup.checkout_count + 5}, synchronize_session=False
+    )
+    db.session.commit()
+
+    UsageRollup.backfill(days=2)
+
+    today = datetime.utcnow().date()
+    rollup = _rollup_counts()
+    assert {k: v for k, v in rollup.items() if k[0] >= today} == {k: v for k, v in expected.items() if k[0] >= today}
+    # Older days are left alone, so the moved checkout is still missing there
+    assert not [k for k in rollup if k[0] < today]
+
+def test_rollup_is_updated_only_after_the_checkout_commits(app, seed, admin_user):
+    seed(1)
+    employee_id = Transaction.query.first().employee_id
+    before = _rollup_counts()
+
+    db.session.add(Transaction(employee_id=employee_id, created_by=admin_user.id, key_id=1))
+    db.session.flush()
+    flushed = _rollup_counts()
+    db.session.rollback()
+
+    assert flushed == before
+    assert _rollup_counts() == before == _direct_counts()
+
+def test_backfill_counts_history_under_the_current_department(app, seed):
+    seed(1)
+    employee = Employee.query.one()
+    old_department_id = employee.department_id
+    transfer = Department(name='Front desk')
+    db.session.add(transfer)
+    db.session.flush()
+    employee.department_id = transfer.id
+    db.session.commit()
+    live = {key[1] for key in _rollup_counts()}
+
+    UsageRollup.backfill()
+
+    assert live == {old_department_id}
+    assert {key[1] for key in _rollup_counts()} == {transfer.id}
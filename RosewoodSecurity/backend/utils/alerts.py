@@ -0,0 +1,168 @@
+"""
+Maintenance of the persistent alert feed.
+
+Alerts are raised, escalated and resolved here by the periodic sweep, and
+every change appends an AlertEvent. Overdue alerts are also resolved the
+moment their transaction is checked in, lost or extended (see
+models/alert.py), so clients polling /dashboard/alerts?since=<id> see
+them promptly.
+"""
+from datetime import datetime, timedelta
+from sqlalchemy import and_, or_, text
+import logging
+
+from app import db
+from models.alert import Alert
+from models.access_card import AccessCard
+from models.employee import Employee
+from models.key import Key
+from models.transaction import Transaction
+from utils.live_events import live_events
+
+logger = logging.getLogger(__name__)
+
+EXPIRING_CARD_WINDOW = timedelta(days=7)
+
+# Lets one worker at a time sync alerts; the others skip rather than raise
+# the same alert or record the same escalation twice (held until the
+# syncing transaction ends)
+_SYNC_LOCK_SQL = text('SELECT pg_try_advisory_xact_lock(:key)')
+_SYNC_LOCK_KEY = 0x416c7274  # 'Alrt'
+
+def _try_sync_lock():
+    """Take the sync lock for the current transaction; False if another worker holds it"""
+    if db.engine.dialect.name != 'postgresql':
+        return True
+    if db.session.execute(_SYNC_LOCK_SQL, {'key': _SYNC_LOCK_KEY}).scalar():
+        return True
+    db.session.rollback()
+    return False
+
+def sync_overdue_alerts():
+    """
+    Raise or escalate alerts for overdue transactions
+
+    Returns:
+        int: Number of alerts raised or escalated
+    """
+    if not _try_sync_lock():
+        return 0
+    rows = db.session.query(
+        Transaction.id,
+        Transaction.key_id,
+        Transaction.expected_return_time,
+        Transaction.escalation_level,
+        Employee.first_name,
+        Employee.last_name,
+        Key.key_number,
+        AccessCard.card_number,
+        Alert
+    ).join(
+        Employee, Transaction.employee_id == Employee.id
+    ).outerjoin(
+        Key, Transaction.key_id == Key.id
+    ).outerjoin(
+        AccessCard, Transaction.access_card_id == AccessCard.id
+    ).outerjoin(
+        Alert, and_(Alert.alert_type == 'overdue', Alert.subject_id == Transaction.id)
+    ).filter(
+        Transaction.status == 'overdue',
+        or_(
+            Alert.id.is_(None),
+            Alert.resolved_at.isnot(None),
+            Alert.escalation_level < Transaction.escalation_level
+        )
+    ).all()
+
+    for row in rows:
+        alert = row.Alert
+        message = (f"Overdue {row.key_number if row.key_id else row.card_number} "
+                   f"checked out by {row.first_name} {row.last_name}")
+        if alert is None:
+            alert = Alert(alert_type='overdue', subject_id=row.id, priority='high')
+            db.session.add(alert)
+            action = 'raised'
+        elif alert.resolved_at:
+            alert.resolved_at = None
+            alert.raised_at = datetime.utcnow()
+            action = 'raised'
+        else:
+            action = 'escalated'
+
+        alert.escalation_level = row.escalation_level
+        alert.message = message
+        alert.timestamp = row.expected_return_time
+        alert.record(action)
+
+    db.session.commit()
+    return len(rows)
+
+def sync_expiring_card_alerts(now=None):
+    """
+    Raise alerts for cards entering the expiry window and resolve
+    alerts for cards that have left it (extended, expired or deactivated)
+
+    Returns:
+        int: Number of alerts raised or resolved
+    """
+    if not _try_sync_lock():
+        return 0
+    now = now or datetime.utcnow()
+    soon = now + EXPIRING_CARD_WINDOW
+    in_window = and_(
+        AccessCard.status == 'active',
+        AccessCard.expiry_date.between(now, soon)
+    )
+
+    entering = db.session.query(AccessCard, Alert).outerjoin(
+        Alert, and_(Alert.alert_type == 'expiring_card', Alert.subject_id == AccessCard.id)
+    ).filter(
+        in_window,
+        or_(Alert.id.is_(None), Alert.resolved_at.isnot(None))
+    ).all()
+
+    for card, alert in entering:
+        if alert is None:
+            alert = Alert(alert_type='expiring_card', subject_id=card.id, priority='medium')
+            db.session.add(alert)
+        else:
+            alert.resolved_at = None
+            alert.raised_at = now
+        alert.message = (f"Access card {card.card_number} will expire on "
+                         f"{card.expiry_date.strftime('%Y-%m-%d')}")
+        alert.timestamp = card.expiry_date
+        alert.record('raised')
+
+    # A deleted card or a cleared expiry date also leaves the window (and
+    # ~in_window alone is NULL, not true, for a NULL expiry date)
+    leaving = db.session.query(Alert).outerjoin(
+        AccessCard, AccessCard.id == Alert.subject_id
+    ).filter(
+        Alert.alert_type == 'expiring_card',
+        Alert.resolved_at.is_(None),
+        or_(AccessCard.id.is_(None), AccessCard.expiry_date.is_(None), ~in_window)
+    ).all()
+
+    for alert in leaving:
+        alert.resolved_at = now
+        alert.record('resolved')
+
+    # Build payloads before the commit expires the loaded cards
+    expiring = [{
+        'access_card_id': card.id,
+        'card_number': card.card_number,
+        'expiry_date': card.expiry_date.isoformat()
+    } for card, alert in entering]
+
+    db.session.commit()
+
+    for data in expiring:
+        live_events.publish('card_expiry', data)
+    return len(entering) + len(leaving)
+
+def refresh_alerts():
+    """Bring every alert type up to date; run after each overdue sweep"""
+    changed = sync_overdue_alerts() + sync_expiring_card_alerts()
+    if changed:
+        logger.info(f"Alert sync recorded {changed} changes")
+    return changed
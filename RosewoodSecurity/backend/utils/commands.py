@@ -0,0 +1,91 @@
+import click
+
+def register_commands(app):
+    """Register maintenance commands on the Flask CLI"""
+
+    @app.cli.command('sync-transaction-counters')
+    def sync_transaction_counters():
+        """Align today's transaction counter with existing transaction numbers"""
+        from utils.transaction_numbers import transaction_numbers
+
+        highest = transaction_numbers.sync_with_existing()
+        click.echo(f"Transaction counter synced at {highest}")
+
+    @app.cli.command('migrate')
+    def migrate():
+        """Apply pending versioned SQL migrations"""
+        from utils.migrations import apply_migrations
+
+        applied = apply_migrations()
+        if applied:
+            for version in applied:
+                click.echo(f"Applied {version}")
+        else:
+            click.echo("Database is up to date")
+
+    @app.cli.command('check-query-plans')
+    @click.option('--rows', default=100000, show_default=True,
+                  help='Synthetic transactions to seed (rolled back afterwards)')
+    @click.option('--no-seed', is_flag=True, help='Check against the existing data instead')
+    def check_query_plans(rows, no_seed):
+        """EXPLAIN the transaction hot paths and fail on sequential scans"""
+        from utils.query_plans import check_query_plans as run_check
+
+        results = run_check(rows=rows, seed=not no_seed)
+        failed = False
+        for name, seq_scans in results.items():
+            if seq_scans:
+                failed = True
+                click.echo(f"FAIL {name}: sequential scan on transactions")
+            else:
+                click.echo(f"ok   {name}")
+
+        if failed:
+            raise SystemExit(1)
+
+    @app.cli.command('backfill-usage-rollup')
+    @click.option('--days', type=int, default=None,
+                  help='Only rebuild the last N days (default: everything)')
+    def backfill_usage_rollup(days):
+        """Rebuild the daily usage rollup from the transactions table (under current departments)"""
+        from models.usage_rollup import UsageRollup
+
+        rows = UsageRollup.backfill(days=days)
+        click.echo(f"Wrote {rows} rollup rows")
+
+    @app.cli.command('sweep-overdue')
+    def sweep_overdue():
+        """Flag overdue transactions, raise escalation tiers and sync alerts once"""
+        from utils.overdue_sweeper import sweep_overdue as run_sweep
+        from utils.alerts import refresh_alerts
+
+        changed = run_sweep()
+        alerts = refresh_alerts()
+        click.echo(f"Updated {len(changed)} transactions and {alerts} alerts")
+
+    @app.cli.command('stress-checkout')
+    @click.option('--workers', default=16, show_default=True, help='Concurrent checkout threads')
+    @click.option('--rounds', default=10, show_default=True, help='Races to run')
+    def stress_checkout(workers, rounds):
+        """Race concurrent checkouts and fail on double checkouts or unexpected errors"""
+        from utils.contention import run_checkout_stress
+
+        results = run_checkout_stress(workers=workers, rounds=rounds)
+        click.echo(f"Contested key:    {results['contested']}")
+        click.echo(f"Independent keys: {results['independent']}")
+        click.echo(f"Slowest independent checkout: {results['slowest_independent']:.3f}s")
+        for error in results['errors']:
+            click.echo(f"FAIL {error}")
+
+        if results['errors']:
+            raise SystemExit(1)
+
+    @app.cli.command('purge-report-jobs')
+    def purge_report_jobs():
+        """Delete expired report jobs and their files, and fail timed-out jobs"""
+        from app import db
+        from utils.report_jobs import report_queue
+
+        deleted = report_queue.purge_expired()
+        db.session.commit()
+        click.echo(f"Purged {deleted} report jobs")
@@ -0,0 +1,85 @@
+"""
+Conditional GET (ETag) for the resource endpoints.
+
+A response's version marker is the row count and max(updated_at) of every
+table its payload is built from, fetched in one round trip of aggregate
+subqueries. The strong ETag hashes that marker with the request path and
+query string. A matching If-None-Match is answered with 304 before the
+view runs, so no ORM objects are loaded.
+
+No Last-Modified is sent: deleting a row lowers a count but never moves
+max(updated_at), so an If-Modified-Since check would answer a stale 304.
+
+Payloads with clock-derived fields (duration, is_overdue, is_expired) also
+fold a time bucket into the ETag, so those fields lag by at most
+CONDITIONAL_GET_TIME_BUCKET seconds.
+"""
+from functools import wraps
+from flask import request, current_app, make_response
+from sqlalchemy import func, select
+from werkzeug.http import is_resource_modified
+import hashlib
+import time
+
+from app import db
+
+# Tables whose rows are never deleted; new rows already move
+# max(updated_at), so the full-table count is skipped
+APPEND_ONLY_TABLES = {'transactions'}
+
+def get_version_marker(models):
+    """
+    Get the version marker for a set of tables
+
+    Args:
+        models (iterable): Model classes the payload is built from
+
+    Returns:
+        tuple: The marker values
+    """
+    columns = []
+    for model in models:
+        if model.__tablename__ not in APPEND_ONLY_TABLES:
+            columns.append(select(func.count()).select_from(model.__table__).scalar_subquery())
+        columns.append(select(func.max(model.updated_at)).scalar_subquery())
+
+    return tuple(db.session.execute(select(*columns)).one())
+
+def make_etag(marker, bucket=None):
+    """Hash a version marker with the request path and query string"""
+    args = sorted(request.args.items(multi=True))
+    raw = f"{request.path}|{args}|{marker}|{bucket}"
+    return hashlib.sha1(raw.encode()).hexdigest()
+
+def conditional_get(*models, time_dependent=False):
+    """
+    Decorator for GET routes whose payload depends only on `models`
+
+    Args:
+        models: Model classes the response is built from, including
+                those reached through relationships in to_dict()
+        time_dependent (bool): The payload includes fields derived from
+                               the current time
+    """
+    def decorator(f):
+        @wraps(f)
+        def decorated_function(*args, **kwargs):
+            marker = get_version_marker(models)
+
+            bucket = None
+            if time_dependent:
+                bucket = int(time.time() // current_app.config['CONDITIONAL_GET_TIME_BUCKET'])
+
+            etag = make_etag(marker, bucket)
+            if not is_resource_modified(request.environ, etag=etag):
+                response = current_app.response_class(status=304)
+            else:
+                response = make_response(f(*args, **kwargs))
+                if response.status_code != 200:
+                    return response
+
+            response.set_etag(etag)
+            response.headers['Cache-Control'] = 'no-cache'
+            return response
+        return decorated_function
+    return decorator
@@ -0,0 +1,185 @@
+"""
+Concurrency stress test for checkout (flask stress-checkout).
+
+Runs real HTTP-stack checkouts from many threads against the configured
+database. Each round has every worker race for one shared key, which must
+produce exactly one checkout and clean 409/400 refusals for the rest,
+and then has every worker check out its own key for its own employee,
+all in one department, which must all succeed without conflicts. After
+each round the department's usage rollup must match its transactions,
+and the slowest independent checkout is reported: checkouts that share
+only a department's rollup counter should not queue behind each other.
+Threads are released together by a barrier. The fixture rows it creates
+are deleted afterwards.
+
+It needs a database with real row-level concurrency (PostgreSQL); an
+in-memory SQLite database gives each thread its own empty database.
+"""
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from flask_jwt_extended import create_access_token
+import threading
+import time
+import uuid
+
+from app import app, db
+from models.user import User
+from models.department import Department, department_key_permissions
+from models.employee import Employee
+from models.key import Key
+from models.transaction import Transaction
+from models.usage_rollup import UsageRollup
+from models.identifier import Identifier
+
+def _create_fixture(workers):
+    """Create a department, a user, and workers employees and workers + 1 keys"""
+    tag = uuid.uuid4().hex[:8]
+    user = User(username=f'stress-{tag}', email=f'stress-{tag}@invalid', password=uuid.uuid4().hex)
+    department = Department(name=f'stress-{tag}')
+    db.session.add_all([user, department])
+    db.session.flush()
+
+    employees = [Employee(
+        employee_number=f'ST-{tag}-{i}',
+        first_name='Stress',
+        last_name=f'Test {i}',
+        email=f'stress-{tag}-{i}@invalid',
+        department_id=department.id
+    ) for i in range(workers)]
+    keys = [Key(key_number=f'ST-{tag}-{i}', name=f'Stress {i}', location='Stress test')
+            for i in range(workers + 1)]
+    for key in keys:
+        key.authorized_departments.append(department)
+    db.session.add_all(employees)
+    db.session.add_all(keys)
+    db.session.commit()
+    return user.id, department.id, [employee.id for employee in employees], [key.id for key in keys]
+
+def _remove_fixture(user_id, department_id, employee_ids, key_ids):
+    # Bulk deletes skip the identifier hooks
+    transaction_ids = [id for (id,) in db.session.query(Transaction.id).filter(
+        Transaction.employee_id.in_(employee_ids)
+    )]
+    for entity_type, ids in (('transactions', transaction_ids), ('keys', key_ids), ('employees', employee_ids)):
+        Identifier.query.filter(
+            Identifier.entity_type == entity_type, Identifier.entity_id.in_(ids)
+        ).delete(synchronize_session=False)
+    Transaction.query.filter(Transaction.employee_id.in_(employee_ids)).delete(synchronize_session=False)
+    UsageRollup.query.filter(UsageRollup.department_id == department_id).delete(synchronize_session=False)
+    db.session.execute(department_key_permissions.delete().where(
+        department_key_permissions.c.department_id == department_id
+    ))
+    Key.query.filter(Key.id.in_(key_ids)).delete(synchronize_session=False)
+    Employee.query.filter(Employee.id.in_(employee_ids)).delete(synchronize_session=False)
+    Department.query.filter(Department.id == department_id).delete(synchronize_session=False)
+    User.query.filter(User.id == user_id).delete(synchronize_session=False)
+    db.session.commit()
+
+def _race(workers, requests):
+    """
+    Run one request per worker, all released at the same moment
+
+    Returns:
+        list: (status code, seconds taken) per request
+    """
+    barrier = threading.Barrier(workers)
+
+    def run(payload):
+        client = app.test_client()
+        barrier.wait()
+        started = time.monotonic()
+        response = client.post(payload['url'], json=payload['json'], headers=payload['headers'])
+        return response.status_code, time.monotonic() - started
+
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        return list(pool.map(run, requests))
+
+def _rollup_mismatch(department_id, employee_ids):
+    """Compare the department's rollup totals with its transactions"""
+    rollup = db.session.query(
+        db.func.coalesce(db.func.sum(UsageRollup.checkout_count), 0),
+        db.func.coalesce(db.func.sum(UsageRollup.checkin_count), 0)
+    ).filter(UsageRollup.department_id == department_id).one()
+    actual = db.session.query(
+        db.func.count(Transaction.id),
+        db.func.count(Transaction.check_in_time)
+    ).filter(Transaction.employee_id.in_(employee_ids)).one()
+    if tuple(rollup) != tuple(actual):
+        return f"rollup (checkouts, checkins) {tuple(rollup)} != transactions {tuple(actual)}"
+    return None
+
+def run_checkout_stress(workers=16, rounds=10):
+    """
+    Race checkouts and verify the outcome of every round
+
+    Returns:
+        dict: 'contested' and 'independent' status code counts,
+              'slowest_independent', the longest independent checkout in
+              seconds, and 'errors', a list of invariant violations
+              (empty on success)
+    """
+    user_id, department_id, employee_ids, key_ids = _create_fixture(workers)
+    shared_key, own_keys = key_ids[0], key_ids[1:]
+    headers = {'Authorization': 'Bearer ' + create_access_token(
+        identity=user_id, additional_claims={'role': 'security_staff'}
+    )}
+    contested, independent, errors = Counter(), Counter(), []
+    slowest = 0.0
+
+    def checkout(employee_id, key_id):
+        return {
+            'url': '/transactions/checkout',
+            'json': {'employee_id': employee_id, 'key_id': key_id, 'purpose': 'Stress test'},
+            'headers': headers
+        }
+
+    try:
+        for round_number in range(1, rounds + 1):
+            statuses = [status for status, _ in _race(workers, [
+                checkout(employee_id, shared_key) for employee_id in employee_ids
+            ])]
+            contested.update(statuses)
+            if statuses.count(201) != 1 or any(s not in (201, 400, 409) for s in statuses):
+                errors.append(f"round {round_number}: contested key statuses {sorted(statuses)}")
+
+            # Different items and employees, one department (so one rollup row)
+            results = _race(workers, [checkout(employee_id, key_id)
+                                      for employee_id, key_id in zip(employee_ids, own_keys)])
+            statuses = [status for status, _ in results]
+            slowest = max([slowest] + [seconds for _, seconds in results])
+            independent.update(statuses)
+            if any(s != 201 for s in statuses):
+                errors.append(f"round {round_number}: independent key statuses {sorted(statuses)}")
+
+            open_counts = db.session.query(Transaction.key_id, db.func.count()).filter(
+                Transaction.key_id.in_(key_ids),
+                Transaction.check_in_time.is_(None)
+            ).group_by(Transaction.key_id).all()
+            doubled = [key_id for key_id, count in open_counts if count > 1]
+            if doubled:
+                errors.append(f"round {round_number}: keys checked out twice: {doubled}")
+
+            # Return everything for the next round
+            numbers = [number for (number,) in db.session.query(Transaction.transaction_number).filter(
+                Transaction.key_id.in_(key_ids),
+                Transaction.check_in_time.is_(None)
+            )]
+            db.session.commit()
+            app.test_client().post('/transactions/checkin/batch',
+                                   json={'items': [{'transaction_number': n} for n in numbers]},
+                                   headers=headers)
+
+            mismatch = _rollup_mismatch(department_id, employee_ids)
+            db.session.commit()
+            if mismatch:
+                errors.append(f"round {round_number}: {mismatch}")
+    finally:
+        db.session.rollback()
+        _remove_fixture(user_id, department_id, employee_ids, key_ids)
+
+    return {
+        'contested': dict(contested),
+        'independent': dict(independent),
+        'slowest_independent': slowest,
+        'errors': errors
+    }
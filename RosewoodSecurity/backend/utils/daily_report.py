@@ -0,0 +1,122 @@
+"""
+Rows and date ranges for the daily transaction export (/reports/daily).
+
+Rows come from one joined query over transactions, employees,
+departments, keys and access cards, read through a server-side cursor
+(yield_per) in check-out order. Nothing is lazy-loaded per row and the
+rows are never all in memory at once, so a month-long export costs the
+same memory as a single day.
+"""
+from flask import request, current_app
+from datetime import date, datetime, timedelta
+
+from app import db
+from models.transaction import Transaction
+from models.employee import Employee
+from models.department import Department
+from models.key import Key
+from models.access_card import AccessCard
+
+HEADER = ['Transaction Number', 'Employee', 'Department', 'Item Type', 'Item ID',
+          'Check Out Time', 'Check In Time', 'Status']
+
+def _parse_date(args, name):
+    value = args.get(name)
+    if not value:
+        return None
+    try:
+        return date.fromisoformat(value)
+    except (TypeError, ValueError):
+        raise ValueError(f"'{name}' must be a date (YYYY-MM-DD)")
+
+def get_report_range(args=None):
+    """
+    Get the inclusive (first day, last day) range requested
+
+    Either 'date' for one day or 'from' and 'to' for a range; defaults to
+    yesterday. Both 'from' and 'to' are included, as in item history
+    (utils/history.py), so from=2024-01-01&to=2024-01-31 is all of
+    January. Ranges are capped at REPORT_MAX_DAYS.
+
+    Args:
+        args (dict): Parameters to read; defaults to the query string
+
+    Raises:
+        ValueError: If the dates are malformed, inverted or too far apart
+    """
+    args = request.args if args is None else args
+    day = _parse_date(args, 'date')
+    first, last = _parse_date(args, 'from'), _parse_date(args, 'to')
+    if day and (first or last):
+        raise ValueError("Use either 'date' or 'from'/'to', not both")
+
+    if day:
+        first = last = day
+    elif first or last:
+        first = first or last
+        last = last or datetime.utcnow().date()
+    else:
+        first = last = datetime.utcnow().date() - timedelta(days=1)
+
+    if first > last:
+        raise ValueError("'from' must not be after 'to'")
+    max_days = current_app.config['REPORT_MAX_DAYS']
+    if (last - first).days + 1 > max_days:
+        raise ValueError(f'Report range must not exceed {max_days} days')
+    return first, last
+
+def iter_rows(first, last, batch_size=1000):
+    """
+    Yield report rows for transactions checked out between two days inclusive
+
+    Args:
+        first (date): First day of the report
+        last (date): Last day of the report
+        batch_size (int): Rows fetched per round trip from the cursor
+    """
+    start = datetime.combine(first, datetime.min.time())
+    end = datetime.combine(last + timedelta(days=1), datetime.min.time())
+
+    query = db.session.query(
+        Transaction.transaction_number,
+        Employee.first_name,
+        Employee.last_name,
+        Department.name,
+        Transaction.key_id,
+        Key.key_number,
+        AccessCard.card_number,
+        Transaction.check_out_time,
+        Transaction.check_in_time,
+        Transaction.status
+    ).join(
+        Employee, Transaction.employee_id == Employee.id
+    ).join(
+        Department, Employee.department_id == Department.id
+    ).outerjoin(
+        Key, Transaction.key_id == Key.id
+    ).outerjoin(
+        AccessCard, Transaction.access_card_id == AccessCard.id
+    ).filter(
+        Transaction.check_out_time >= start,
+        Transaction.check_out_time < end
+    ).order_by(
+        Transaction.check_out_time, Transaction.id
+    ).yield_per(batch_size)
+
+    for (number, first_name, last_name, department, key_id, key_number, card_number,
+         check_out_time, check_in_time, status) in query:
+        yield [
+            number,
+            f"{first_name} {last_name}",
+            department,
+            'Key' if key_id else 'Access Card',
+            key_number if key_id else card_number,
+            check_out_time.strftime('%Y-%m-%d %H:%M'),
+            check_in_time.strftime('%Y-%m-%d %H:%M') if check_in_time else 'Not Checked In',
+            status
+        ]
+
+def get_filename(first, last):
+    if first == last:
+        return f'daily_report_{first.isoformat()}.xlsx'
+    return f'daily_report_{first.isoformat()}_{last.isoformat()}.xlsx'
@@ -0,0 +1,115 @@
+"""
+Materialized dashboard snapshots.
+
+Dashboard endpoints are polled by every guard station, so their JSON
+bodies are built once and served from memory until a write invalidates
+them. Any committed change to keys, cards, employees, departments or
+transactions bumps the cache version; snapshots built under an older
+version are rebuilt on the next read. Time-based fields such as hours
+overdue drift without any write, so snapshots also expire after a bounded
+staleness window.
+"""
+from flask import current_app, json
+from sqlalchemy import event
+import threading
+import time
+
+from app import db
+from config import Config
+from utils.invalidation_bus import invalidation_bus
+
+class Snapshot:
+    """A serialized dashboard payload and the cache version it was built at"""
+
+    def __init__(self, body, version, built_at):
+        self.body = body
+        self.version = version
+        self.built_at = built_at
+
+class DashboardSnapshotCache:
+    """In-process cache of serialized dashboard responses"""
+
+    def __init__(self, max_age=30):
+        self.max_age = max_age
+        self.version = 1
+        self._snapshots = {}
+        self._lock = threading.Lock()
+
+    def get(self, key, builder):
+        """
+        Get the snapshot for a key, rebuilding it if stale
+
+        Args:
+            key: Hashable cache key, e.g. ('heatmap', 7)
+            builder (callable): Returns the payload dict for this key
+
+        Returns:
+            Snapshot: The current snapshot
+        """
+        snapshot = self._snapshots.get(key)
+        if self._is_fresh(snapshot):
+            return snapshot
+
+        with self._lock:
+            # Another request may have rebuilt it while we waited
+            snapshot = self._snapshots.get(key)
+            if self._is_fresh(snapshot):
+                return snapshot
+
+            version = self.version
+            payload = builder()
+            if isinstance(payload, dict):
+                payload = {**payload, 'version': version}
+            body = json.dumps(payload)
+            snapshot = Snapshot(body, version, time.monotonic())
+            self._snapshots[key] = snapshot
+            return snapshot
+
+    def _is_fresh(self, snapshot):
+        return (
+            snapshot is not None
+            and snapshot.version == self.version
+            and time.monotonic() - snapshot.built_at < self.max_age
+        )
+
+    def invalidate(self):
+        """Invalidate every snapshot; they are rebuilt lazily on the next read"""
+        self.version += 1
+
+    def response(self, key, builder):
+        """Serve a snapshot as a JSON response"""
+        snapshot = self.get(key, builder)
+        response = current_app.response_class(snapshot.body, mimetype='application/json')
+        response.headers['X-Dashboard-Version'] = str(snapshot.version)
+        return response
+
+# Create a singleton instance
+dashboard_cache = DashboardSnapshotCache(max_age=Config.DASHBOARD_SNAPSHOT_MAX_AGE)
+
+# Models whose changes affect dashboard figures
+_TRACKED_TABLES = {'keys', 'access_cards', 'employees', 'departments', 'transactions'}
+
+@event.listens_for(db.session, 'after_flush')
+def _track_dashboard_changes(session, flush_context):
+    """Flag the session if a flush touched any table the dashboard reads"""
+    for obj in list(session.new) + list(session.dirty) + list(session.deleted):
+        if getattr(obj, '__tablename__', None) in _TRACKED_TABLES:
+            session.info['dashboard_dirty'] = True
+            return
+
+@event.listens_for(db.session, 'after_commit')
+def _invalidate_on_commit(session):
+    if session.info.pop('dashboard_dirty', False):
+        dashboard_cache.invalidate()
+
+@event.listens_for(db.session, 'after_rollback')
+def _discard_on_rollback(session):
+    session.info.pop('dashboard_dirty', None)
+
+def _dashboard_version_marker():
+    from models import Key, AccessCard, Employee, Department, Transaction
+    from utils.conditional import get_version_marker
+    return get_version_marker((Key, AccessCard, Employee, Department, Transaction))
+
+invalidation_bus.register('dashboard', dashboard_cache.invalidate,
+                          marker=_dashboard_version_marker, flag='dashboard_dirty')
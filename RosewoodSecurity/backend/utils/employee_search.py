@@ -0,0 +1,89 @@
+"""
+Ranked type-ahead search over employees (GET /employees/?search=).
+
+Terms are matched against employee numbers by prefix and against
+"first last email" by substring, plus typo-tolerant trigram word
+similarity on PostgreSQL. Every predicate is backed by an index from
+migration 0005: text_pattern_ops btrees for the prefixes and a pg_trgm
+GIN index for the substring and similarity matches, so a keystroke costs
+an index probe instead of a scan of the employees table. Terms shorter
+than a trigram only use the prefix indexes.
+
+Results are ranked (exact employee number, number prefix, name prefix,
+substring, then similarity) and capped at a limit rather than paged.
+"""
+from flask import request, current_app
+from sqlalchemy import case, func, literal, literal_column, or_
+
+from app import db
+from models.employee import Employee
+
+# pg_trgm cannot use its index for terms shorter than one trigram
+MIN_TRIGRAM_LENGTH = 3
+
+def escape_like(term):
+    return term.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_')
+
+def _search_text():
+    # Must match the ix_employees_search_trgm index expression
+    space = literal_column("' '")
+    return func.lower(Employee.first_name + space + Employee.last_name + space + Employee.email)
+
+def get_search_limit():
+    """Get the requested result limit, clamped to the configured maximum"""
+    limit = request.args.get('limit', current_app.config['EMPLOYEE_SEARCH_LIMIT_DEFAULT'])
+    try:
+        limit = int(limit)
+    except (TypeError, ValueError):
+        raise ValueError('Limit must be an integer')
+    if limit < 1:
+        raise ValueError('Limit must be positive')
+    return min(limit, current_app.config['EMPLOYEE_SEARCH_LIMIT_MAX'])
+
+def search_employees(query, term, limit):
+    """
+    Apply a ranked search to an employee query
+
+    Args:
+        query: The employee query, with any other filters already applied
+        term (str): The search text
+        limit (int): Maximum number of employees to return
+
+    Returns:
+        tuple: (ranked employees, pagination metadata dict)
+    """
+    term = term.strip().lower()
+    if not term:
+        raise ValueError('Search term must not be empty')
+
+    number = func.lower(Employee.employee_number)
+    first_name = func.lower(Employee.first_name)
+    last_name = func.lower(Employee.last_name)
+    prefix = escape_like(term) + '%'
+
+    number_prefix = number.like(prefix, escape='\\')
+    name_prefix = or_(first_name.like(prefix, escape='\\'), last_name.like(prefix, escape='\\'))
+    matches = [number_prefix, name_prefix]
+    ranks = [(number == term, 5), (number_prefix, 4), (name_prefix, 3)]
+
+    similarity = literal(0)
+    if len(term) >= MIN_TRIGRAM_LENGTH:
+        search_text = _search_text()
+        substring = search_text.like('%' + prefix, escape='\\')
+        matches.append(substring)
+        ranks.append((substring, 2))
+        if db.engine.dialect.name == 'postgresql':
+            # search_text %> term: word_similarity(term, search_text) above pg_trgm's threshold
+            matches.append(search_text.op('%>')(term))
+            similarity = func.word_similarity(term, search_text)
+
+    rank = case(*ranks, else_=0) + similarity
+    rows = query.filter(or_(*matches)).order_by(
+        rank.desc(), Employee.last_name, Employee.first_name, Employee.id
+    ).limit(limit + 1).all()
+
+    return rows[:limit], {
+        'limit': limit,
+        'next_cursor': None,
+        'has_more': len(rows) > limit
+    }
@@ -0,0 +1,42 @@
+"""
+Sparse fieldsets for the resource endpoints (fields= query parameter).
+
+Serializable models declare their output as a FIELDS mapping of field
+name to getter. to_dict(fields) evaluates only the requested getters, and
+eager_load(query, model, fields) only loads the relationships behind
+them, so a picker asking for fields=key_number never touches checkouts
+or department permissions.
+"""
+from flask import request
+
+def parse_fields(model, arg='fields'):
+    """
+    Parse a comma-separated fieldset from the request
+
+    Args:
+        model: Model class whose FIELDS the names must come from
+        arg (str): Query parameter name
+
+    Returns:
+        set: Requested field names plus 'id', or None for every field
+
+    Raises:
+        ValueError: If a name is not a serialized field of the model
+    """
+    value = request.args.get(arg)
+    if not value:
+        return None
+
+    fields = {name.strip() for name in value.split(',') if name.strip()}
+    unknown = fields - model.FIELDS.keys()
+    if unknown:
+        raise ValueError(f"Unknown field(s) for {model.__tablename__}: {', '.join(sorted(unknown))}")
+    return fields | {'id'}
+
+def serialize(obj, fields=None):
+    """Evaluate an object's FIELDS getters, limited to `fields` if given"""
+    return {
+        name: getter(obj)
+        for name, getter in obj.FIELDS.items()
+        if fields is None or name in fields
+    }
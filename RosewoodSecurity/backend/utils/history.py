@@ -0,0 +1,97 @@
+"""
+Checkout history pages for a single key or access card.
+
+History is served newest first, keyset-paginated on (check_out_time, id)
+and optionally bounded by check-out time with the 'from' and 'to' query
+parameters. Both bounds are inclusive, as in the daily report
+(utils/daily_report.py), and a date 'to' covers that whole day, so
+from=2024-01-01&to=2024-01-31 is all of January. Both the bounds and the
+ordering run on ix_transactions_key_check_out /
+ix_transactions_access_card_check_out, so a page costs the same for a key
+with ten rows as for a master key with ten years of them. Employee names
+for a page are fetched in one query of just the columns needed.
+"""
+from flask import request
+from datetime import date, datetime, timedelta, timezone
+
+from app import db
+from models.employee import Employee
+from models.transaction import Transaction
+from utils.pagination import paginate
+
+def parse_time_bound(name, upper=False):
+    """
+    Parse an inclusive ISO 8601 date or datetime query parameter
+
+    Args:
+        name (str): The query parameter
+        upper (bool): Whether the value is the last day or instant to
+                      include; it is then returned as the exclusive end
+                      just past it (the next midnight for a date)
+
+    Returns:
+        datetime: The bound as naive UTC, like the stored times, or None
+                  if the parameter is absent
+
+    Raises:
+        ValueError: If the value is not ISO 8601
+    """
+    value = request.args.get(name)
+    if not value:
+        return None
+    try:
+        day = date.fromisoformat(value)
+    except ValueError:
+        day = None
+    try:
+        if day:
+            bound = datetime.combine(day, datetime.min.time())
+            return bound + timedelta(days=1) if upper else bound
+        bound = datetime.fromisoformat(value)
+        if bound.tzinfo:
+            bound = bound.astimezone(timezone.utc).replace(tzinfo=None)
+        return bound + timedelta(microseconds=1) if upper else bound
+    except ValueError:
+        raise ValueError(f"'{name}' must be an ISO 8601 date or datetime")
+
+def get_item_history(item_column, item_id):
+    """
+    Fetch one page of history for a key or access card
+
+    Args:
+        item_column: Transaction.key_id or Transaction.access_card_id
+        item_id (int): The key or access card ID
+
+    Returns:
+        tuple: (transaction dicts, pagination metadata dict)
+    """
+    start = parse_time_bound('from')
+    end = parse_time_bound('to', upper=True)
+    if start and end and start >= end:
+        raise ValueError("'from' must not be after 'to'")
+
+    query = Transaction.query.filter(item_column == item_id)
+    if start:
+        query = query.filter(Transaction.check_out_time >= start)
+    if end:
+        query = query.filter(Transaction.check_out_time < end)
+
+    page, pagination = paginate(query, [Transaction.check_out_time, Transaction.id], descending=True)
+
+    employee_ids = {t.employee_id for t in page}
+    names = {
+        id: f"{first_name} {last_name}"
+        for id, first_name, last_name in db.session.query(
+            Employee.id, Employee.first_name, Employee.last_name
+        ).filter(Employee.id.in_(employee_ids))
+    } if employee_ids else {}
+
+    transactions = [{
+        'transaction_number': t.transaction_number,
+        'employee': names.get(t.employee_id),
+        'check_out_time': t.check_out_time.isoformat(),
+        'check_in_time': t.check_in_time.isoformat() if t.check_in_time else None,
+        'purpose': t.purpose,
+        'status': t.status
+    } for t in page]
+    return transactions, pagination
@@ -0,0 +1,160 @@
+"""
+Compound documents for the resource endpoints (include= query parameter).
+
+include= takes comma-separated relationship paths, e.g. on a transaction
+include=employee,key.departments. Each path segment is resolved for every
+resource on the page at once: one query collects the related IDs and one
+query (plus its eager loaders) fetches the related rows. Related resources
+are returned once each in a top-level 'included' list, tagged with their
+'type', and every resource that had a relationship resolved gets a
+'relationships' entry mapping the name to the related ID(s). Included
+resources honour fields[<type>]= sparse fieldsets.
+"""
+from flask import request
+from sqlalchemy import and_
+
+from app import db
+from models.key import Key
+from models.access_card import AccessCard
+from models.employee import Employee
+from models.transaction import Transaction
+from models.department import Department, department_key_permissions
+from utils.fields import parse_fields
+from utils.serialization import eager_load
+
+class Relation:
+    """An includable relationship and how to batch-resolve its IDs"""
+
+    def __init__(self, model, link, many=False):
+        self.model = model
+        self.link = link
+        self.many = many
+
+def _foreign_key(attr):
+    """Link through a foreign key column on the source rows; no query needed"""
+    def link(sources):
+        return {s.id: [getattr(s, attr)] if getattr(s, attr) else [] for s in sources}
+    return link
+
+def _pairs(query):
+    """Link through a (source_id, target_id) query over a batch of source IDs"""
+    def link(sources):
+        links = {s.id: [] for s in sources}
+        for source_id, target_id in query(list(links)):
+            links[source_id].append(target_id)
+        return links
+    return link
+
+def _key_departments(key_ids):
+    return db.session.query(
+        department_key_permissions.c.key_id,
+        department_key_permissions.c.department_id
+    ).filter(department_key_permissions.c.key_id.in_(key_ids)).all()
+
+def _employee_active_transactions(employee_ids):
+    return db.session.query(Transaction.employee_id, Transaction.id).filter(
+        and_(Transaction.employee_id.in_(employee_ids), Transaction.check_in_time.is_(None))
+    ).order_by(Transaction.id).all()
+
+INCLUDES = {
+    Transaction: {
+        'employee': Relation(Employee, _foreign_key('employee_id')),
+        'key': Relation(Key, _foreign_key('key_id')),
+        'access_card': Relation(AccessCard, _foreign_key('access_card_id'))
+    },
+    Key: {
+        'departments': Relation(Department, _pairs(_key_departments), many=True)
+    },
+    AccessCard: {
+        'employee': Relation(Employee, _foreign_key('employee_id'))
+    },
+    Employee: {
+        'department': Relation(Department, _foreign_key('department_id')),
+        'active_transactions': Relation(Transaction, _pairs(_employee_active_transactions), many=True)
+    },
+    Department: {}
+}
+
+def parse_includes(model, arg='include'):
+    """
+    Parse and validate comma-separated include paths from the request
+
+    Returns:
+        list: Relationship paths, e.g. ['employee', 'key.departments']
+
+    Raises:
+        ValueError: If a path names a relationship that cannot be included
+    """
+    value = request.args.get(arg)
+    if not value:
+        return []
+
+    paths = [path.strip() for path in value.split(',') if path.strip()]
+    for path in paths:
+        current = model
+        for name in path.split('.'):
+            relation = INCLUDES[current].get(name)
+            if relation is None:
+                raise ValueError(f"Cannot include '{path}' on {model.__tablename__}")
+            current = relation.model
+    return paths
+
+def _load(model, ids):
+    """Fetch rows by ID with the loaders their requested fields need"""
+    if not ids:
+        return [], None
+    fields = parse_fields(model, arg=f'fields[{model.__tablename__}]')
+    query = eager_load(model.query.filter(model.id.in_(ids)), model, fields)
+    return query.order_by(model.id).all(), fields
+
+def include_related(model, objects, documents, paths):
+    """
+    Resolve include paths for a page of resources
+
+    Args:
+        model: Model class of the primary resources
+        objects (list): The primary model instances
+        documents (list): Their serialized dicts, in the same order; a
+                          'relationships' entry is added to each
+        paths (list): Include paths from parse_includes()
+
+    Returns:
+        list: De-duplicated related resources for the 'included' section
+    """
+    docs = {(model.__tablename__, obj.id): doc for obj, doc in zip(objects, documents)}
+    included = {}
+    loaded = {(): objects}
+
+    for path in paths:
+        source_model, prefix = model, ()
+        for name in path.split('.'):
+            relation = INCLUDES[source_model][name]
+            segment = prefix + (name,)
+
+            # Each segment is resolved once per request, however many
+            # paths share it
+            if segment not in loaded:
+                sources = loaded[prefix]
+                links = relation.link(sources)
+                target_ids = {target_id for ids in links.values() for target_id in ids}
+                targets, fields = _load(relation.model, target_ids)
+
+                for source in sources:
+                    ids = links.get(source.id, [])
+                    doc = docs[(source_model.__tablename__, source.id)]
+                    doc.setdefault('relationships', {})[name] = (
+                        ids if relation.many else (ids[0] if ids else None)
+                    )
+
+                for target in targets:
+                    ident = (relation.model.__tablename__, target.id)
+                    if ident not in docs:
+                        docs[ident] = included[ident] = {
+                            'type': ident[0],
+                            **target.to_dict(fields)
+                        }
+                loaded[segment] = targets
+
+            source_model, prefix = relation.model, segment
+
+    return list(included.values())
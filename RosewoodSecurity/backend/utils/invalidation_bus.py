@@ -0,0 +1,220 @@
+"""
+Cross-worker cache invalidation over PostgreSQL LISTEN/NOTIFY.
+
+In-process caches (dashboard snapshots, the permission index) register a
+name, their local invalidate callback, the session.info flag their
+after_flush hook sets, and a cheap version-marker query. When a flush
+sets a flag, a NOTIFY '<name>:<pid>' is issued inside the same database
+transaction, so other workers hear about it exactly when the change
+commits and never for a rolled-back one. Each worker runs a listener
+thread that applies those messages to its own caches.
+
+If the listener connection drops, the worker immediately invalidates
+everything it may miss and, until it reconnects, polls each cache's
+version marker every INVALIDATION_POLL_INTERVAL seconds instead. The bus is
+inactive on databases other than PostgreSQL.
+
+Other modules can listen on further channels through the same connection
+(utils/live_events.py relays dashboard events this way).
+"""
+from sqlalchemy import event, text
+import logging
+import os
+import select
+import threading
+
+from app import db
+from config import Config
+
+logger = logging.getLogger(__name__)
+
+NOTIFY_SQL = text('SELECT pg_notify(:channel, :payload)')
+
+class CacheRegistration:
+    """A cache the bus keeps in sync across workers"""
+
+    def __init__(self, invalidate, marker=None, flag=None):
+        self.invalidate = invalidate
+        self.marker = marker
+        self.flag = flag
+
+class InvalidationBus:
+    """Publishes and applies cache invalidations between worker processes"""
+
+    def __init__(self, channel='rosewood_invalidate', poll_interval=5):
+        self.channel = channel
+        self.poll_interval = poll_interval
+        self.caches = {}
+        self.channels = {}
+        self.listening = False
+        self._markers = {}
+        self._stop = threading.Event()
+        self._thread = None
+
+    def register(self, name, invalidate, marker=None, flag=None):
+        """
+        Register a cache
+
+        Args:
+            name (str): Message name for the cache
+            invalidate (callable): Drops this worker's copy
+            marker (callable): Returns a value that changes whenever the
+                               cached data does; polled while the
+                               listener is down
+            flag (str): session.info key set by the cache's flush hook
+        """
+        self.caches[name] = CacheRegistration(invalidate, marker, flag)
+
+    def listen(self, channel, handler):
+        """
+        Deliver every payload NOTIFYed on another channel to a handler
+
+        Handlers run on the listener thread, inside an app context.
+        """
+        self.channels[channel] = handler
+
+    @property
+    def enabled(self):
+        return db.engine.dialect.name == 'postgresql'
+
+    def message(self, name):
+        """Notification payload; the PID lets a worker skip its own messages"""
+        return f'{name}:{os.getpid()}'
+
+    def publish(self, *names):
+        """Notify other workers of changes made outside the ORM session (bulk updates)"""
+        self.notify(self.channel, *[self.message(name) for name in names])
+
+    def notify(self, channel, *payloads):
+        """NOTIFY payloads on a channel in a transaction of their own"""
+        if not self.enabled:
+            return
+        with db.engine.begin() as connection:
+            for payload in payloads:
+                connection.execute(NOTIFY_SQL, {'channel': channel, 'payload': payload})
+
+    def handle(self, payload):
+        """Apply one notification from another worker"""
+        name, _, pid = payload.partition(':')
+        cache = self.caches.get(name)
+        if cache and pid != str(os.getpid()):
+            cache.invalidate()
+
+    def invalidate_all(self):
+        for cache in self.caches.values():
+            cache.invalidate()
+
+    def check_versions(self):
+        """
+        Invalidate caches whose version marker moved since the last check
+
+        A cache with no recorded marker is invalidated too: it may have
+        been reloaded before a change the new marker already includes.
+        """
+        for name, cache in self.caches.items():
+            if cache.marker is None:
+                continue
+            marker = cache.marker()
+            if self._markers.get(name) != marker:
+                cache.invalidate()
+            self._markers[name] = marker
+
+    def _disconnected(self):
+        """On losing the listener, drop everything: notifications may be missed until it is back"""
+        was_listening, self.listening = self.listening, False
+        if was_listening:
+            self._markers.clear()
+            self.invalidate_all()
+
+    def start(self, app):
+        """Start listening on a daemon thread"""
+        if self._thread and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, args=(app,), name='invalidation-bus', daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+
+    def _run(self, app):
+        while not self._stop.is_set():
+            try:
+                with app.app_context():
+                    self._listen()
+            except Exception as e:
+                logger.warning(f"Invalidation listener disconnected: {str(e)}")
+            finally:
+                self._disconnected()
+
+            # Degraded: poll version markers until the listener reconnects
+            self._stop.wait(self.poll_interval)
+            with app.app_context():
+                try:
+                    self.check_versions()
+                except Exception as e:
+                    logger.error(f"Cache version check failed: {str(e)}")
+                finally:
+                    db.session.remove()
+
+    def _listen(self):
+        connection = db.engine.raw_connection()
+        # Keep the LISTEN connection out of the pool
+        connection.detach()
+        try:
+            dbapi_connection = connection.connection
+            dbapi_connection.autocommit = True
+            cursor = dbapi_connection.cursor()
+            for channel in [self.channel, *self.channels]:
+                cursor.execute(f'LISTEN {channel}')
+            self.listening = True
+
+            # Messages sent while we were not listening are lost
+            self.invalidate_all()
+            self._markers.clear()
+
+            while not self._stop.is_set():
+                if select.select([dbapi_connection], [], [], self.poll_interval) == ([], [], []):
+                    # Idle; make sure the connection is still alive
+                    cursor.execute('SELECT 1')
+                    continue
+                dbapi_connection.poll()
+                while dbapi_connection.notifies:
+                    notification = dbapi_connection.notifies.pop(0)
+                    handler = self.channels.get(notification.channel, self.handle)
+                    try:
+                        handler(notification.payload)
+                    except Exception as e:
+                        logger.error(f"Could not handle {notification.channel} notification: {str(e)}")
+        finally:
+            connection.close()
+
+# Create a singleton instance
+invalidation_bus = InvalidationBus(poll_interval=Config.INVALIDATION_POLL_INTERVAL)
+
+@event.listens_for(db.session, 'after_flush_postexec')
+def _notify_in_transaction(session, flush_context):
+    """NOTIFY for each cache a flush invalidated, once per transaction"""
+    flagged = [
+        name for name, cache in invalidation_bus.caches.items()
+        if cache.flag and session.info.get(cache.flag)
+    ]
+    if not flagged or not invalidation_bus.enabled:
+        return
+
+    sent = session.info.setdefault('invalidations_sent', set())
+    for name in flagged:
+        if name not in sent:
+            session.connection().execute(NOTIFY_SQL, {
+                'channel': invalidation_bus.channel,
+                'payload': invalidation_bus.message(name)
+            })
+            sent.add(name)
+
+@event.listens_for(db.session, 'after_commit')
+def _clear_on_commit(session):
+    session.info.pop('invalidations_sent', None)
+
+@event.listens_for(db.session, 'after_rollback')
+def _clear_on_rollback(session):
+    session.info.pop('invalidations_sent', None)
@@ -0,0 +1,194 @@
+"""
+Publish/subscribe broker for live dashboard updates.
+
+Committed checkouts, checkins and lost reports are published from session
+hooks; the overdue sweeper and alert sync publish overdue and card-expiry
+events. Each subscriber (one per open /dashboard/stream connection) has a
+bounded queue. Subscribers block on their queue rather than polling, so
+under the gevent workers of gunicorn.conf.py an idle connection costs
+one parked greenlet and no database work.
+
+The broker itself is per process. On PostgreSQL every event is also
+NOTIFYed on EVENTS_CHANNEL and the invalidation bus listener of each other
+worker republishes it locally, so a stream sees events from all workers.
+An event too large for a NOTIFY payload goes out as 'resync' instead, and
+streams are told to resync whenever the listener connects or drops, since
+events may have been missed meanwhile. Without the listener (other
+databases) a stream only sees its own worker's events.
+"""
+from sqlalchemy import event, inspect
+import itertools
+import json
+import logging
+import os
+import queue
+import threading
+import time
+
+from app import db
+from config import Config
+from utils.invalidation_bus import invalidation_bus
+
+logger = logging.getLogger(__name__)
+
+EVENTS_CHANNEL = 'rosewood_live_events'
+
+# PostgreSQL rejects NOTIFY payloads of 8000 bytes or more
+MAX_NOTIFY_PAYLOAD = 7999
+
+class Subscription:
+    """A single stream's queue of pending events"""
+
+    def __init__(self, maxsize):
+        self._queue = queue.Queue(maxsize)
+        self.overflowed = False
+
+    def put(self, item):
+        try:
+            self._queue.put_nowait(item)
+        except queue.Full:
+            # The client is too slow; it will be told to resync
+            self.overflowed = True
+
+    def get_batch(self, timeout, window):
+        """
+        Wait for events and coalesce a burst into one batch
+
+        Blocks up to `timeout` seconds for the first event, then collects
+        whatever else arrives within `window` seconds. Events with the same
+        coalescing key collapse into the most recent one.
+
+        Returns:
+            list: (id, type, data) tuples, empty if the timeout expired
+        """
+        try:
+            first = self._queue.get(timeout=timeout)
+        except queue.Empty:
+            return []
+
+        batch = {first[3]: first[:3]}
+        deadline = time.monotonic() + window
+        while True:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                item = self._queue.get(timeout=remaining)
+            except queue.Empty:
+                break
+            batch.pop(item[3], None)
+            batch[item[3]] = item[:3]
+        return list(batch.values())
+
+class EventBroker:
+    """Fans out published events to every open subscription"""
+
+    def __init__(self, queue_size=1000, forward=None):
+        self.queue_size = queue_size
+        self.forward = forward  # (event_type, data, coalesce_key) -> None, relays to other workers
+        self._ids = itertools.count(1)
+        self._subscribers = set()
+        self._lock = threading.Lock()
+
+    def subscribe(self):
+        subscription = Subscription(self.queue_size)
+        with self._lock:
+            self._subscribers.add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription):
+        with self._lock:
+            self._subscribers.discard(subscription)
+
+    def publish(self, event_type, data, coalesce_key=None, forward=True):
+        """
+        Publish an event to all subscribers
+
+        Args:
+            event_type (str): SSE event name, e.g. 'checkout'
+            data (dict): JSON-serializable payload
+            coalesce_key: Events sharing a key within one batch collapse to
+                          the latest. Defaults to a unique key (no coalescing).
+            forward (bool): Also relay the event to other workers
+        """
+        event_id = next(self._ids)
+        item = (event_id, event_type, data, coalesce_key or (event_type, event_id))
+        with self._lock:
+            subscribers = list(self._subscribers)
+        for subscription in subscribers:
+            subscription.put(item)
+        if forward and self.forward:
+            self.forward(event_type, data, coalesce_key)
+        return event_id
+
+    def resync(self):
+        """Tell this worker's streams to refetch; they may have missed events"""
+        self.publish('resync', {}, coalesce_key='resync', forward=False)
+
+    @property
+    def subscriber_count(self):
+        return len(self._subscribers)
+
+def _forward(event_type, data, coalesce_key):
+    """NOTIFY other workers of an event published in this one"""
+    payload = json.dumps({'pid': os.getpid(), 'type': event_type, 'data': data, 'key': coalesce_key})
+    if len(payload.encode()) > MAX_NOTIFY_PAYLOAD:
+        payload = json.dumps({'pid': os.getpid(), 'type': 'resync', 'data': {}, 'key': 'resync'})
+    try:
+        invalidation_bus.notify(EVENTS_CHANNEL, payload)
+    except Exception as e:
+        # The change is committed; other workers' streams just miss the event
+        logger.error(f"Could not relay {event_type} event: {str(e)}")
+
+def _receive(payload):
+    """Republish an event NOTIFYed by another worker to this worker's streams"""
+    message = json.loads(payload)
+    if message['pid'] == os.getpid():
+        return
+    # JSON turns tuple keys into lists, which can't key a batch
+    key = message['key']
+    if isinstance(key, list):
+        key = tuple(key)
+    live_events.publish(message['type'], message['data'], key, forward=False)
+
+# Create a singleton instance
+live_events = EventBroker(queue_size=Config.LIVE_EVENTS_QUEUE_SIZE, forward=_forward)
+
+invalidation_bus.listen(EVENTS_CHANNEL, _receive)
+# Invalidated when the listener connects or drops
+invalidation_bus.register('live_events', live_events.resync)
+
+def _transaction_event(transaction):
+    return {
+        'transaction_number': transaction.transaction_number,
+        'employee_id': transaction.employee_id,
+        'item_type': 'key' if transaction.key_id else 'access_card',
+        'item_id': transaction.key_id or transaction.access_card_id
+    }
+
+@event.listens_for(db.session, 'after_flush')
+def _collect_transaction_events(session, flush_context):
+    """Queue checkout/checkin/lost events until the surrounding commit"""
+    from models.transaction import Transaction
+
+    pending = session.info.setdefault('live_events', [])
+    for obj in session.new:
+        if isinstance(obj, Transaction):
+            pending.append(('checkout', _transaction_event(obj)))
+    for obj in session.dirty:
+        if not isinstance(obj, Transaction):
+            continue
+        attrs = inspect(obj).attrs
+        if attrs.check_in_time.history.added and obj.check_in_time:
+            pending.append(('checkin', _transaction_event(obj)))
+        elif attrs.status.history.has_changes() and obj.status == 'lost':
+            pending.append(('lost', _transaction_event(obj)))
+
+@event.listens_for(db.session, 'after_commit')
+def _publish_on_commit(session):
+    for event_type, data in session.info.pop('live_events', []):
+        live_events.publish(event_type, data)
+
+@event.listens_for(db.session, 'after_rollback')
+def _discard_on_rollback(session):
+    session.info.pop('live_events', None)
@@ -0,0 +1,72 @@
+"""
+Versioned SQL migrations.
+
+db.create_all() creates missing tables but never alters existing ones, and
+only runs when app.py is started directly, so schema changes (new tables,
+indexes, new columns) ship as numbered .sql files in backend/migrations;
+a new table's migration must match its model. Each file is applied once,
+in order, and recorded in the schema_migrations table. Statements run in
+autocommit mode so they may use CREATE INDEX CONCURRENTLY.
+"""
+from datetime import datetime
+from sqlalchemy import text
+import logging
+import os
+
+from app import db
+
+logger = logging.getLogger(__name__)
+
+MIGRATIONS_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'migrations')
+
+def get_migration_files():
+    """Get (version, path) pairs for all migration files, in order"""
+    files = sorted(f for f in os.listdir(MIGRATIONS_DIR) if f.endswith('.sql'))
+    return [(f[:-len('.sql')], os.path.join(MIGRATIONS_DIR, f)) for f in files]
+
+def split_statements(sql):
+    """Split a migration script into statements, dropping comment lines"""
+    lines = [line for line in sql.splitlines() if not line.strip().startswith('--')]
+    return [s.strip() for s in '\n'.join(lines).split(';') if s.strip()]
+
+def get_applied_versions(connection):
+    """Get the set of migration versions already applied"""
+    connection.execute(text("""
+        CREATE TABLE IF NOT EXISTS schema_migrations (
+            version VARCHAR(100) PRIMARY KEY,
+            applied_at TIMESTAMP NOT NULL
+        )
+    """))
+    rows = connection.execute(text("SELECT version FROM schema_migrations"))
+    return {row[0] for row in rows}
+
+def apply_migrations():
+    """
+    Apply all pending migrations
+
+    Returns:
+        list: The versions applied by this run
+    """
+    applied = []
+    with db.engine.connect() as connection:
+        connection = connection.execution_options(isolation_level='AUTOCOMMIT')
+        done = get_applied_versions(connection)
+
+        for version, path in get_migration_files():
+            if version in done:
+                continue
+
+            with open(path) as f:
+                statements = split_statements(f.read())
+
+            logger.info(f"Applying migration {version}")
+            for statement in statements:
+                connection.execute(text(statement))
+
+            connection.execute(
+                text("INSERT INTO schema_migrations (version, applied_at) VALUES (:version, :applied_at)"),
+                {'version': version, 'applied_at': datetime.utcnow()}
+            )
+            applied.append(version)
+
+    return applied
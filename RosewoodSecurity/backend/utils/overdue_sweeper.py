@@ -0,0 +1,168 @@
+"""
+Background sweeper that maintains Transaction.status = 'overdue'.
+
+Open transactions past their expected return time are flagged in
+set-based batches, recording when they became overdue and which
+escalation tier they have reached. Readers then filter on the indexed
+status instead of re-deriving overdue state row by row; the flag lags
+real time by at most one sweep interval.
+
+Every worker starts a sweeper, but only the one holding the sweep lock
+scans; the others keep trying each interval and take over if it stops.
+"""
+from datetime import datetime, timedelta
+from sqlalchemy import case, func, literal, or_, text, update
+import logging
+import threading
+
+from app import db
+from config import Config
+from models.transaction import Transaction
+from utils.dashboard_cache import dashboard_cache
+from utils.alerts import refresh_alerts
+from utils.live_events import live_events
+from utils.invalidation_bus import invalidation_bus
+
+logger = logging.getLogger(__name__)
+
+_SWEEP_LOCK_SQL = text('SELECT pg_try_advisory_lock(:key)')
+_SWEEP_LOCK_KEY = 0x53776570  # 'Swep'
+
+def escalation_level_expr(now, tiers):
+    """
+    SQL expression for the escalation tier a transaction has reached
+
+    Args:
+        now (datetime): Reference time
+        tiers (list): Hours overdue at which each tier starts, ascending
+
+    Returns:
+        A CASE expression evaluating to 0 (not yet tiered) up to len(tiers)
+    """
+    whens = [
+        (Transaction.expected_return_time < now - timedelta(hours=hours), level)
+        for level, hours in reversed(list(enumerate(tiers, start=1)))
+    ]
+    return case(*whens, else_=0) if whens else literal(0)
+
+def sweep_overdue(now=None, batch_size=500, tiers=None):
+    """
+    Flag newly overdue transactions and raise escalation tiers
+
+    Each batch locks its candidate rows with SKIP LOCKED, so sweepers in
+    several workers never contend, and commits before the next batch.
+
+    Returns:
+        list: IDs of the transactions whose status or tier changed
+    """
+    now = now or datetime.utcnow()
+    tiers = tiers if tiers is not None else Config.OVERDUE_ESCALATION_HOURS
+    level = escalation_level_expr(now, tiers)
+    changed = []
+
+    while True:
+        ids = [row[0] for row in db.session.query(Transaction.id).filter(
+            Transaction.check_in_time.is_(None),
+            Transaction.status.in_(('active', 'overdue')),
+            Transaction.expected_return_time < now,
+            or_(Transaction.status == 'active', Transaction.escalation_level < level)
+        ).limit(batch_size).with_for_update(skip_locked=True).all()]
+
+        if not ids:
+            break
+
+        db.session.execute(
+            update(Transaction).where(
+                Transaction.id.in_(ids)
+            ).values(
+                status='overdue',
+                overdue_since=func.coalesce(Transaction.overdue_since, Transaction.expected_return_time),
+                escalation_level=level
+            ).execution_options(synchronize_session=False)
+        )
+        db.session.commit()
+        changed.extend(ids)
+
+    if changed:
+        # Bulk updates bypass the session events that invalidate snapshots
+        dashboard_cache.invalidate()
+        invalidation_bus.publish('dashboard')
+        live_events.publish('overdue', {'transaction_ids': changed})
+        logger.info(f"Overdue sweep updated {len(changed)} transactions")
+    return changed
+
+class OverdueSweeper:
+    """Runs sweep_overdue and the alert sync periodically on a daemon thread"""
+
+    def __init__(self, app, interval=60):
+        self.app = app
+        self.interval = interval
+        self._stop = threading.Event()
+        self._thread = None
+        # Holds the session-level sweep lock while this worker is the sweeper
+        self._lock_connection = None
+
+    def start(self):
+        """Start sweeping in the background"""
+        if self._thread and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name='overdue-sweeper', daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        """Stop after the current sweep"""
+        self._stop.set()
+
+    def _hold_lock(self):
+        """
+        Whether this worker is the one that sweeps
+
+        The lock lives on a connection of its own, kept open between sweeps,
+        because sweep_overdue commits per batch and a transaction-scoped lock
+        would be released after the first one. Closing the connection (or
+        losing it) releases the lock for another worker to take.
+        """
+        if db.engine.dialect.name != 'postgresql':
+            return True
+        if self._lock_connection is not None:
+            try:
+                self._lock_connection.execute(text('SELECT 1'))
+                return True
+            except Exception:
+                self._release_lock()
+        connection = db.engine.connect().execution_options(isolation_level='AUTOCOMMIT')
+        if connection.execute(_SWEEP_LOCK_SQL, {'key': _SWEEP_LOCK_KEY}).scalar():
+            self._lock_connection = connection
+            return True
+        connection.close()
+        return False
+
+    def _release_lock(self):
+        if self._lock_connection is not None:
+            # Closing ends the database session, and the lock with it
+            self._lock_connection.invalidate()
+            self._lock_connection = None
+
+    def _run(self):
+        while not self._stop.is_set():
+            self.run_once()
+            self._stop.wait(self.interval)
+        with self.app.app_context():
+            self._release_lock()
+
+    def run_once(self):
+        """Run a single sweep inside an application context, unless another worker is the sweeper"""
+        with self.app.app_context():
+            try:
+                if not self._hold_lock():
+                    return []
+                changed = sweep_overdue()
+                refresh_alerts()
+                return changed
+            except Exception as e:
+                db.session.rollback()
+                logger.error(f"Overdue sweep failed: {str(e)}")
+                return []
+            finally:
+                db.session.remove()
@@ -0,0 +1,110 @@
+"""
+Keyset (cursor) pagination for list endpoints.
+
+Pages are fetched with a WHERE clause on the ordering columns of the last
+row served instead of OFFSET, so every page costs the same as the first.
+Cursors are opaque to clients: a base64-encoded list of the last row's
+ordering values.
+"""
+from flask import request, current_app
+from sqlalchemy import tuple_
+from datetime import datetime
+import base64
+import json
+
+def encode_cursor(values):
+    """Encode the ordering values of a row as an opaque cursor"""
+    payload = [v.isoformat() if isinstance(v, datetime) else v for v in values]
+    return base64.urlsafe_b64encode(json.dumps(payload).encode()).decode()
+
+def decode_cursor(cursor, columns):
+    """
+    Decode a cursor produced by encode_cursor
+
+    Args:
+        cursor (str): The opaque cursor from a previous page
+        columns (list): The ordering columns the cursor was built from
+
+    Returns:
+        list: The ordering values, coerced back to the column types
+
+    Raises:
+        ValueError: If the cursor is malformed or its values don't match
+                    the column types
+    """
+    try:
+        values = json.loads(base64.urlsafe_b64decode(cursor.encode()).decode())
+        if not isinstance(values, list) or len(values) != len(columns):
+            raise ValueError
+        return [_coerce(column, v) for column, v in zip(columns, values)]
+    except (ValueError, TypeError, UnicodeDecodeError):
+        raise ValueError('Invalid pagination cursor')
+
+def _coerce(column, value):
+    """Check a decoded value against its column's type, so a tampered cursor fails here, not in the database"""
+    if value is None:
+        return None
+    try:
+        expected = column.type.python_type
+    except NotImplementedError:
+        return value
+    if expected is datetime:
+        return datetime.fromisoformat(value)
+    # bool is an int subclass, and an int is a valid float value
+    if isinstance(value, bool) and expected is not bool:
+        raise ValueError
+    if expected is float and isinstance(value, int):
+        return float(value)
+    if not isinstance(value, expected):
+        raise ValueError
+    return value
+
+def get_page_size():
+    """Get the requested page size, clamped to the configured maximum"""
+    limit = request.args.get('limit', current_app.config['PAGE_SIZE_DEFAULT'])
+    try:
+        limit = int(limit)
+    except (TypeError, ValueError):
+        raise ValueError('Page size must be an integer')
+    if limit < 1:
+        raise ValueError('Page size must be positive')
+    return min(limit, current_app.config['PAGE_SIZE_MAX'])
+
+def paginate(query, columns, descending=False):
+    """
+    Fetch one page of a query using keyset pagination
+
+    The cursor and page size are read from the 'cursor' and 'limit' query
+    parameters. The ordering columns must end with a unique column (usually
+    the primary key) so the order is stable, and should be backed by an index.
+
+    Args:
+        query: The filtered query to paginate
+        columns (list): The ordering columns, e.g. [Transaction.check_out_time, Transaction.id]
+        descending (bool): Whether to page through rows in descending order
+
+    Returns:
+        tuple: (items on this page, pagination metadata dict)
+    """
+    limit = get_page_size()
+    cursor = request.args.get('cursor')
+
+    if cursor:
+        key = tuple_(*columns)
+        bound = tuple_(*decode_cursor(cursor, columns))
+        query = query.filter(key < bound if descending else key > bound)
+
+    ordering = [c.desc() if descending else c.asc() for c in columns]
+    rows = query.order_by(*ordering).limit(limit + 1).all()
+
+    has_more = len(rows) > limit
+    items = rows[:limit]
+    next_cursor = None
+    if has_more:
+        next_cursor = encode_cursor([getattr(items[-1], c.key) for c in columns])
+
+    return items, {
+        'limit': limit,
+        'next_cursor': next_cursor,
+        'has_more': has_more
+    }
@@ -0,0 +1,99 @@
+"""
+In-process department -> key permission index.
+
+The department_key_permissions table is small and changes rarely, but is
+consulted on every checkout. It is loaded once into a frozenset of key
+IDs per department, so permission checks are a set lookup with no
+database hit. Any committed change to a key's authorized departments or
+a department's key permissions (keys.create_key, keys.update_key, ...)
+drops the index, and the next check reloads it.
+"""
+from sqlalchemy import event, func, inspect
+import threading
+
+from app import db
+from models.department import department_key_permissions
+from utils.invalidation_bus import invalidation_bus
+
+class PermissionIndex:
+    """Department ID -> frozenset of permitted key IDs"""
+
+    def __init__(self):
+        self.version = 1
+        self._index = None
+        self._lock = threading.Lock()
+
+    def allowed(self, department_id, key_id):
+        """Check whether a department may check out a key"""
+        return key_id in self._get().get(department_id, frozenset())
+
+    def keys_for(self, department_id):
+        """Get the key IDs a department may check out"""
+        return self._get().get(department_id, frozenset())
+
+    def _get(self):
+        index = self._index
+        if index is not None:
+            return index
+
+        with self._lock:
+            if self._index is not None:
+                return self._index
+
+            version = self.version
+            grouped = {}
+            for department_id, key_id in db.session.query(
+                department_key_permissions.c.department_id,
+                department_key_permissions.c.key_id
+            ).all():
+                grouped.setdefault(department_id, set()).add(key_id)
+            index = {department_id: frozenset(keys) for department_id, keys in grouped.items()}
+
+            # Only publish if nothing was invalidated while loading
+            if version == self.version:
+                self._index = index
+            return index
+
+    def invalidate(self):
+        """Drop the index; it is reloaded on the next check"""
+        self.version += 1
+        self._index = None
+
+# Create a singleton instance
+permission_index = PermissionIndex()
+
+def _changes_permissions(obj):
+    tablename = getattr(obj, '__tablename__', None)
+    if tablename == 'keys':
+        attr = 'authorized_departments'
+    elif tablename == 'departments':
+        attr = 'key_permissions'
+    else:
+        return False
+    return attr in obj.__dict__ and inspect(obj).attrs[attr].history.has_changes()
+
+@event.listens_for(db.session, 'after_flush')
+def _track_permission_changes(session, flush_context):
+    """Flag the session if a flush granted or revoked key permissions"""
+    changed = any(_changes_permissions(obj) for obj in list(session.new) + list(session.dirty))
+    deleted = any(getattr(obj, '__tablename__', None) in ('keys', 'departments') for obj in session.deleted)
+    if changed or deleted:
+        session.info['permissions_dirty'] = True
+
+@event.listens_for(db.session, 'after_commit')
+def _invalidate_on_commit(session):
+    if session.info.pop('permissions_dirty', False):
+        permission_index.invalidate()
+
+@event.listens_for(db.session, 'after_rollback')
+def _discard_on_rollback(session):
+    session.info.pop('permissions_dirty', None)
+
+def _permission_version_marker():
+    # Grants insert rows with a fresh granted_at; revokes change the count
+    return tuple(db.session.query(
+        func.count(), func.max(department_key_permissions.c.granted_at)
+    ).one())
+
+invalidation_bus.register('permissions', permission_index.invalidate,
+                          marker=_permission_version_marker, flag='permissions_dirty')
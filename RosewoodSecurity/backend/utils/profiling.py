@@ -0,0 +1,61 @@
+from contextlib import contextmanager
+from sqlalchemy import event
+
+from app import db
+
+class QueryCounter:
+    """Counts SQL statements executed against the database engine"""
+
+    def __init__(self):
+        self.count = 0
+        self.statements = []
+
+    def __call__(self, conn, cursor, statement, parameters, context, executemany):
+        self.count += 1
+        self.statements.append(statement)
+
+@contextmanager
+def count_queries():
+    """
+    Count the SQL statements executed inside the block
+
+    Usage:
+        with count_queries() as counter:
+            Key.query.all()
+        print(counter.count)
+    """
+    counter = QueryCounter()
+    event.listen(db.engine, 'before_cursor_execute', counter)
+    try:
+        yield counter
+    finally:
+        event.remove(db.engine, 'before_cursor_execute', counter)
+
+class CommitCounter:
+    """Counts transactions committed on the database engine"""
+
+    def __init__(self):
+        self.count = 0
+
+    def __call__(self, conn):
+        self.count += 1
+
+@contextmanager
+def count_commits():
+    """
+    Count the database commits made inside the block
+
+    Counts at the engine level, so commits on side connections (such as
+    transaction number reservations) are included alongside the session's.
+
+    Usage:
+        with count_commits() as counter:
+            client.post('/transactions/checkin', json=...)
+        print(counter.count)
+    """
+    counter = CommitCounter()
+    event.listen(db.engine, 'commit', counter)
+    try:
+        yield counter
+    finally:
+        event.remove(db.engine, 'commit', counter)
@@ -0,0 +1,194 @@
+"""
+EXPLAIN-based check for the transaction hot-path queries.
+
+Seeds a realistic transactions table inside a transaction that is always
+rolled back, runs EXPLAIN on each hot query used by the dashboard,
+transaction and report routes, and reports any sequential scan on the
+transactions table.
+"""
+from datetime import datetime, timedelta
+from sqlalchemy import func, text
+import json
+
+from app import db
+from models.transaction import Transaction
+from models.employee import Employee
+from models.department import Department
+
+def get_hot_queries(employee_id, key_id, card_id):
+    """Build the hot queries, mirroring the filters used by the routes"""
+    now = datetime.utcnow()
+    yesterday = now.date() - timedelta(days=1)
+    open_filter = Transaction.check_in_time.is_(None)
+
+    return {
+        'overdue': db.session.query(Transaction).filter(
+            Transaction.status == 'overdue'
+        ),
+        'overdue_sweep': db.session.query(Transaction.id).filter(
+            open_filter,
+            Transaction.status.in_(('active', 'overdue')),
+            Transaction.expected_return_time < now
+        ).limit(500),
+        'active_key_checkouts': db.session.query(func.count(Transaction.id)).filter(
+            Transaction.key_id.isnot(None), open_filter
+        ),
+        'active_card_checkouts': db.session.query(func.count(Transaction.id)).filter(
+            Transaction.access_card_id.isnot(None), open_filter
+        ),
+        'key_current_checkout': db.session.query(Transaction).filter(
+            Transaction.key_id.in_([key_id]), open_filter
+        ),
+        'daily_report': db.session.query(Transaction).filter(
+            Transaction.check_out_time.between(
+                datetime.combine(yesterday, datetime.min.time()),
+                datetime.combine(yesterday, datetime.max.time())
+            )
+        ),
+        'recent_activity': db.session.query(Transaction).order_by(
+            Transaction.check_out_time.desc()
+        ).limit(10),
+        'department_stats': db.session.query(
+            Department.name, func.count(Transaction.id)
+        ).join(
+            Employee, Employee.department_id == Department.id
+        ).join(
+            Transaction, Transaction.employee_id == Employee.id
+        ).filter(
+            Transaction.check_out_time >= now - timedelta(days=30)
+        ).group_by(Department.name),
+        'employee_transactions': db.session.query(Transaction).filter(
+            Transaction.employee_id == employee_id
+        ).order_by(
+            Transaction.check_out_time.desc(), Transaction.id.desc()
+        ).limit(50),
+        'key_history': db.session.query(Transaction).filter(
+            Transaction.key_id == key_id
+        ).order_by(Transaction.check_out_time.desc()).limit(50),
+        'card_history': db.session.query(Transaction).filter(
+            Transaction.access_card_id == card_id
+        ).order_by(Transaction.check_out_time.desc()).limit(50)
+    }
+
+def seed_plan_data(connection, rows):
+    """
+    Insert synthetic employees, keys, cards and transactions
+
+    About 1% of the transactions are left open, spread over two years,
+    which matches the shape of production data closely enough for the
+    planner to make the same choices. Every NOT NULL column is set
+    explicitly, so this works on a db.create_all() schema as well as on a
+    migrated one.
+
+    Returns:
+        tuple: (employee_id, key_id, card_id) of a seeded row of each kind
+    """
+    owners = max(rows // 200, 10)
+    params = {'rows': rows, 'owners': owners}
+
+    user_id = connection.execute(text("""
+        INSERT INTO users (username, email, password_hash, role, is_active)
+        VALUES ('plan-check', 'plan-check@invalid', '-', 'admin', false)
+        RETURNING id
+    """)).scalar()
+    dept_id = connection.execute(text("""
+        INSERT INTO departments (name, access_level) VALUES ('plan-check', 1) RETURNING id
+    """)).scalar()
+
+    connection.execute(text("""
+        INSERT INTO employees (employee_number, first_name, last_name, email, department_id, status)
+        SELECT 'PC-' || g, 'Plan', 'Check ' || g, 'pc' || g || '@invalid', :dept_id, 'active'
+        FROM generate_series(1, :owners) g
+    """), {**params, 'dept_id': dept_id})
+    connection.execute(text("""
+        INSERT INTO keys (key_number, name, location, status, key_type, version)
+        SELECT 'PC-KEY-' || g, 'Key ' || g, 'Plan check', 'available', 'regular', 1
+        FROM generate_series(1, :owners) g
+    """), params)
+    connection.execute(text("""
+        INSERT INTO access_cards (card_number, card_type, status, version)
+        SELECT 'PC-CARD-' || g, 'permanent', 'active', 1
+        FROM generate_series(1, :owners) g
+    """), params)
+
+    ids = connection.execute(text("""
+        SELECT
+            (SELECT min(id) FROM employees WHERE employee_number LIKE 'PC-%'),
+            (SELECT min(id) FROM keys WHERE key_number LIKE 'PC-KEY-%'),
+            (SELECT min(id) FROM access_cards WHERE card_number LIKE 'PC-CARD-%')
+    """)).first()
+    employee_id, key_id, card_id = ids
+
+    connection.execute(text("""
+        INSERT INTO transactions (
+            transaction_number, employee_id, key_id, access_card_id,
+            check_out_time, expected_return_time, check_in_time, status,
+            escalation_level, created_by
+        )
+        SELECT
+            'PC-TRX-' || g,
+            :employee_id + g % :owners,
+            CASE WHEN g % 2 = 0 THEN :key_id + g % :owners END,
+            CASE WHEN g % 2 = 1 THEN :card_id + g % :owners END,
+            t.checkout,
+            t.checkout + interval '8 hours',
+            CASE WHEN g % 100 = 0 THEN NULL ELSE t.checkout + interval '2 hours' END,
+            CASE WHEN g % 100 = 0 THEN 'active' ELSE 'completed' END,
+            0,
+            :user_id
+        FROM generate_series(1, :rows) g,
+             LATERAL (SELECT now() - (g % 730) * interval '1 day'
+                                   - (g % 24) * interval '1 hour' AS checkout) t
+    """), {**params, 'employee_id': employee_id, 'key_id': key_id,
+           'card_id': card_id, 'user_id': user_id})
+
+    connection.execute(text("ANALYZE transactions"))
+    connection.execute(text("ANALYZE employees"))
+    return employee_id, key_id, card_id
+
+def find_seq_scans(plan, relation='transactions'):
+    """Walk an EXPLAIN (FORMAT JSON) plan and collect sequential scans on a table"""
+    found = []
+    if plan.get('Node Type') == 'Seq Scan' and plan.get('Relation Name') == relation:
+        found.append(plan)
+    for child in plan.get('Plans', []):
+        found.extend(find_seq_scans(child, relation))
+    return found
+
+def explain(connection, query):
+    """Run EXPLAIN on a query and return the root plan node"""
+    compiled = query.statement.compile(dialect=connection.dialect)
+    result = connection.exec_driver_sql(
+        f'EXPLAIN (FORMAT JSON) {compiled}', compiled.params
+    ).scalar()
+    if isinstance(result, str):
+        result = json.loads(result)
+    return result[0]['Plan']
+
+def check_query_plans(rows=100000, seed=True):
+    """
+    Check that no hot query plans a sequential scan on transactions
+
+    Args:
+        rows (int): Number of synthetic transactions to seed
+        seed (bool): Whether to seed data, or check against existing data
+
+    Returns:
+        dict: Query name -> list of offending Seq Scan nodes (empty if fine)
+    """
+    results = {}
+    with db.engine.connect() as connection:
+        trans = connection.begin()
+        try:
+            if seed:
+                employee_id, key_id, card_id = seed_plan_data(connection, rows)
+            else:
+                employee_id = connection.execute(text("SELECT min(id) FROM employees")).scalar()
+                key_id = connection.execute(text("SELECT min(id) FROM keys")).scalar()
+                card_id = connection.execute(text("SELECT min(id) FROM access_cards")).scalar()
+
+            for name, query in get_hot_queries(employee_id, key_id, card_id).items():
+                results[name] = find_seq_scans(explain(connection, query))
+        finally:
+            trans.rollback()
+    return results
@@ -0,0 +1,300 @@
+"""
+Background report jobs (/reports/jobs).
+
+Creating a job records a queued ReportJob row; once that request commits,
+the job is handed to this worker's process pool, so slow renders never
+hold a WSGI worker. Pool processes are started with 'spawn' (see
+utils/report_worker.py) so they inherit no database connections. A pool
+process claims its job with a conditional queued -> running UPDATE,
+renders the artifact into REPORT_STORAGE_DIR under a temporary name and
+renames it into place, so a download never sees a partial file. Clients
+poll the job and download the artifact once it has succeeded.
+
+The pool also works under the gevent worker the dashboard stream uses
+(gunicorn.conf.py): pool processes are spawned fresh, so they are not
+monkey-patched, and the pool's management thread runs as a greenlet.
+
+Limits and lifecycle:
+    - At most REPORT_MAX_ACTIVE_JOBS jobs queued or running in total, and
+      REPORT_MAX_ACTIVE_JOBS_PER_USER per user; each worker renders at
+      most REPORT_WORKERS at a time. On PostgreSQL, job creation takes a
+      transaction-scoped advisory lock so concurrent requests can't both
+      pass the limit checks.
+    - Cancelling marks the job 'cancelled'. A queued job is dropped from
+      the pool or skipped when claimed; a running render checks between
+      batches of rows and stops.
+    - Finished jobs and their files are purged REPORT_JOB_RETENTION_HOURS
+      after they finish. Jobs still active after REPORT_JOB_TIMEOUT_MINUTES
+      (e.g. lost with a restarted worker) are failed.
+"""
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from datetime import date, datetime, timedelta
+from flask import current_app
+from sqlalchemy import event, text
+import logging
+import multiprocessing
+import os
+import threading
+
+from app import db
+from config import Config
+from models.report_job import ReportJob
+from utils import daily_report
+from utils.weekly_report import build_weekly_report
+from utils.xlsx_stream import stream_xlsx, MIMETYPE as XLSX_MIMETYPE
+
+logger = logging.getLogger(__name__)
+
+# Serializes job creation across workers so the limit checks see each
+# other's rows (held until the creating transaction ends)
+_CREATE_LOCK_SQL = text('SELECT pg_advisory_xact_lock(:key)')
+_CREATE_LOCK_KEY = 0x5265706f  # 'Repo'
+
+class JobCancelled(Exception):
+    """Raised inside a render when its job has been cancelled"""
+
+class JobLimitExceeded(Exception):
+    """Raised when a new job would exceed the concurrency limits"""
+
+def _is_cancelled(job_id):
+    status = db.session.query(ReportJob.status).filter(ReportJob.id == job_id).scalar()
+    return status == 'cancelled'
+
+def _parse_daily(params):
+    first, last = daily_report.get_report_range(params)
+    return {'from': first.isoformat(), 'to': last.isoformat()}
+
+def _render_daily(job, path, check_every=5000):
+    first = date.fromisoformat(job.params['from'])
+    last = date.fromisoformat(job.params['to'])
+
+    def rows():
+        for count, row in enumerate(daily_report.iter_rows(first, last), start=1):
+            if count % check_every == 0 and _is_cancelled(job.id):
+                raise JobCancelled()
+            yield row
+
+    with open(path, 'wb') as output:
+        for chunk in stream_xlsx('Daily Transactions', daily_report.HEADER, rows()):
+            output.write(chunk)
+    return daily_report.get_filename(first, last)
+
+def _parse_weekly(params):
+    value = params.get('end_date')
+    if not value:
+        end_date = datetime.utcnow().date() - timedelta(days=1)
+    else:
+        try:
+            end_date = date.fromisoformat(value)
+        except (TypeError, ValueError):
+            raise ValueError("'end_date' must be a date (YYYY-MM-DD)")
+    return {'end_date': end_date.isoformat()}
+
+def _render_weekly(job, path):
+    end_date = date.fromisoformat(job.params['end_date'])
+    if _is_cancelled(job.id):
+        raise JobCancelled()
+    build_weekly_report(path, end_date)
+    return f'weekly_report_{end_date}.pdf'
+
+class ReportType:
+    """How to validate, render and serve one kind of report"""
+
+    def __init__(self, parse, render, extension, mimetype):
+        self.parse = parse  # params dict -> normalized params, raises ValueError
+        self.render = render  # (job, path) -> download filename
+        self.extension = extension
+        self.mimetype = mimetype
+
+REPORT_TYPES = {
+    'daily': ReportType(_parse_daily, _render_daily, 'xlsx', XLSX_MIMETYPE),
+    'weekly': ReportType(_parse_weekly, _render_weekly, 'pdf', 'application/pdf')
+}
+
+class ReportQueue:
+    """Creates report jobs and runs them on this worker's process pool"""
+
+    def __init__(self, workers=2):
+        self.workers = workers
+        self._executor = None
+        self._futures = {}
+        self._lock = threading.Lock()
+
+    def artifact_path(self, job):
+        directory = current_app.config['REPORT_STORAGE_DIR']
+        return os.path.join(directory, f'{job.id}.{REPORT_TYPES[job.report_type].extension}')
+
+    def create(self, report_type, params, user_id):
+        """
+        Validate and record a new job; it is submitted when the session commits
+
+        Raises:
+            ValueError: If the report type or parameters are invalid
+            JobLimitExceeded: If too many jobs are already queued or running
+        """
+        kind = REPORT_TYPES.get(report_type)
+        if kind is None:
+            raise ValueError(f"Unknown report type. Valid types: {', '.join(REPORT_TYPES)}")
+        if params is not None and not isinstance(params, dict):
+            raise ValueError('params must be an object')
+        params = kind.parse(params or {})
+
+        if db.engine.dialect.name == 'postgresql':
+            db.session.execute(_CREATE_LOCK_SQL, {'key': _CREATE_LOCK_KEY})
+        self.purge_expired()
+        active = ReportJob.query.filter(ReportJob.status.in_(ReportJob.ACTIVE_STATUSES))
+        if active.count() >= current_app.config['REPORT_MAX_ACTIVE_JOBS']:
+            raise JobLimitExceeded('Too many report jobs are in progress, try again later')
+        per_user = current_app.config['REPORT_MAX_ACTIVE_JOBS_PER_USER']
+        if active.filter(ReportJob.created_by == user_id).count() >= per_user:
+            raise JobLimitExceeded(f'At most {per_user} report jobs may be in progress per user')
+
+        job = ReportJob(report_type=report_type, params=params, created_by=user_id)
+        db.session.add(job)
+        db.session.flush()
+        db.session.info.setdefault('report_jobs_created', []).append(job.id)
+        return job
+
+    def _new_executor(self):
+        return ProcessPoolExecutor(
+            max_workers=self.workers,
+            mp_context=multiprocessing.get_context('spawn')
+        )
+
+    def submit(self, job_id):
+        """
+        Hand a committed job to the process pool
+
+        Never raises: it runs from the commit hook, after the job row is
+        committed. A pool broken by a crashed process (OOM, a segfault in
+        a renderer) is replaced; a job that still can't be submitted stays
+        queued until REPORT_JOB_TIMEOUT_MINUTES fails it.
+        """
+        if not current_app.config['REPORT_JOBS_ENABLED']:
+            return
+        from utils.report_worker import run_in_child
+
+        with self._lock:
+            try:
+                if self._executor is None:
+                    self._executor = self._new_executor()
+                try:
+                    future = self._executor.submit(run_in_child, job_id)
+                except BrokenProcessPool:
+                    logger.error("Report process pool broken, starting a new one")
+                    self._executor.shutdown(wait=False)
+                    self._executor = self._new_executor()
+                    future = self._executor.submit(run_in_child, job_id)
+            except Exception as e:
+                logger.error(f"Could not submit report job {job_id}: {str(e)}")
+                return
+            self._futures[job_id] = future
+        future.add_done_callback(lambda f: self._finished(job_id, f))
+
+    def _finished(self, job_id, future):
+        self._futures.pop(job_id, None)
+        if not future.cancelled() and future.exception():
+            logger.error(f"Report job {job_id} crashed: {str(future.exception())}")
+
+    def cancel(self, job):
+        """
+        Cancel a queued or running job
+
+        Returns:
+            bool: False if the job had already finished
+        """
+        cancelled = ReportJob.query.filter(
+            ReportJob.id == job.id,
+            ReportJob.status.in_(ReportJob.ACTIVE_STATUSES)
+        ).update({'status': 'cancelled', 'finished_at': datetime.utcnow()}, synchronize_session='fetch')
+        future = self._futures.get(job.id)
+        if cancelled and future:
+            future.cancel()
+        return bool(cancelled)
+
+    def purge_expired(self, now=None):
+        """
+        Delete expired jobs and their files, and fail jobs that timed out
+
+        Returns:
+            int: Number of jobs deleted
+        """
+        now = now or datetime.utcnow()
+        retention = timedelta(hours=current_app.config['REPORT_JOB_RETENTION_HOURS'])
+        timeout = timedelta(minutes=current_app.config['REPORT_JOB_TIMEOUT_MINUTES'])
+
+        ReportJob.query.filter(
+            ReportJob.status.in_(ReportJob.ACTIVE_STATUSES),
+            ReportJob.created_at < now - timeout
+        ).update({'status': 'failed', 'error': 'Timed out', 'finished_at': now}, synchronize_session=False)
+
+        expired = ReportJob.query.filter(
+            ReportJob.status.notin_(ReportJob.ACTIVE_STATUSES),
+            ReportJob.finished_at < now - retention
+        ).all()
+        for job in expired:
+            path = self.artifact_path(job)
+            if os.path.exists(path):
+                os.remove(path)
+            db.session.delete(job)
+        return len(expired)
+
+# Create a singleton instance
+report_queue = ReportQueue(workers=Config.REPORT_WORKERS)
+
+def run_job(job_id):
+    """Claim and render one job; runs in a pool process inside an app context"""
+    claimed = ReportJob.query.filter(
+        ReportJob.id == job_id,
+        ReportJob.status == 'queued'
+    ).update({'status': 'running', 'started_at': datetime.utcnow()}, synchronize_session=False)
+    db.session.commit()
+    if not claimed:
+        # Cancelled (or timed out) while queued
+        return
+
+    job = ReportJob.query.get(job_id)
+    path = report_queue.artifact_path(job)
+    partial = path + '.part'
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+
+    result = None
+    try:
+        filename = REPORT_TYPES[job.report_type].render(job, partial)
+        os.replace(partial, path)
+        result = {'status': 'succeeded', 'filename': filename, 'size': os.path.getsize(path)}
+    except JobCancelled:
+        db.session.rollback()
+    except Exception as e:
+        logger.error(f"Report job {job_id} failed: {str(e)}")
+        db.session.rollback()
+        result = {'status': 'failed', 'error': str(e)[:255]}
+    finally:
+        if os.path.exists(partial):
+            os.remove(partial)
+
+    if result:
+        result['finished_at'] = datetime.utcnow()
+        updated = ReportJob.query.filter(
+            ReportJob.id == job_id,
+            ReportJob.status == 'running'
+        ).update(result, synchronize_session=False)
+        db.session.commit()
+        if not updated and os.path.exists(path):
+            # Cancelled while rendering
+            os.remove(path)
+
+@event.listens_for(db.session, 'after_commit')
+def _submit_on_commit(session):
+    """Start jobs only once the rows the pool process will claim are committed"""
+    for job_id in session.info.pop('report_jobs_created', []):
+        try:
+            report_queue.submit(job_id)
+        except Exception as e:
+            # The job is committed; failing here would turn the response into a 500
+            logger.error(f"Could not submit report job {job_id}: {str(e)}")
+
+@event.listens_for(db.session, 'after_rollback')
+def _discard_on_rollback(session):
+    session.info.pop('report_jobs_created', None)
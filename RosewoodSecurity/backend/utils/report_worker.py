@@ -0,0 +1,17 @@
+"""
+Entry point for report job pool processes (see utils/report_jobs.py).
+
+The pool starts processes with 'spawn', so this module is the first thing
+a process imports: it loads the application before the job code, in the
+same order as the web process, and gives each job its own app context
+and session.
+"""
+from app import app, db
+from utils.report_jobs import run_job
+
+def run_in_child(job_id):
+    with app.app_context():
+        try:
+            run_job(job_id)
+        finally:
+            db.session.remove()
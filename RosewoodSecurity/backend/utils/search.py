@@ -0,0 +1,123 @@
+"""
+Global full-text search (GET /search/).
+
+Each searchable type contributes a document built from its free-text
+columns. On PostgreSQL the documents are matched with to_tsvector @@
+websearch_to_tsquery and ranked with ts_rank; the tsvector expressions
+are indexed with GIN (migration 0007), so the index follows every insert
+and update without any application-side bookkeeping. The per-type
+matches are combined with UNION ALL and keyset-paginated on
+(rank, type, id), best match first.
+
+Other databases fall back to requiring every search word somewhere in
+the document (ILIKE, with % and _ matched literally), with all matches
+ranked equally.
+"""
+from sqlalchemy import and_, cast, func, literal, literal_column, select, union_all
+
+from app import db
+from models.key import Key
+from models.access_card import AccessCard
+from models.employee import Employee
+from models.transaction import Transaction
+from utils.employee_search import escape_like
+from utils.serialization import eager_load
+from utils.pagination import paginate
+
+class SearchDocument:
+    """The free-text columns of one searchable model"""
+
+    def __init__(self, model, config, columns):
+        self.model = model
+        self.config = config  # text search configuration, e.g. 'english'
+        self.columns = columns
+
+    def text(self):
+        # Must match the model's index expression in migration 0007
+        space = literal_column("' '")
+        parts = [func.coalesce(column, literal_column("''")) for column in self.columns]
+        document = parts[0]
+        for part in parts[1:]:
+            document = document + space + part
+        return document
+
+    def matches(self, q):
+        """Select (rank, type, id) for each row matching the search text"""
+        if db.engine.dialect.name == 'postgresql':
+            config = literal_column(f"'{self.config}'")
+            vector = func.to_tsvector(config, self.text())
+            tsquery = func.websearch_to_tsquery(config, q)
+            condition = vector.op('@@')(tsquery)
+            rank = func.ts_rank(vector, tsquery)
+        else:
+            document = self.text()
+            condition = and_(*[document.ilike(f'%{escape_like(word)}%', escape='\\') for word in q.split()])
+            rank = literal(1.0)
+
+        return select(
+            cast(rank, db.Float).label('rank'),
+            literal(self.model.__tablename__, db.String).label('type'),
+            self.model.id.label('id')
+        ).where(condition)
+
+SEARCH_DOCUMENTS = {
+    'keys': SearchDocument(Key, 'english', [Key.name, Key.location, Key.description]),
+    'access_cards': SearchDocument(AccessCard, 'simple', [AccessCard.card_number, AccessCard.card_type]),
+    'employees': SearchDocument(Employee, 'simple', [Employee.first_name, Employee.last_name]),
+    'transactions': SearchDocument(Transaction, 'english', [Transaction.purpose, Transaction.notes])
+}
+
+def parse_types(value):
+    """
+    Parse a comma-separated type filter, dropping repeated types
+
+    Raises:
+        ValueError: If a type is not searchable
+    """
+    if not value:
+        return list(SEARCH_DOCUMENTS)
+    # A repeated type would match (and page) every row twice
+    types = list(dict.fromkeys(t.strip() for t in value.split(',') if t.strip()))
+    unknown = [t for t in types if t not in SEARCH_DOCUMENTS]
+    if unknown:
+        raise ValueError(f"Unknown search types: {', '.join(unknown)}. "
+                         f"Valid types: {', '.join(SEARCH_DOCUMENTS)}")
+    return types
+
+def search(q, types):
+    """
+    Run a ranked search and fetch one page of results
+
+    Args:
+        q (str): The search text
+        types (list): Names from SEARCH_DOCUMENTS to search
+
+    Returns:
+        tuple: (result dicts with type, id, rank and document, pagination metadata dict)
+    """
+    q = q.strip()
+    if not q:
+        raise ValueError('Search text must not be empty')
+
+    hits = union_all(*[SEARCH_DOCUMENTS[t].matches(q) for t in types]).subquery('hits')
+    rows, pagination = paginate(
+        db.session.query(hits.c.rank, hits.c.type, hits.c.id),
+        [hits.c.rank, hits.c.type, hits.c.id],
+        descending=True
+    )
+
+    # One query per type for the page's objects
+    objects = {}
+    for t in {row.type for row in rows}:
+        model = SEARCH_DOCUMENTS[t].model
+        ids = [row.id for row in rows if row.type == t]
+        for obj in eager_load(model.query.filter(model.id.in_(ids)), model).all():
+            objects[(t, obj.id)] = obj
+
+    results = [{
+        'type': row.type,
+        'id': row.id,
+        'rank': row.rank,
+        'document': objects[(row.type, row.id)].to_dict()
+    } for row in rows if (row.type, row.id) in objects]
+    return results, pagination
@@ -0,0 +1,78 @@
+"""
+Eager-loading declarations for model serialization.
+
+Each model's to_dict() walks relationships which, when loaded lazily,
+cost one query per row. The loaders below declare which relationships
+back each serialized field so list endpoints can fetch them up front in
+a fixed number of batched queries, however many rows are returned.
+"""
+from sqlalchemy.orm import joinedload, selectinload
+
+from models.key import Key
+from models.access_card import AccessCard
+from models.employee import Employee
+from models.transaction import Transaction
+from models.department import Department
+
+def _key_loaders():
+    return {
+        'current_checkout': [
+            selectinload(Key.active_transactions).joinedload(Transaction.employee)
+        ],
+        'authorized_departments': [selectinload(Key.authorized_departments)]
+    }
+
+def _access_card_loaders():
+    return {
+        'employee_name': [joinedload(AccessCard.assigned_employee)]
+    }
+
+def _employee_loaders():
+    return {
+        'department_name': [joinedload(Employee.department)],
+        'active_checkouts': [selectinload(Employee.active_transactions)]
+    }
+
+def _transaction_loaders():
+    return {
+        'employee': [joinedload(Transaction.employee)],
+        'item': [joinedload(Transaction.key), joinedload(Transaction.access_card)]
+    }
+
+def _department_loaders():
+    return {
+        'employee_count': [selectinload(Department.employees)],
+        'key_permissions': [selectinload(Department.key_permissions)]
+    }
+
+# Loader factories are resolved per call because backref attributes such as
+# Transaction.employee only exist once the mappers have been configured.
+RESOURCE_LOADERS = {
+    Key: _key_loaders,
+    AccessCard: _access_card_loaders,
+    Employee: _employee_loaders,
+    Transaction: _transaction_loaders,
+    Department: _department_loaders
+}
+
+def get_loader_options(model, fields=None):
+    """
+    Get the loader options needed to serialize a model
+
+    Args:
+        model: The model class being serialized
+        fields (iterable): Serialized fields to load relationships for.
+                           If None, loads everything to_dict() touches.
+
+    Returns:
+        list: SQLAlchemy loader options
+    """
+    options = []
+    for field, field_options in RESOURCE_LOADERS[model]().items():
+        if fields is None or field in fields:
+            options.extend(field_options)
+    return options
+
+def eager_load(query, model, fields=None):
+    """Attach the loader options for a model's serialized fields to a query"""
+    return query.options(*get_loader_options(model, fields))
@@ -0,0 +1,110 @@
+from datetime import datetime
+from sqlalchemy import text
+import threading
+
+from app import db
+from config import Config
+
+# Atomically bump the day's counter by :count and return the new high-water
+# mark. Runs as a single statement, so concurrent allocators never see the
+# same range and no lock is held beyond the statement itself.
+_RESERVE_SQL = text("""
+    INSERT INTO transaction_counters (day, last_value)
+    VALUES (:day, :count)
+    ON CONFLICT (day) DO UPDATE
+    SET last_value = transaction_counters.last_value + :count
+    RETURNING last_value
+""")
+
+class TransactionNumberAllocator:
+    """
+    Hands out transaction numbers (TRX-YYYYMMDD-NNN) from a per-day counter
+
+    Each worker process reserves blocks of numbers from the counter row in a
+    single round trip on its own connection, so a rolled back checkout never
+    holds the counter locked. A block size of 1 keeps numbers in allocation
+    order across workers; larger blocks trade that for fewer round trips.
+    """
+
+    def __init__(self, block_size=1):
+        self.block_size = block_size
+        self._lock = threading.Lock()
+        self._day = None
+        # Start with an empty block so the first number is always reserved
+        self._next = 1
+        self._end = 0
+
+    def next_number(self):
+        """Allocate a single transaction number"""
+        return self.reserve(1)[0]
+
+    def reserve(self, count):
+        """
+        Allocate several transaction numbers at once
+
+        Args:
+            count (int): How many numbers to allocate
+
+        Returns:
+            list: The allocated transaction numbers, in ascending order
+        """
+        if count < 1:
+            raise ValueError("Count must be positive")
+
+        day = datetime.utcnow().date()
+        with self._lock:
+            if self._day != day:
+                self._day, self._next, self._end = day, 1, 0
+
+            values = []
+            while len(values) < count:
+                if self._next > self._end:
+                    self._reserve_block(day, max(self.block_size, count - len(values)))
+                take = min(count - len(values), self._end - self._next + 1)
+                values.extend(range(self._next, self._next + take))
+                self._next += take
+
+        date_str = day.strftime('%Y%m%d')
+        return [f'TRX-{date_str}-{value:03d}' for value in values]
+
+    def _reserve_block(self, day, size):
+        """Reserve the next `size` numbers for `day` from the database counter"""
+        with db.engine.begin() as connection:
+            end = connection.execute(_RESERVE_SQL, {'day': day, 'count': size}).scalar()
+        self._next, self._end = end - size + 1, end
+
+    def sync_with_existing(self, day=None):
+        """
+        Raise a day's counter to the highest existing transaction number
+
+        Needed once when the counter table is introduced on a day that
+        already has transactions numbered by the old scheme.
+        """
+        from models.transaction import Transaction
+
+        day = day or datetime.utcnow().date()
+        prefix = f"TRX-{day.strftime('%Y%m%d')}-"
+        numbers = db.session.query(Transaction.transaction_number).filter(
+            Transaction.transaction_number.like(f'{prefix}%')
+        ).all()
+        highest = max((int(n[0][len(prefix):]) for n in numbers), default=0)
+
+        with db.engine.begin() as connection:
+            connection.execute(text("""
+                INSERT INTO transaction_counters (day, last_value)
+                VALUES (:day, :highest)
+                ON CONFLICT (day) DO UPDATE
+                SET last_value = CASE
+                    WHEN transaction_counters.last_value > :highest
+                    THEN transaction_counters.last_value ELSE :highest
+                END
+            """), {'day': day, 'highest': highest})
+
+        with self._lock:
+            self._day = None
+        return highest
+
+# Create a singleton instance per worker process
+transaction_numbers = TransactionNumberAllocator(
+    block_size=Config.TRANSACTION_NUMBER_BLOCK_SIZE
+)
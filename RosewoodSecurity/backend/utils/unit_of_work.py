@@ -0,0 +1,59 @@
+"""
+Request-scoped unit of work.
+
+Model methods (Key.check_out, Transaction.check_in, ...) only change
+state; they never commit. Whatever a request leaves pending in the
+session is committed once, after the view returns a successful response,
+and rolled back if the response is an error. Views may still commit
+explicitly when the response needs database-generated values such as new
+IDs; the unit of work then finds nothing left to do.
+"""
+from flask import jsonify
+from sqlalchemy import event
+from sqlalchemy.orm.exc import StaleDataError
+
+from app import db
+
+# Versioned rows (Key, AccessCard) changed by a concurrent request
+CONFLICT_MESSAGE = 'The item was changed by another request; reload it and try again'
+
+def has_pending_changes(session):
+    """Whether the session holds changes not yet committed, flushed or not"""
+    return bool(session.new or session.dirty or session.deleted or session.info.get('uow_flushed'))
+
+def init_unit_of_work(app):
+    """Commit or roll back each request's session changes as it completes"""
+
+    @app.after_request
+    def complete_unit_of_work(response):
+        session = db.session
+        if not has_pending_changes(session):
+            return response
+
+        if response.status_code >= 400:
+            session.rollback()
+            return response
+
+        try:
+            session.commit()
+        except StaleDataError:
+            session.rollback()
+            response = jsonify({'error': CONFLICT_MESSAGE})
+            response.status_code = 409
+        except Exception as e:
+            session.rollback()
+            response = jsonify({'error': str(e)})
+            response.status_code = 500
+        return response
+
+@event.listens_for(db.session, 'after_flush')
+def _mark_flushed(session, flush_context):
+    session.info['uow_flushed'] = True
+
+@event.listens_for(db.session, 'after_commit')
+def _clear_on_commit(session):
+    session.info.pop('uow_flushed', None)
+
+@event.listens_for(db.session, 'after_rollback')
+def _clear_on_rollback(session):
+    session.info.pop('uow_flushed', None)
@@ -0,0 +1,108 @@
+"""
+Weekly security report PDF (/reports/weekly and weekly report jobs).
+"""
+from sqlalchemy import func
+from datetime import datetime, timedelta
+from reportlab.lib import colors
+from reportlab.lib.pagesizes import letter
+from reportlab.platypus import SimpleDocTemplate, Table, TableStyle, Paragraph
+from reportlab.lib.styles import getSampleStyleSheet
+
+from app import db
+from models.transaction import Transaction
+from models.department import Department
+from models.usage_rollup import UsageRollup
+
+def build_weekly_report(output, end_date):
+    """
+    Render the weekly report for the seven days ending on end_date
+
+    Args:
+        output: A path or binary file object to write the PDF to
+        end_date (date): Last day covered by the report
+    """
+    start_date = end_date - timedelta(days=6)
+    
+    doc = SimpleDocTemplate(output, pagesize=letter)
+    styles = getSampleStyleSheet()
+    elements = []
+    
+    # Add title
+    title = Paragraph(f"Weekly Security Report ({start_date} to {end_date})", 
+                     styles['Heading1'])
+    elements.append(title)
+    
+    # Department summary from the daily rollup
+    dept_rows = db.session.query(
+        Department.name,
+        UsageRollup.item_type,
+        func.sum(UsageRollup.checkout_count)
+    ).join(
+        UsageRollup, UsageRollup.department_id == Department.id
+    ).filter(
+        UsageRollup.day.between(start_date, end_date)
+    ).group_by(
+        Department.name,
+        UsageRollup.item_type
+    ).all()
+    
+    dept_summary = {}
+    for dept, item_type, count in dept_rows:
+        counts = dept_summary.setdefault(dept, {'keys': 0, 'cards': 0})
+        counts['keys' if item_type == 'key' else 'cards'] += int(count)
+    
+    dept_data = [['Department', 'Keys Checked Out', 'Cards Checked Out']]
+    for dept, counts in dept_summary.items():
+        dept_data.append([dept, counts['keys'], counts['cards']])
+    
+    dept_table = Table(dept_data)
+    dept_table.setStyle(TableStyle([
+        ('BACKGROUND', (0, 0), (-1, 0), colors.grey),
+        ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
+        ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
+        ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
+        ('FONTSIZE', (0, 0), (-1, 0), 14),
+        ('BOTTOMPADDING', (0, 0), (-1, 0), 12),
+        ('BACKGROUND', (0, 1), (-1, -1), colors.beige),
+        ('TEXTCOLOR', (0, 1), (-1, -1), colors.black),
+        ('FONTNAME', (0, 1), (-1, -1), 'Helvetica'),
+        ('FONTSIZE', (0, 1), (-1, -1), 12),
+        ('GRID', (0, 0), (-1, -1), 1, colors.black)
+    ]))
+    elements.append(dept_table)
+    
+    # Add overdue items section
+    elements.append(Paragraph("Overdue Items", styles['Heading2']))
+    overdue = Transaction.query.filter(
+        Transaction.check_out_time.between(
+            datetime.combine(start_date, datetime.min.time()),
+            datetime.combine(end_date, datetime.max.time())
+        ),
+        Transaction.status == 'overdue'
+    ).all()
+    if overdue:
+        overdue_data = [['Item', 'Employee', 'Department', 'Days Overdue']]
+        for t in overdue:
+            item_id = t.key.key_number if t.key_id else t.access_card.card_number
+            days_overdue = (datetime.utcnow() - t.expected_return_time).days
+            overdue_data.append([
+                item_id,
+                t.employee.full_name,
+                t.employee.department.name,
+                days_overdue
+            ])
+        
+        overdue_table = Table(overdue_data)
+        overdue_table.setStyle(TableStyle([
+            ('BACKGROUND', (0, 0), (-1, 0), colors.red),
+            ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
+            ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
+            ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
+            ('GRID', (0, 0), (-1, -1), 1, colors.black)
+        ]))
+        elements.append(overdue_table)
+    else:
+        elements.append(Paragraph("No overdue items", styles['Normal']))
+    
+    # Build PDF
+    doc.build(elements)
@@ -0,0 +1,124 @@
+"""
+Streaming single-sheet XLSX writer.
+
+Builds the workbook with zipfile on an unseekable sink, so each row's
+XML is compressed and handed to the caller as it is written: nothing but
+the current chunk is held in memory, and the first bytes can go out
+before the last row is read. All cells are written as inline strings,
+which needs no shared-strings table (and so no second pass).
+"""
+from xml.sax.saxutils import escape
+import re
+import zipfile
+
+# Characters XML 1.0 cannot represent
+_ILLEGAL_XML = re.compile('[\x00-\x08\x0b\x0c\x0e-\x1f]')
+
+_CONTENT_TYPES = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+    '<Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types">'
+    '<Default Extension="rels" ContentType="application/vnd.openxmlformats-package.relationships+xml"/>'
+    '<Default Extension="xml" ContentType="application/xml"/>'
+    '<Override PartName="/xl/workbook.xml" '
+    'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet.main+xml"/>'
+    '<Override PartName="/xl/worksheets/sheet1.xml" '
+    'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.worksheet+xml"/>'
+    '</Types>'
+)
+
+_ROOT_RELS = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+    '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+    '<Relationship Id="rId1" '
+    'Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/officeDocument" '
+    'Target="xl/workbook.xml"/>'
+    '</Relationships>'
+)
+
+_WORKBOOK = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+    '<workbook xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main" '
+    'xmlns:r="http://schemas.openxmlformats.org/officeDocument/2006/relationships">'
+    '<sheets><sheet name="{name}" sheetId="1" r:id="rId1"/></sheets>'
+    '</workbook>'
+)
+
+_WORKBOOK_RELS = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+    '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+    '<Relationship Id="rId1" '
+    'Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/worksheet" '
+    'Target="worksheets/sheet1.xml"/>'
+    '</Relationships>'
+)
+
+_SHEET_START = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+    '<worksheet xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main"><sheetData>'
+)
+
+_SHEET_END = '</sheetData></worksheet>'
+
+MIMETYPE = 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
+
+class _ChunkSink:
+    """Write-only file object that collects bytes until they are taken"""
+
+    def __init__(self):
+        self.chunks = []
+
+    def write(self, data):
+        self.chunks.append(bytes(data))
+        return len(data)
+
+    def flush(self):
+        pass
+
+    def take(self):
+        data = b''.join(self.chunks)
+        self.chunks = []
+        return data
+
+def _row_xml(values):
+    cells = ''.join(
+        '<c t="inlineStr"><is><t xml:space="preserve">{}</t></is></c>'.format(
+            escape(_ILLEGAL_XML.sub('', str(value)))
+        ) if value is not None else '<c/>'
+        for value in values
+    )
+    return f'<row>{cells}</row>'
+
+def stream_xlsx(sheet_name, header, rows, rows_per_chunk=500):
+    """
+    Generate an XLSX workbook as a stream of byte chunks
+
+    Args:
+        sheet_name (str): Worksheet name (at most 31 characters)
+        header (list): Column titles for the first row
+        rows (iterable): Rows of cell values; None leaves a cell empty
+        rows_per_chunk (int): Rows written between yields
+
+    Yields:
+        bytes: The next part of the file
+    """
+    sink = _ChunkSink()
+    with zipfile.ZipFile(sink, 'w', compression=zipfile.ZIP_DEFLATED) as workbook:
+        workbook.writestr('[Content_Types].xml', _CONTENT_TYPES)
+        workbook.writestr('_rels/.rels', _ROOT_RELS)
+        workbook.writestr('xl/workbook.xml', _WORKBOOK.format(name=escape(sheet_name[:31], {'"': '&quot;'})))
+        workbook.writestr('xl/_rels/workbook.xml.rels', _WORKBOOK_RELS)
+
+        with workbook.open('xl/worksheets/sheet1.xml', 'w') as sheet:
+            sheet.write((_SHEET_START + _row_xml(header)).encode())
+            pending = 0
+            for row in rows:
+                sheet.write(_row_xml(row).encode())
+                pending += 1
+                if pending == rows_per_chunk:
+                    pending = 0
+                    data = sink.take()
+                    if data:
+                        yield data
+            sheet.write(_SHEET_END.encode())
+
+    yield sink.take()